@@ -0,0 +1,159 @@
+"""
+Admission control and load awareness
+
+A LocalNode created with maxinflight=<n> executes at most n remote requests
+at a time: the next ones are rejected right away with Busy instead of
+queueing behind them. While it is limited, the dict responses of the node
+carry its load (requests in flight / n, the answered one included) in their
+"srvload" key.
+
+A LocalNode created with loadaware=True records the loads and the Busy
+rejections of its peers in a LoadTable. Its lookups hop with the dict
+forms of the rpc, which carry the loads, and route around the overloaded
+peers. A finger which reported HIGHLOAD or more gives way to the next
+preceding finger if that one reported a lower load (see
+LocalNode.closest_preceding_finger()). Only a Busy rejection makes a peer
+overloaded: a node answering the last request it has room for reports a
+load of 1.0, but it answered.
+"""
+import threading
+import time
+import xmlrpc.client
+
+import wire
+
+# xmlrpc fault code of a Busy rejection
+BUSYCODE = 503
+
+# load from which lookups prefer a less loaded finger
+HIGHLOAD = 0.75
+
+# load recorded for a peer which rejected a request, above any reported load
+BUSYLOAD = float("inf")
+
+
+class Busy(Exception):
+    """Raised when a node rejects a request because it is overloaded"""
+    pass
+
+
+def isbusy(error):
+    """
+    True if `error`, raised by a rpc, is a Busy rejection of the remote node
+    Each transport reports it in its own way
+    """
+    if isinstance(error, Busy):
+        return True
+    if isinstance(error, xmlrpc.client.Fault):
+        return error.faultCode == BUSYCODE
+    if isinstance(error, wire.Fault):
+        return str(error).startswith(Busy.__name__ + ":")
+    return False
+
+
+class Admission(object):
+    """
+    Bound the number of requests executed at the same time
+
+    @param limit: maximum number of requests in flight, 0 for no limit
+    """
+    def __init__(self, limit=0):
+        self.limit = limit
+        self.inflight = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Ratio of the limit used by the requests in flight
+        """
+        if not self.limit:
+            return 0.0
+        return self.inflight / self.limit
+
+    def call(self, function, *params):
+        """
+        Return function(*params) if there is room for one more request,
+        raise Busy otherwise. A dict result gets the load in "srvload".
+        """
+        with self.lock:
+            if self.limit and self.inflight >= self.limit:
+                self.rejected += 1
+                raise Busy("{} requests in flight".format(self.inflight))
+            self.inflight += 1
+        try:
+            res = function(*params)
+        finally:
+            with self.lock:
+                # the reported load counts the request answered
+                load = self.load()
+                self.inflight -= 1
+        if self.limit and isinstance(res, dict):
+            res = dict(res, srvload=load)
+        return res
+
+
+class LoadTable(object):
+    """
+    Last loads reported by the peers, by uid value
+    A load is forgotten `ttl` seconds after it was reported.
+
+    @param clock: function returning the current time, in seconds
+    """
+    def __init__(self, ttl=1.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.loads = {}
+
+    def add(self, peer, load):
+        self.loads[peer] = (load, self.clock() + self.ttl)
+
+    def setbusy(self, peer):
+        self.add(peer, BUSYLOAD)
+
+    def get(self, peer):
+        """
+        Return the load of `peer`, None if unknown or expired
+        """
+        entry = self.loads.get(peer)
+        if entry is None:
+            return None
+        if entry[1] < self.clock():
+            self.loads.pop(peer, None)
+            return None
+        return entry[0]
+
+    def overloaded(self, peer):
+        """
+        True if `peer` rejected a request in the last ttl seconds
+        """
+        return self.get(peer) == BUSYLOAD
+
+
+class LoadProxy(object):
+    """
+    Wrap a methodProxy (see chord.NodeInterface) to record in `table` the
+    load piggybacked on the responses of `peer` and its Busy rejections
+    """
+    def __init__(self, proxy, peer, table):
+        self._proxy = proxy
+        self._peer = peer
+        self._table = table
+
+    def __getattr__(self, name):
+        method = getattr(self._proxy, name)
+        if not callable(method):
+            return method
+        proxy = self
+
+        def recorded(*params):
+            try:
+                res = method(*params)
+            except Exception as e:
+                if isbusy(e):
+                    proxy._table.setbusy(proxy._peer)
+                raise
+            if isinstance(res, dict) and "srvload" in res:
+                proxy._table.add(proxy._peer, res["srvload"])
+            return res
+        return recorded
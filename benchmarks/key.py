@@ -0,0 +1,146 @@
+"""
+Microbenchmarks of key.Key interval predicates and arithmetic
+
+Usage, from the repository root:
+    python -m benchmarks.key --output key.json
+
+Each operation is timed on key.Key and on benchmarks.keyreference, the
+baseline implementation, with Key, str or mixed (Key, str) limits. Results of both implementations are first
+compared on random keys, limits and wrapping intervals; the run fails if
+they differ. Results, in ns per call with the speedup over the reference,
+are printed, or written with --output, as json.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+
+import key
+from benchmarks.keyreference import ReferenceKey
+
+PREDICATES = ("isbetween", "is_between_r_inclu", "is_between_l_inclu",
+        "is_between_inclu", "is_between_exclu")
+
+
+def hexa(value):
+    return "%064x" % value
+
+
+def outcome(func, *args):
+    """
+    Return the result of func(*args), or the type of the raised exception
+    """
+    try:
+        return func(*args)
+    except Exception as e:
+        return type(e)
+
+
+def cases(rng, nb):
+    """
+    Yield (value, limit1, limit2) as int, with equal values, equal limits
+    and wrapping intervals
+    """
+    top = (1 << 256) - 1
+    special = [0, 1, top - 1, top]
+    for i in range(nb):
+        values = [rng.choice(special) if rng.random() < 0.2 else rng.getrandbits(256)
+                for j in range(3)]
+        shape = rng.random()
+        if shape < 0.1:
+            values[1] = values[0]
+        elif shape < 0.2:
+            values[2] = values[0]
+        elif shape < 0.25:
+            values[2] = values[1]
+        yield values
+
+
+def check(nb=5000, seed=0):
+    """
+    Raise AssertionError if key.Key and the reference disagree
+    """
+    rng = random.Random(seed)
+    for value, limit1, limit2 in cases(rng, nb):
+        for wrap in (key.Key, str):
+            current = key.Key(hexa(value))
+            reference = ReferenceKey(hexa(value))
+            if wrap is key.Key:
+                args = (key.Key(hexa(limit1)), key.Key(hexa(limit2)))
+                refargs = (ReferenceKey(hexa(limit1)), ReferenceKey(hexa(limit2)))
+            else:
+                args = refargs = (hexa(limit1), hexa(limit2))
+            for name in PREDICATES + ("_is_inside",):
+                res = outcome(getattr(current, name), *args)
+                ref = outcome(getattr(reference, name), *refargs)
+                assert res == ref, (name, hexa(value), args, res, ref)
+                res = outcome(getattr(current, name), args[0], hexa(limit2))
+                ref = outcome(getattr(reference, name), refargs[0], hexa(limit2))
+                assert res == ref, (name, hexa(value), args, res, ref)
+        for operand in (limit1, hexa(limit1)):
+            assert current + operand == reference + operand
+            assert current - operand == reference - operand
+        assert current.canonicalize(limit1) == reference.canonicalize(limit1)
+
+
+def timeop(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def bench(number, seed=0):
+    rng = random.Random(seed)
+    value, limit1, limit2 = rng.getrandbits(256), rng.getrandbits(256), rng.getrandbits(256)
+    results = []
+    for name, kind in [(p, "Key") for p in PREDICATES + ("_is_inside",)]\
+            + [(p, "str") for p in PREDICATES + ("_is_inside",)]\
+            + [(p, "mixed") for p in PREDICATES + ("_is_inside",)]\
+            + [("__add__", "int"), ("__add__", "str"), ("__sub__", "int"),
+                ("__sub__", "str"), ("canonicalize", "int")]:
+        timings = {}
+        for label, cls in (("reference", ReferenceKey), ("current", key.Key)):
+            obj = cls(hexa(value))
+            if kind == "Key":
+                args = (cls(hexa(limit1)), cls(hexa(limit2)))
+            elif kind == "str":
+                args = (hexa(limit1), hexa(limit2))
+            elif kind == "mixed":
+                args = (cls(hexa(limit1)), hexa(limit2))
+            else:
+                args = (limit1,)
+            if name in ("__add__", "__sub__", "canonicalize"):
+                args = args[:1] if kind == "int" else (hexa(limit1),)
+            method = getattr(obj, name)
+            timings[label] = timeop(lambda: method(*args), number)
+        results.append({"operation": name,
+                "operands": kind,
+                "reference_ns": timings["reference"],
+                "current_ns": timings["current"],
+                "speedup": timings["reference"] / timings["current"]})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000,
+            help="calls per timing")
+    parser.add_argument("--checks", type=int, default=5000,
+            help="random cases compared with the reference before timing")
+    parser.add_argument("--output", help="json file to write, default stdout")
+    args = parser.parse_args(argv)
+
+    check(args.checks)
+    results = {"benchmark": "key",
+            "python": platform.python_version(),
+            "results": bench(args.number)}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Scaling of keyindex.KeyIndex with the number of keys
+
+Usage, from the repository root:
+    python -m benchmarks.keyindex --sizes 50000 200000 400000 --output keyindex.json
+
+For each size, random keys are added one by one, as SegmentStore.put()
+does, then a tenth of them are discarded, counted and split off by
+random ring intervals. The time per operation should stay nearly flat as
+the size grows; the run fails if adding keys becomes more than 3 times
+slower per key from the smallest to the largest size. Results are printed,
+or written with --output, as json.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from keyindex import KeyIndex
+
+
+def measure(size, seed=0):
+    rng = random.Random(seed)
+    keys = [rng.getrandbits(256) for i in range(size)]
+    index = KeyIndex()
+    start = time.perf_counter()
+    for key in keys:
+        index.add(key)
+    add = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys[:size // 10]:
+        index.discard(key)
+    discard = time.perf_counter() - start
+
+    bounds = [(rng.getrandbits(256), rng.getrandbits(256)) for i in range(100)]
+    start = time.perf_counter()
+    counted = sum(index.count(first, last) for first, last in bounds)
+    count = time.perf_counter() - start
+
+    # splits of a thousandth of the ring, as the join of a new predecessor
+    start = time.perf_counter()
+    moved = 0
+    for i in range(100):
+        first = rng.getrandbits(256)
+        moved += len(index.split(first, (first + 2 ** 246) % 2 ** 256))
+    split = time.perf_counter() - start
+    return {"size": size,
+            "add_ns": add / size * 1e9,
+            "discard_ns": discard / (size // 10) * 1e9,
+            "count_us": count / len(bounds) * 1e6,
+            "counted": counted,
+            "split_us": split / 100 * 1e6,
+            "moved": moved}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50000, 200000, 400000])
+    parser.add_argument("--output", help="json file to write, default stdout")
+    args = parser.parse_args(argv)
+
+    results = [measure(size) for size in sorted(args.sizes)]
+    res = {"benchmark": "keyindex",
+            "python": platform.python_version(),
+            "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(res, f, indent=2)
+    else:
+        json.dump(res, sys.stdout, indent=2)
+        print()
+    if results[-1]["add_ns"] > 3 * results[0]["add_ns"]:
+        sys.exit("adding keys does not scale: {:.0f}ns per key at {} keys, {:.0f}ns at {}".format(
+                results[0]["add_ns"], results[0]["size"],
+                results[-1]["add_ns"], results[-1]["size"]))
+
+
+if __name__ == "__main__":
+    main()
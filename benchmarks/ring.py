@@ -0,0 +1,257 @@
+"""
+Lookup and stabilization benchmarks on a ring of LocalNode on localhost
+
+Usage, from the repository root:
+    python -m benchmarks.ring --sizes 10 50 100 --output ring.json
+
+For each ring size it measures:
+    - memory allocated per node (tracemalloc)
+    - join cost: rpc issued by the whole ring per join (metrics.Metrics)
+    - lookup throughput and p50/p99 latency of find_successor on random keys
+    - for rings built with join_5 and the stabilizer, the time needed for
+      successors and predecessors to converge and the ratio of correct
+      fingers at the end of the measure
+    - with --bootstrap, rings are built by bootstrap.bootstrap() from their
+      membership instead of joins, and the bootstrap duration is measured
+Results are printed, or written with --output, as json.
+"""
+import argparse
+import bisect
+import json
+import platform
+import random
+import socket
+import sys
+import time
+import tracemalloc
+
+import bootstrap
+import chord
+import serverxmlrpc
+
+
+def freeports(nb):
+    """
+    Return `nb` ports free at the time of the call
+    """
+    socks = []
+    try:
+        for i in range(nb):
+            sock = socket.socket()
+            sock.bind(("127.0.0.1", 0))
+            socks.append(sock)
+        return [sock.getsockname()[1] for sock in socks]
+    finally:
+        for sock in socks:
+            sock.close()
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Ring(object):
+    """
+    Ring of `size` LocalNode started on localhost
+
+    @param transport: transport of the nodes
+    @param endpoint: serve all nodes with one shared xmlrpc endpoint
+    @param stabilizer: start the stabilizer of each node
+    """
+    def __init__(self, size, transport=None, endpoint=False, stabilizer=False):
+        self.endpoint = serverxmlrpc.getendpoint() if endpoint else None
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        self.nodes = []
+        for port in freeports(size):
+            self.nodes.append(chord.LocalNode("127.0.0.1", port,
+                    _stabilizer=stabilizer,
+                    endpoint=self.endpoint,
+                    transport=transport,
+                    metrics=True))
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        self.memorypernode = allocated / size
+        self.uids = sorted(int(n.uid.value, 16) for n in self.nodes)
+
+    def owner(self, keyint):
+        """
+        Return the uid, as int, of the node responsible of `keyint`
+        """
+        i = bisect.bisect_left(self.uids, keyint)
+        return self.uids[i % len(self.uids)]
+
+    def rpccount(self):
+        return sum(sum(n.metrics.snapshot()["rpc_calls"].values()) for n in self.nodes)
+
+    def stop(self):
+        for node in self.nodes:
+            if node._stabilizer:
+                node.stabilizer.stop()
+        time.sleep(1.5)
+        for node in self.nodes:
+            node.stopXmlRPCServer()
+        if self.endpoint is not None:
+            self.endpoint.stop()
+
+
+def join(ring):
+    """
+    Join all the nodes with LocalNode.join() and return join costs in rpc
+    """
+    first = ring.nodes[0]
+    costs = []
+    durations = []
+    for node in ring.nodes[1:]:
+        before = ring.rpccount()
+        start = time.perf_counter()
+        node.join(node.getNodeInterface(first.asdict()))
+        durations.append(time.perf_counter() - start)
+        costs.append(ring.rpccount() - before)
+    return {"joins": len(costs),
+            "rpc_per_join_mean": sum(costs) / len(costs) if costs else 0,
+            "rpc_per_join_max": max(costs) if costs else 0,
+            "join_duration_mean": sum(durations) / len(durations) if durations else 0}
+
+
+def bulkbootstrap(ring, transport=None):
+    """
+    Install all the routing tables with bootstrap.bootstrap(), by rpc
+    through `transport` as on a real cluster
+    """
+    start = time.perf_counter()
+    failures = bootstrap.bootstrap([node.asdict() for node in ring.nodes], transport)
+    return {"bootstrap_duration": time.perf_counter() - start,
+            "bootstrap_failures": len(failures)}
+
+
+def lookups(ring, nb, rng):
+    """
+    Run `nb` find_successor of random keys from random nodes
+    """
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for i in range(nb):
+        node = rng.choice(ring.nodes)
+        keyint = rng.getrandbits(node.uid.idlength)
+        keyvalue = node.uid.canonicalize(keyint)
+        t = time.perf_counter()
+        res = node.find_successor(keyvalue)
+        latencies.append(time.perf_counter() - t)
+        if int(res["uid"], 16) != ring.owner(keyint):
+            errors += 1
+    elapsed = time.perf_counter() - start
+    return {"lookups": nb,
+            "throughput": nb / elapsed,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p99": percentile(latencies, 0.99),
+            "wrong_results": errors}
+
+
+def fingerscorrect(ring):
+    """
+    Return the ratio of fingers pointing at the right node
+    """
+    correct = 0
+    total = 0
+    for node in ring.nodes:
+        for finger in node.fingers:
+            total += 1
+            if int(finger.respNode.uid.value, 16) == ring.owner(int(finger.key.value, 16)):
+                correct += 1
+    return correct / total
+
+
+def ringconverged(ring):
+    for node in ring.nodes:
+        uid = int(node.uid.value, 16)
+        i = ring.uids.index(uid)
+        if int(node.successor.uid.value, 16) != ring.uids[(i + 1) % len(ring.uids)]:
+            return False
+        if node.predecessor is None\
+                or int(node.predecessor.uid.value, 16) != ring.uids[i - 1]:
+            return False
+    return True
+
+
+def convergence(ring, timeout):
+    """
+    Join all the nodes with join_5() and wait for the stabilizer
+    """
+    first = ring.nodes[0]
+    for node in ring.nodes[1:]:
+        node.join_5(node.getNodeInterface(first.asdict()))
+    start = time.perf_counter()
+    converged = None
+    while time.perf_counter() - start < timeout:
+        if ringconverged(ring):
+            converged = time.perf_counter() - start
+            break
+        time.sleep(0.1)
+    return {"ring_convergence_time": converged,
+            "timeout": timeout,
+            "fingers_correct_ratio": fingerscorrect(ring)}
+
+
+def bench(size, args, rng):
+    res = {"size": size}
+    ring = Ring(size, args.transport, args.endpoint)
+    try:
+        res["memory_per_node"] = ring.memorypernode
+        if args.bootstrap:
+            res.update(bulkbootstrap(ring, args.transport))
+            res["fingers_correct_ratio_after_bootstrap"] = fingerscorrect(ring)
+        else:
+            res.update(join(ring))
+            res["fingers_correct_ratio_after_join"] = fingerscorrect(ring)
+        res.update(lookups(ring, args.lookups, rng))
+    finally:
+        ring.stop()
+    if args.convergence:
+        ring = Ring(size, args.transport, args.endpoint, stabilizer=True)
+        try:
+            res["stabilizer"] = convergence(ring, args.convergence)
+        finally:
+            ring.stop()
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50],
+            help="ring sizes to benchmark (10 to 500)")
+    parser.add_argument("--lookups", type=int, default=1000,
+            help="number of lookups per ring")
+    parser.add_argument("--transport", default=None,
+            help="transport of the nodes, default xmlrpc")
+    parser.add_argument("--endpoint", action="store_true",
+            help="serve all the nodes with one shared xmlrpc endpoint")
+    parser.add_argument("--bootstrap", action="store_true",
+            help="build the rings from their membership instead of joins")
+    parser.add_argument("--convergence", type=float, default=0,
+            help="also measure stabilizer convergence, waiting at most this many seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="json file to write, default stdout")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results = {"benchmark": "ring",
+            "python": platform.python_version(),
+            "transport": args.transport or "xmlrpc",
+            "endpoint": args.endpoint,
+            "results": [bench(size, args, rng) for size in args.sizes]}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Large ring experiments with the discrete-event simulator
+
+Usage, from the repository root:
+    python -m benchmarks.simulation --size 1000 --output sim.json
+
+Nodes join one after the other through the first node (join_5), every
+--join-interval virtual seconds, while stabilization rounds run in virtual
+time. Joined back to back, before any round, they would all get the first
+node as successor, and sorting them out would take O(N^2) rounds. It
+reports the virtual time for successors and predecessors to converge, the
+lookup path lengths and virtual latencies, then the same after failing a
+fraction of the nodes (--churn). Results are printed, or written with
+--output, as json.
+
+With --regions, nodes are spread over that many regions: --latency is the
+latency between regions, --local-latency the one inside a region. --pns
+enables proximity neighbor selection with that many candidates per finger.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import admission
+import simulator
+from benchmarks.ring import percentile
+
+
+def lookups(sim, nb, rng):
+    rpcs = []
+    latencies = []
+    errors = 0
+    for i in range(nb):
+        node = rng.choice(sim.nodes)
+        keyvalue = node.uid.canonicalize(rng.getrandbits(node.uid.idlength))
+        try:
+            res, nbrpc, elapsed = sim.lookup(node, keyvalue)
+        except (TimeoutError, ConnectionRefusedError, admission.Busy):
+            errors += 1
+            continue
+        rpcs.append(nbrpc)
+        latencies.append(elapsed)
+    return {"lookups": nb,
+            "failed": errors,
+            "rpc_mean": sum(rpcs) / len(rpcs) if rpcs else None,
+            "rpc_p99": percentile(rpcs, 0.99),
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p99": percentile(latencies, 0.99)}
+
+
+def regionlatency(latency, locallatency):
+    """
+    Return the link latency function of nodes whose region is their ip
+    """
+    def linklatency(src, dst):
+        return locallatency if src[0] == dst[0] else latency
+    return linklatency
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--join-interval", type=float, default=1.0,
+            help="virtual seconds between two joins")
+    parser.add_argument("--settle", type=float, default=60.0,
+            help="virtual seconds of stabilization after convergence")
+    parser.add_argument("--churn", type=float, default=0.0,
+            help="fraction of the nodes which fail after the first measure")
+    parser.add_argument("--maxtime", type=float, default=36000.0,
+            help="maximum virtual time to wait for convergence")
+    parser.add_argument("--regions", type=int, default=0)
+    parser.add_argument("--local-latency", type=float, default=0.001)
+    parser.add_argument("--pns", type=int, default=0,
+            help="candidates per finger for proximity neighbor selection")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="json file to write, default stdout")
+    args = parser.parse_args(argv)
+
+    wallstart = time.perf_counter()
+    rng = random.Random(args.seed)
+    linklatency = None
+    if args.regions:
+        linklatency = regionlatency(args.latency, args.local_latency)
+    sim = simulator.Simulator(latency=args.latency, jitter=args.jitter,
+            loss=args.loss, seed=args.seed, linklatency=linklatency)
+
+    def addnode():
+        ip = "10.0.{}.1".format(len(sim.nodes) % args.regions) if args.regions else "10.0.0.1"
+        return sim.addnode(ip=ip, pns=args.pns)
+
+    first = addnode()
+    for i in range(args.size - 1):
+        sim.join(addnode(), first)
+        sim.run(args.join_interval)
+    res = {"benchmark": "simulation",
+            "size": args.size,
+            "latency": args.latency,
+            "regions": args.regions,
+            "pns": args.pns,
+            "loss": args.loss,
+            "join_virtual_time": sim.now,
+            "convergence_virtual_time": sim.runtillconverged(maxtime=args.maxtime)}
+    sim.run(args.settle)
+    res["stable"] = lookups(sim, args.lookups, rng)
+    if args.churn:
+        for node in rng.sample(sim.nodes[1:], int(args.churn * args.size)):
+            sim.removenode(node)
+        sim.run(args.settle)
+        res["churn"] = {"failed_nodes": int(args.churn * args.size),
+                "ring_converged": sim.ringconverged()}
+        res["churn"].update(lookups(sim, args.lookups, rng))
+    res["rpc_total"] = sim.rpccount
+    res["virtual_time"] = sim.now
+    res["wall_time"] = time.perf_counter() - wallstart
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(res, f, indent=2)
+    else:
+        json.dump(res, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Bulk bootstrap of a ring whose membership is known, e.g. on cluster restart
+
+routingtables() computes the predecessor and the finger table of every
+member locally from the sorted uids (see ownership.RingOwnership), then
+bootstrap() installs them on the members in parallel, with one
+install_routing rpc per node (see LocalNode.install_routing()).
+The ring is routable as soon as bootstrap() returns, without any join or
+stabilization round.
+
+A finger table is sent in a compact form: the list of [i, node reference]
+where finger i is the first one on that node, so a table holds about
+log2(N) entries instead of idlength.
+"""
+import concurrent.futures
+
+import chord
+import ownership
+from key import IDLENGTH
+
+
+def routingtables(members, idlength=None):
+    """
+    Return the routing table of each member, in ring order, as a list of
+    (node, predecessor reference, fingers)
+
+    @param members: LocalNode, BasicNode, dicts or node references
+    @param idlength: number of bits of the uids, by default the one of
+        the uids of the members
+    """
+    nodes = [m if isinstance(m, chord.BasicNode) else chord.BasicNode(m) for m in members]
+    if idlength is None:
+        idlength = nodes[0].uid.idlength if nodes else IDLENGTH
+    ring = ownership.RingOwnership(nodes, idlength)
+    refs = [node.asref() for node in ring.nodes]
+    mask = (1 << idlength) - 1
+    offsets = chord.FINGER_OFFSETS[:idlength]
+    starts = []
+    for node in ring.nodes:
+        uid = node.uid.toint()
+        starts.extend((uid + offset) & mask for offset in offsets)
+    # owners of the starts of all the finger tables, in one batch
+    owners = ring.owners(starts)
+    tables = []
+    for k, node in enumerate(ring.nodes):
+        fingers = []
+        previous = None
+        for i in range(idlength):
+            owner = int(owners[k * idlength + i])
+            if owner != previous:
+                fingers.append([i, refs[owner]])
+                previous = owner
+        tables.append((node, refs[k - 1], fingers))
+    return tables
+
+
+def bootstrap(members, transport=None, workers=32):
+    """
+    Install the routing tables computed by routingtables() on all the
+    members, `workers` rpc at a time. LocalNode members are set directly
+    Return a dict: uid value -> exception, of the members which failed
+
+    @param transport: name or transport.Transport used to reach the members
+    """
+    tables = routingtables(members)
+
+    def install(node, predecessor, fingers):
+        if not isinstance(node, chord.LocalNode):
+            node = chord.NodeInterface(node.asref(), transport).methodProxy
+        node.install_routing(predecessor, fingers)
+
+    failures = {}
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        futures = dict((pool.submit(install, *table), table[0]) for table in tables)
+        for future in concurrent.futures.as_completed(futures):
+            error = future.exception()
+            if error is not None:
+                failures[futures[future].uid.value] = error
+    return failures
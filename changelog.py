@@ -0,0 +1,116 @@
+"""
+Feed of the routing changes of a LocalNode
+
+Every change of the predecessor or of a finger of a node is published as
+a new version of its routing state (see chord.Routing). ChangeLog keeps
+the last changes, numbered by the version which applied them, and
+LocalNode.getchanges(seq) returns those after `seq`: a subscriber pulls
+only the deltas instead of reading the whole state again. When it is too
+far behind, the changes it missed are no longer in the log and it gets
+the whole state instead. So does a subscriber of a node which restarted:
+versions start again from 0 in the new process, and every reply carries
+the epoch, a token drawn by the process, the subscriber sends back.
+
+A change is a dict:
+    {"seq": version, "predecessor": node reference or None,
+     "fingers": [[first, last, node reference], ...]}
+"predecessor" is only there if it changed. Fingers first to last (included)
+changed to the node.
+"""
+import collections
+import threading
+
+import chord
+
+
+class ChangeLog(object):
+    """
+    Last `size` changes of the routing state of a node
+
+    @param version: version of the routing state when the log starts
+    """
+    def __init__(self, size=1024, version=0):
+        self.entries = collections.deque(maxlen=size)
+        # changes after floor are all in the log
+        self.floor = version
+        self.lock = threading.Lock()
+
+    def append(self, version, old, new, indexes=None):
+        """
+        Record the changes from the Routing `old` to `new`
+        A version which changes no node is not recorded
+
+        @param indexes: sorted indexes of the fingers which may have
+            changed, all by default
+        """
+        change = {"seq": version}
+        oldpred = old.predecessor.uid.value if old.predecessor else None
+        newpred = new.predecessor.uid.value if new.predecessor else None
+        if oldpred != newpred:
+            change["predecessor"] = new.predecessor.asref() if new.predecessor else None
+        fingers = []
+        if indexes is None:
+            indexes = range(len(new.fingers))
+        for i in indexes:
+            before, after = old.fingers[i], new.fingers[i]
+            if before is after or before.uid == after.uid:
+                continue
+            if fingers and fingers[-1][1] == i - 1 and fingers[-1][2][0] == after.uid.value:
+                fingers[-1][1] = i
+            else:
+                fingers.append([i, i, after.asref()])
+        if fingers:
+            change["fingers"] = fingers
+        if len(change) == 1:
+            return
+        with self.lock:
+            if len(self.entries) == self.entries.maxlen:
+                self.floor = self.entries[0]["seq"]
+            self.entries.append(change)
+
+    def since(self, seq):
+        """
+        Return the changes after `seq`, None if some of them were dropped
+        """
+        with self.lock:
+            if seq < self.floor:
+                return None
+            return [change for change in self.entries if change["seq"] > seq]
+
+
+class Subscriber(object):
+    """
+    Copy of the routing state of a node kept up to date from its changes
+
+    @param node: LocalNode, dict or node reference followed
+    @param transport: name or transport.Transport used to reach it
+    """
+    def __init__(self, node, transport=None):
+        self.proxy = chord.NodeInterface(node, transport).methodProxy
+        self.seq = -1
+        self.epoch = None
+        self.predecessor = None
+        self.fingers = []
+
+    def poll(self):
+        """
+        Apply the changes of the node since the last poll and return them
+        After a reset, the whole state, the list is empty
+        """
+        res = self.proxy.getchanges(self.seq, self.epoch)
+        if res.get("reset"):
+            self.predecessor = res["predecessor"]
+            self.fingers = [None] * res["idlength"]
+            ends = [i for i, _ in res["fingers"][1:]] + [res["idlength"]]
+            for (start, ref), end in zip(res["fingers"], ends):
+                self.fingers[start:end] = [ref] * (end - start)
+            self.seq = res["seq"]
+            self.epoch = res["epoch"]
+            return []
+        for change in res["changes"]:
+            if "predecessor" in change:
+                self.predecessor = change["predecessor"]
+            for first, last, ref in change.get("fingers", ()):
+                self.fingers[first:last + 1] = [ref] * (last + 1 - first)
+        self.seq = res["seq"]
+        return res["changes"]
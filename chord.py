@@ -1,49 +1,102 @@
 import logging
-import sys
+import os
+import admission
+import changelog as chordchangelog
+import gossip as chordgossip
 import serverxmlrpc
-import clientxmlrpc
 import random
+import time
+import lookuptrace
+import metrics as chordmetrics
+import proximity
+import snapshot as chordsnapshot
+import store as chordstore
+import threading
+import transport as chordtransport
 from stabilizer import Stabilizer
 
-from key import Key, Uid
+from key import IDLENGTH, Key, Uid
 
-log = logging.getLogger()
-log.setLevel(logging.DEBUG)
-ch = logging.StreamHandler(sys.stdout)
-formatter = logging.Formatter(' %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
-log.addHandler(ch)
+# Logging is configured by the application, nothing is output by default
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# maximum number of busy nodes a lookup goes around (see LocalNode._visit())
+MAXDETOURS = 8
+
+# 2^k offsets of the finger starts, computed once and shared by all the nodes
+FINGER_OFFSETS = tuple(1 << k for k in range(256))
 
 class BasicNode(object):
-    def __init__(self, *args):
+    def __init__(self, *args, idlength=IDLENGTH):
         """
         params are either ip and port OR a dict with keys ip and port 
-        {"ip":<ip>, "port": <port>}
+        {"ip":<ip>, "port": <port>} OR a node reference (see asref())
+
+        When the dict or the reference provides the uid, it is trusted:
+        the address is not hashed again
+
+        @param idlength: bit length of the uid hashed from the address
         """
+        uid = None
+        rpcport = None
         if len(args) == 2:
             ip = args[0]
             port = args[1]
+        elif len(args) == 1 and isinstance(args[0], (list, tuple)):
+            uid, ip, port = args[0][:3]
+            if len(args[0]) > 3:
+                rpcport = args[0][3]
         elif len(args) == 1:
             ip = args[0]["ip"]
             port = args[0]["port"]
+            uid = args[0].get("uid")
+            rpcport = args[0].get("rpcport")
         else:
             raise ValueError("len args of {} unsupported".format(len(args)))
         self.ip = ip
         self.port = port
+        # port of the rpc server, differs from port when the node is
+        # served by a shared endpoint (see serverxmlrpc.ChordEndpointxmlrpc)
+        self.rpcport = port if rpcport is None else rpcport
         #TODO:optimization with sys.intern() str of 64 char
-        self.uid = Uid(self.ip + ":" + repr(self.port))
+        if uid is None:
+            self.uid = Uid(self.ip + ":" + repr(self.port), idlength)
+        else:
+            self.uid = Uid.fromvalue(getattr(uid, "value", uid))
 
     def getUid(self):
         return self.uid
 
+    def rpcpath(self):
+        """
+        Return the path on which the node rpc server serves it
+        """
+        if self.rpcport == self.port:
+            return "/chord"
+        return serverxmlrpc.nodepath(self.uid)
+
     def asdict(self):
         """
         Creates and returns a dict with attr of the instance
         The dict can be used in rpc args
         """
-        return {"ip": self.ip,
+        res = {"ip": self.ip,
                 "port": self.port,
                 "uid": self.uid.value}
+        if self.rpcport != self.port:
+            res["rpcport"] = self.rpcport
+        return res
+
+    def asref(self):
+        """
+        Return the compact reference of the node: [uid, ip, port]
+        followed by rpcport when it differs from port.
+        Cheaper than asdict() to send, and BasicNode(ref) trusts its uid
+        """
+        if self.rpcport != self.port:
+            return [self.uid.value, self.ip, self.port, self.rpcport]
+        return [self.uid.value, self.ip, self.port]
 
 class NodeInterface(BasicNode):
     """
@@ -55,59 +108,226 @@ class NodeInterface(BasicNode):
     If type of `arg` is LocalNode
     the NodeInterface object uses methods from it directly
 
-    If type of `arg` is dict, we assume it is a remote node
+    If type of `arg` is dict or a node reference, we assume it is a remote node
     RPC will be done on arg["ip"] and arg["port"]
     (as a BasicNose is constructed from values of arg see BasicNode.__init__())
+    unless the node is served by a shared endpoint of this process.
+    In this case its methods are used directly, as for a LocalNode.
 
     @param arg: directly passed to BasicNode constructor
+    @param transport: name or transport.Transport used to reach a remote node
     """
-    def __init__(self, arg):
+    def __init__(self, arg, transport=None):
         if isinstance(arg, LocalNode):
-            super(NodeInterface, self).__init__(arg.ip, arg.port)
+            super(NodeInterface, self).__init__(arg.asref())
             self.methodProxy = arg
-        elif isinstance(arg, dict):
+        elif isinstance(arg, (dict, list, tuple)):
             super(NodeInterface, self).__init__(arg)
-            self.methodProxy = clientxmlrpc.ChordClientxmlrpcProxy(self.ip, self.port)
+            colocated = serverxmlrpc.getcolocated(self.ip, self.port)
+            if colocated is not None:
+                self.rpcport = colocated.rpcport
+                self.methodProxy = colocated
+            else:
+                self.methodProxy = chordtransport.get(transport).client(self)
         else:
-            raise TypeError("Supports LocalNode or dict")
+            raise TypeError("Supports LocalNode, dict or node reference")
 
 class Finger(object):
-    def __init__(self, key, originNode, respNode):
+    def __init__(self, key, originNode, respNode, index=None):
         """
+        @param key: start of the finger, str, Key or int. None to compute
+            it from `index`: originNode.uid + 2^index, when first needed
         @param originNode
-        @param respNode: dict or NodeInterface
+        @param respNode: dict or NodeInterface. None for a finger of the
+            table of originNode, whose node is in originNode.routing
+        @param index: index of the finger in originNode's table
         """
         if isinstance(originNode, LocalNode):
             self.originNode = originNode
         else:
             raise TypeError("originNode have to be LocalNode")
 
-        #set key attr
-        if isinstance(key, str):
-            self.key = Key(key)
+        #set start attr, the Key is only built when asked for
+        self._start = None
+        # proximity neighbor selection candidates, by uid value
+        self.candidates = None
+        self._key = None
+        self._respNode = None
+        self.index = index
+        if key is None:
+            if index is None:
+                raise ValueError("Finger needs a key or an index")
+        elif isinstance(key, str):
+            self._key = Key(key)
         elif isinstance(key, Key):
-            self.key = key
+            self._key = key
+        elif isinstance(key, int):
+            self._start = key
         else:
-            raise TypeError("key type not accepted. Support str and Key")
+            raise TypeError("key type not accepted. Support str, int and Key")
+
+        if respNode is not None:
+            self.setRespNode(respNode)
+
+    @property
+    def start(self):
+        """
+        int value of the start of the finger
+        """
+        if self._start is None:
+            if self._key is not None:
+                self._start = self._key.toint()
+            else:
+                uid = self.originNode.uid
+                self._start = (uid.toint() + FINGER_OFFSETS[self.index]) \
+                        & ((1 << uid.idlength) - 1)
+        return self._start
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = Key.fromint(self.start, self.originNode.uid.idlength)
+        return self._key
+
+    def addcandidate(self, node, size, rtt):
+        """
+        Keep `node` (a NodeInterface) as a candidate of the finger
+        When more than `size` are kept, the one with the highest rtt is
+        dropped, the ones not measured first
 
-        self.setRespNode(respNode)
+        @param rtt: proximity.RttTable of the originNode
+        """
+        if self.candidates is None:
+            self.candidates = {}
+        self.candidates[node.uid.value] = node
+        if len(self.candidates) > size:
+            worst = max(self.candidates,
+                    key=lambda uid: rtt.get(uid, float("inf")))
+            del self.candidates[worst]
+
+    @property
+    def respNode(self):
+        if self._respNode is None:
+            return self.originNode.routing.fingers[self.index]
+        return self._respNode
 
     def setRespNode(self, respNode):
+        """
+        A finger of the table of originNode publishes a new version of its
+        routing state (see LocalNode.setfingers())
+        """
         if isinstance(respNode, dict):
-            self.respNode = self.originNode.getNodeInterface(respNode)
-        elif isinstance(respNode, NodeInterface):
-            self.respNode = respNode
-        else:
+            respNode = self.originNode.getNodeInterface(respNode)
+        elif not isinstance(respNode, NodeInterface):
             raise TypeError("Finger.setRespNode() accept dict and NodeInterface")
+        if self._respNode is None and self.index is not None\
+                and self.originNode.fingers[self.index] is self:
+            self.originNode.setfingers({self.index: respNode})
+        else:
+            self._respNode = respNode
+
+
+class Routing(object):
+    """
+    Immutable version of the routing state of a LocalNode: its predecessor
+    and the nodes of its fingers, the first one being its successor
+
+    Writers publish a new Routing as LocalNode.routing, readers take it
+    once and work on a consistent state without any lock.
+    """
+    __slots__ = ("version", "predecessor", "fingers")
+
+    def __init__(self, version, predecessor, fingers):
+        """
+        @param predecessor: NodeInterface or None
+        @param fingers: tuple of NodeInterface, by finger index
+        """
+        self.version = version
+        self.predecessor = predecessor
+        self.fingers = fingers
+
+    @property
+    def successor(self):
+        return self.fingers[0]
 
 class LocalNode(BasicNode):
-    def __init__(self, ip, port, _stabilizer=True):
-        BasicNode.__init__(self, ip, port)
-        self.predecessor = None
+    def __init__(self, ip, port, _stabilizer=True, endpoint=None, transport=None,
+            metrics=False, trace=0, pns=0, maxinflight=0, loadaware=False,
+            snapshot=None, snapshotperiod=60.0, datadir=None, changelog=1024,
+            gossip=0, idlength=IDLENGTH, rng=None):
+        """
+        @param endpoint: serverxmlrpc.ChordEndpointxmlrpc which serves the node.
+            By default the node starts its own server on (ip, port)
+        @param transport: name or transport.Transport used to serve the node
+            and to reach the other ones. Default is xmlrpc
+        @param metrics: enable metrics.Metrics of the node (see getmetrics())
+        @param trace: number of lookups kept by the lookup trace,
+            0 disables it (see gettrace())
+        @param pns: number of candidates kept per finger for proximity
+            neighbor selection, 0 disables it (see proximity)
+        @param maxinflight: maximum number of remote requests executed at
+            the same time, the next ones are rejected as busy.
+            0 for no limit (see admission)
+        @param loadaware: route lookups around the peers which reported
+            overload (see admission)
+        @param snapshot: file where the routing state is saved every
+            `snapshotperiod` seconds and on stop(), and reloaded from on
+            start (see snapshot)
+        @param datadir: directory of the store.SegmentStore which holds
+            the data of the node. By default the node has no store
+        @param changelog: number of routing changes kept for the
+            subscribers, 0 disables it (see getchanges())
+        @param gossip: number of members piggybacked on each stabilization
+            round, 0 disables the gossip of the membership (see gossip)
+        @param idlength: bit length of the identifier space of the ring,
+            one of key.IDLENGTHS. All its nodes must use the same
+        @param rng: random.Random drawing the fingers fixed and the members
+            gossiped, a new one by default. Shared by simulated nodes for
+            reproducible runs (see simulator)
+        """
+        BasicNode.__init__(self, ip, port, idlength=idlength)
+        self.rng = random.Random() if rng is None else rng
+        self.metrics = chordmetrics.Metrics(metrics)
+        self.trace = lookuptrace.LookupTrace(trace)
+        self.pns = pns
+        self.rtt = proximity.RttTable()
+        self._pnslock = threading.Lock()
+        self.admission = admission.Admission(maxinflight)
+        self.loadaware = loadaware
+        self.loads = admission.LoadTable()
+        self.transport = chordtransport.get(transport)
+        if endpoint is not None and self.transport.name != "xmlrpc":
+            raise ValueError("shared endpoint only supports xmlrpc transport")
+        if endpoint is not None:
+            self.rpcport = endpoint.port
+        # writers of the routing state, readers use self.routing (see Routing)
+        self._routinglock = threading.RLock()
+        self.routing = None
+        self.changes = chordchangelog.ChangeLog(changelog) if changelog else None
+        # versions start again from 0 in a new process: the token of this
+        # one tells its versions from those of a previous run
+        self.epoch = "{:016x}".format(self.rng.getrandbits(64))
+        self.gossip = gossip
+        self.membership = None
+        if gossip:
+            self.membership = chordgossip.MembershipView(self.asref(), rng=self.rng)
         self.fingers = []
         self.createfingertable()
+        # indexes of the reloaded fingers, not checked yet by fix_fingers
+        self._unverified = []
+        self.snapshot = snapshot
+        self.snapshotperiod = snapshotperiod
+        self._nextsnapshot = time.monotonic() + snapshotperiod
+        if snapshot is not None:
+            self.restoresnapshot()
+        self.store = None
+        if datadir is not None:
+            self.store = chordstore.SegmentStore(datadir, idlength=self.uid.idlength)
 
-        self.server = serverxmlrpc.ChordServerxmlrpc(self)
+        if endpoint is not None:
+            self.server = endpoint.attach(self)
+        else:
+            self.server = self.transport.server(self)
         self.server.start()
 
         self._stabilizer = _stabilizer
@@ -117,18 +337,97 @@ class LocalNode(BasicNode):
 
     @property
     def successor(self):
-        return self.fingers[0].respNode
+        return self.routing.fingers[0]
 
-    def asdict(self):
-        return {"ip": self.ip,
-                "port": self.port,
-                "uid": self.uid.value,
-                "succ": self.fingers[0].respNode.asdict()}
+    @property
+    def predecessor(self):
+        return self.routing.predecessor
+
+    @predecessor.setter
+    def predecessor(self, predecessor):
+        self.setfingers({}, predecessor)
+
+    def setfingers(self, nodes, predecessor=False):
+        """
+        Publish a new version of the routing state, with the fingers of
+        the dict `nodes`: index -> NodeInterface changed at once
+
+        @param predecessor: new predecessor, NodeInterface or None.
+            By default it is unchanged
+        """
+        with self._routinglock:
+            routing = self.routing
+            fingers = routing.fingers
+            if nodes:
+                fingers = list(fingers)
+                for i, node in nodes.items():
+                    fingers[i] = node
+                fingers = tuple(fingers)
+            if predecessor is False:
+                predecessor = routing.predecessor
+            self.routing = Routing(routing.version + 1, predecessor, fingers)
+            if self.changes is not None:
+                self.changes.append(self.routing.version, routing, self.routing, sorted(nodes))
+
+    def getchanges(self, seq, epoch=None):
+        """
+        Return the routing changes after the version `seq`:
+        {"seq": current version, "epoch": self.epoch, "changes": [...]}
+        (see changelog)
+        When they are not all in the log anymore, with seq < 0, or when
+        `seq` was read from another run of the node (`epoch` differs, or seq
+        is ahead of the current version), the whole state: {"seq": version,
+        "epoch": self.epoch, "reset": True, "idlength": ...,
+        "predecessor": node reference or None, "fingers": compact fingers}
+
+        @param epoch: epoch of the reply `seq` comes from
+        """
+        routing = self.routing
+        changes = None
+        if self.changes is not None and 0 <= seq <= routing.version\
+                and epoch in (None, self.epoch):
+            changes = self.changes.since(seq)
+        if changes is None:
+            return {"seq": routing.version,
+                    "epoch": self.epoch,
+                    "reset": True,
+                    "idlength": self.uid.idlength,
+                    "predecessor": routing.predecessor.asref() if routing.predecessor else None,
+                    "fingers": chordsnapshot.compactrouting(routing)}
+        # changes published after routing was read come with the next call
+        return {"seq": routing.version,
+                "epoch": self.epoch,
+                "changes": [c for c in changes if c["seq"] <= routing.version]}
 
     def stop(self):
         if self._stabilizer:
             self.stabilizer.stop()
+        if self.snapshot is not None:
+            self.savesnapshot()
         self.stopXmlRPCServer()
+        if self.store is not None:
+            self.store.close()
+
+    def savesnapshot(self):
+        """
+        Save the routing state to self.snapshot
+        """
+        chordsnapshot.save(self, self.snapshot)
+        self._nextsnapshot = time.monotonic() + self.snapshotperiod
+
+    def restoresnapshot(self):
+        """
+        Reload the routing state saved in self.snapshot, if it is the one of
+        self. Return True if it has been reloaded
+        """
+        state = chordsnapshot.load(self.snapshot)
+        if state is None or state["uid"] != self.uid.value:
+            return False
+        self.install_routing(state["predecessor"], state["fingers"])
+        self._unverified = [i for i, _ in reversed(state["fingers"])]
+        log.info("%s - routing state reloaded from %s, saved at %s",
+                self.uid, self.snapshot, state["time"])
+        return True
 
     def stopXmlRPCServer(self):
         self.server.stop()
@@ -136,11 +435,16 @@ class LocalNode(BasicNode):
     def createfingertable(self):
         """
         Create fingers table
-        Calculate all fingerkey and initializze all to self
+        Initialize all fingers to self, their start is computed when needed
         """
         selfinterface = NodeInterface(self)
-        for i in range(0, self.uid.idlength):
-            self.fingers.append(Finger(self.calcfinger(i), self, selfinterface))
+        self.fingers = [Finger(None, self, None, i)
+                for i in range(0, self.uid.idlength)]
+        with self._routinglock:
+            version = self.routing.version + 1 if self.routing else 0
+            predecessor = self.routing.predecessor if self.routing else None
+            self.routing = Routing(version, predecessor,
+                    (selfinterface,) * self.uid.idlength)
 
     def setsuccessor(self, successor):
         """
@@ -149,22 +453,30 @@ class LocalNode(BasicNode):
 
         @param successor: dict with ip and port as key
         """
-        self.fingers[0].setRespNode(self.getNodeInterface(successor))
+        self.setfingers({0: self.getNodeInterface(successor)})
     
     def setpredecessor(self, predecessor):
         """
         Create a NodeInterface object and set to self.predecessor
 
-        @param predecessor: dict with ip and port as key
+        @param predecessor: dict with ip and port as key, None when self
+            is left alone in the ring
         """
-        self.predecessor = self.getNodeInterface(predecessor)
+        if predecessor is None:
+            self.predecessor = None
+        else:
+            self.predecessor = self.getNodeInterface(predecessor)
 
     def getsuccessor(self):
-        return self.fingers[0].respNode.asdict()
+        return self.successor.asdict()
+
+    def getsuccessorref(self):
+        return self.successor.asref()
 
     def getpredecessor(self):
-        if self.predecessor:
-            return self.predecessor.asdict()
+        predecessor = self.predecessor
+        if predecessor:
+            return predecessor.asdict()
         else:
             return None
 
@@ -172,11 +484,95 @@ class LocalNode(BasicNode):
         """
         Return a NodeInterface object
         Compare self and nodedict to provide localNode or not
+
+        @param nodedict: dict or node reference
         """
-        if nodedict["ip"] == self.ip and nodedict["port"] == self.port:
-            return NodeInterface(self)
+        if isinstance(nodedict, (list, tuple)):
+            ip, port = nodedict[1:3]
         else:
-            return NodeInterface(nodedict)
+            ip, port = nodedict["ip"], nodedict["port"]
+        if ip == self.ip and port == self.port:
+            return NodeInterface(self)
+        if isinstance(nodedict, dict) and "uid" not in nodedict:
+            # hashed in the identifier space of self
+            nodedict = BasicNode(ip, port, idlength=self.uid.idlength).asdict()
+        interface = NodeInterface(nodedict, self.transport)
+        if self.metrics.enabled:
+            interface.methodProxy = chordmetrics.TimedProxy(
+                    interface.methodProxy,
+                    "{}:{}".format(interface.ip, interface.port),
+                    self.metrics
+            )
+        if self.pns:
+            interface.methodProxy = proximity.RttProxy(
+                    interface.methodProxy, interface.uid.value, self.rtt)
+        if self.loadaware:
+            interface.methodProxy = admission.LoadProxy(
+                    interface.methodProxy, interface.uid.value, self.loads)
+        if self.membership is not None:
+            interface.methodProxy = chordgossip.MemberProxy(
+                    interface.methodProxy, interface.uid.toint(), self._memberfailed)
+        return interface
+
+    def _memberfailed(self, uid):
+        """
+        An rpc failed to reach the node of int uid `uid`: evict it from the
+        membership view and move the fingers on it, the successor included,
+        to the next member of the view. fix_fingers() checks them first
+        """
+        self.membership.evict(uid)
+        with self._routinglock:
+            changes = {}
+            for i, node in enumerate(self.routing.fingers):
+                if node.uid.toint() != uid:
+                    continue
+                ref = self.membership.get(self.membership.successor(self.fingers[i].start))
+                if ref is not None:
+                    changes[i] = self.getNodeInterface(ref)
+                if i and i not in self._unverified:
+                    self._unverified.append(i)
+            if changes:
+                self.setfingers(changes)
+
+    def learn(self, node):
+        """
+        Keep `node` as a candidate of the finger interval it belongs to,
+        used by proximity neighbor selection. Does nothing when pns is 0
+
+        @param node: dict, node reference or BasicNode
+        """
+        if not self.pns:
+            return
+        if not isinstance(node, BasicNode):
+            node = BasicNode(node)
+        distance = (node.uid.toint() - self.uid.toint()) & ((1 << self.uid.idlength) - 1)
+        if distance == 0:
+            return
+        finger = self.fingers[distance.bit_length() - 1]
+        if finger.candidates and node.uid.value in finger.candidates:
+            return
+        if not isinstance(node, NodeInterface):
+            node = self.getNodeInterface(node.asref())
+        with self._pnslock:
+            finger.addcandidate(node, self.pns, self.rtt)
+
+    def getmetrics(self):
+        """
+        Return the snapshot of the node metrics (see metrics.Metrics)
+        """
+        return self.metrics.snapshot()
+
+    def settrace(self, size):
+        """
+        Keep the `size` last lookups in the lookup trace, 0 disables it
+        """
+        self.trace.resize(size)
+
+    def gettrace(self, last=None):
+        """
+        Return the recorded lookups (see lookuptrace.LookupTrace)
+        """
+        return self.trace.getrecords(last)
 
     def join(self, node):
         """
@@ -195,27 +591,97 @@ class LocalNode(BasicNode):
     def _stabilize_and_fix_fingers(self):
         """
         Execute stabilize() and fix_fingers()
+        Save the routing state when a snapshot is due
         """
-
-        self.stabilize()
-        self.fix_fingers()
+        if self.metrics.enabled:
+            start = time.perf_counter()
+            self.stabilize()
+            self.fix_fingers()
+            self.metrics.addstabilize(time.perf_counter() - start)
+        else:
+            self.stabilize()
+            self.fix_fingers()
+        if self.snapshot is not None and time.monotonic() >= self._nextsnapshot:
+            self.savesnapshot()
 
     def stabilize(self):
         node_inter = self.successor.methodProxy.getpredecessor()
         if node_inter:
+            self.learn(node_inter)
             if node_inter["uid"] == self.uid:
                 """
                 successor's predecessor is self so everything is fine
-                Dont do anything
+                Only the gossip goes on
                 """
+                if self.membership is not None:
+                    self._gossipwith(self.successor)
                 return
-            if self.uid == self.successor.uid\
-                    or Key(node_inter["uid"]).is_between_exclu(self.uid, self.successor.uid):
-                self.setsuccessor(node_inter)
-        if self.successor.uid != self.uid:
-            self.successor.methodProxy.notify_new_predecessor(self.asdict())
+            with self._routinglock:
+                successor = self.successor
+                if self.membership is not None\
+                        and self.membership.hasfailed(Key(node_inter["uid"]).toint()):
+                    # the successor still has a failed predecessor
+                    pass
+                elif self.uid == successor.uid\
+                        or Key(node_inter["uid"]).is_between_exclu(self.uid, successor.uid):
+                    self.setsuccessor(node_inter)
+        successor = self.successor
+        if successor.uid == self.uid:
+            return
+        if self.membership is None:
+            successor.methodProxy.notify_new_predecessor(self.asdict())
+        else:
+            self._gossipwith(successor)
 
-    def notify_new_predecessor(self, new_predecessor):
+    def _gossipwith(self, successor):
+        """
+        Notify `successor` with a sample of the membership view of self,
+        and merge the sample it answers with, then exchange samples with a
+        random member (see gossip)
+        """
+        self.membership.expire()
+        sample = successor.methodProxy.notify_new_predecessor(self.asdict(),
+                self.membership.sample(self.gossip))
+        self._merge(successor.asref(), sample or ())
+        refs = [ref for ref in self.membership.refs() if ref[0] != successor.uid.value]
+        if not refs:
+            return
+        peer = self.getNodeInterface(self.rng.choice(refs))
+        try:
+            sample = peer.methodProxy.exchangemembers(self.asref(),
+                    self.membership.sample(self.gossip))
+        except Exception as e:
+            # the peer is evicted if unreachable, the round goes on
+            if not (isinstance(e, OSError) or admission.isbusy(e)):
+                raise
+            return
+        self._merge(peer.asref(), sample or ())
+
+    def _merge(self, ref, sample):
+        """
+        Record news of the node `ref` and of the members of its `sample`,
+        then fill the fingers with those of the view. Not only the new
+        ones: a lookup of fix_fingers() made before the ring converged may
+        have set a finger to a worse node than a member already known
+        """
+        self.membership.heard(ref)
+        self.membership.merge(sample)
+        refs = [ref] + [member for member, age in sample]
+        self.fillfingers([member for member in refs
+                if Key(member[0]).toint() in self.membership])
+
+    def exchangemembers(self, sender, sample):
+        """
+        Merge the members gossiped by the node `sender` (node reference)
+        and return a sample of the membership view of self in exchange,
+        None when self doesn't gossip (see gossip)
+        """
+        if self.membership is None:
+            return None
+        self._merge(list(sender), sample)
+        return self.membership.sample(self.gossip)
+
+    def notify_new_predecessor(self, new_predecessor, sample=None):
         """
         Check wether `new_predecessor` is more accurate than current
         self.predecessor. If so, change accordingly
@@ -224,24 +690,166 @@ class LocalNode(BasicNode):
         be self.predecessor
 
         @param new_predecessor: dict node which might be our predecessor
+        @param sample: members gossiped by new_predecessor (see gossip).
+            A sample of the view of self is returned in exchange, None when
+            self doesn't gossip
         """
-        if not self.predecessor\
-                or Key(new_predecessor["uid"]).is_between_exclu(self.predecessor.uid, self.uid):
-            self.setpredecessor(new_predecessor)
+        self.learn(new_predecessor)
+        with self._routinglock:
+            predecessor = self.predecessor
+            # a predecessor equal to self is no predecessor
+            if not predecessor or predecessor.uid == self.uid\
+                    or Key(new_predecessor["uid"]).is_between_exclu(predecessor.uid, self.uid):
+                self.setpredecessor(new_predecessor)
+        if sample is None:
+            return None
+        return self.exchangemembers(BasicNode(new_predecessor).asref(), sample)
+
+    def fillfingers(self, nodes):
+        """
+        Set the fingers for which a node of `nodes` is closer to their start
+        than their current node, without any lookup. The successor is left
+        to stabilize()
+
+        @param nodes: list of node references
+        """
+        if not nodes:
+            return
+        mask = (1 << self.uid.idlength) - 1
+        uid = self.uid.toint()
+        with self._routinglock:
+            fingers = self.routing.fingers
+            changes = {}
+            for ref in nodes:
+                nodeuid = Key(ref[0]).toint()
+                distance = (nodeuid - uid) & mask
+                interface = None
+                # the node is past the start of the fingers 1 to i
+                for i in range(1, distance.bit_length()):
+                    start = (uid + FINGER_OFFSETS[i]) & mask
+                    current = changes.get(i, fingers[i])
+                    if (nodeuid - start) & mask < (current.uid.toint() - start) & mask:
+                        if interface is None:
+                            interface = self.getNodeInterface(ref)
+                        changes[i] = interface
+            if changes:
+                self.setfingers(changes)
+                if self.metrics.enabled:
+                    for _ in changes:
+                        self.metrics.addfingercorrection()
+
+    def handoffkeys(self, uid):
+        """
+        Return the values of the stored keys which a node joining as our
+        predecessor with uid `uid` takes over: those of ]predecessor, uid]
+        Found in the ordered key index of the store, without a full scan
+
+        @param uid: uid value of the new predecessor
+        """
+        if self.store is None:
+            return []
+        start = self.predecessor.uid if self.predecessor else self.uid
+        keys = self.store.keys.interval(start.toint(), Key(uid).toint())
+        return [Key.fromint(key, self.uid.idlength).value for key in keys]
+
+    def getkeys(self, after=None, limit=1000):
+        """
+        Return a page of the values of the stored keys that self owns, those
+        of ]predecessor, self], in ring order: at most `limit` keys, starting
+        after the key `after`. A page shorter than `limit` is the last one
+        (see ringwalk.walk())
+
+        @param after: last key value of the previous page, None for the first
+        """
+        if self.store is None:
+            return []
+        if after is None:
+            after = self.predecessor.uid if self.predecessor else self.uid
+        elif after == self.uid.value:
+            # self is the last key of the interval
+            return []
+        else:
+            after = Key(after)
+        keys = self.store.keys.interval(after.toint(), self.uid.toint(), limit)
+        return [Key.fromint(key, self.uid.idlength).value for key in keys]
+
+    def owns(self, keyvalue):
+        """
+        True if self is the successor of `keyvalue`, as far as it knows
+        """
+        routing = self.routing
+        if routing.predecessor is None or routing.predecessor.uid == self.uid:
+            return routing.successor.uid == self.uid
+        return Key(keyvalue).is_between_r_inclu(routing.predecessor.uid, self.uid)
+
+    def _notmine(self, keyvalue):
+        """
+        Redirect returned for a key self doesn't own: the neighbours of self
+        and its closest preceding finger of the key, from which a client
+        corrects its view of the ring (see ringclient)
+        """
+        routing = self.routing
+        return {"notmine": True,
+                "predecessor": routing.predecessor.asref() if routing.predecessor else None,
+                "successor": routing.successor.asref(),
+                "closest": self.closest_preceding_fingerref(keyvalue)}
+
+    def getvalue(self, keyvalue):
+        """
+        Return {"value": value of `keyvalue` in the store, None if absent}
+        if self owns keyvalue, a "not mine" redirect otherwise (see _notmine())
+        """
+        if not self.owns(keyvalue):
+            return self._notmine(keyvalue)
+        if self.store is None:
+            return {"value": None}
+        return {"value": self.store.get(keyvalue)}
+
+    def putvalue(self, keyvalue, value):
+        """
+        Store the bytes `value` for `keyvalue` and return {"stored": True}
+        if self owns keyvalue, a "not mine" redirect otherwise
+        """
+        if not self.owns(keyvalue):
+            return self._notmine(keyvalue)
+        if self.store is None:
+            raise ValueError("node {} has no store".format(self.uid.value))
+        # xmlrpc transports bytes as xmlrpc.client.Binary
+        self.store.put(keyvalue, getattr(value, "data", value))
+        return {"stored": True}
+
+    def deletevalue(self, keyvalue):
+        """
+        Delete `keyvalue` from the store and return {"deleted": <was it stored>}
+        if self owns keyvalue, a "not mine" redirect otherwise
+        """
+        if not self.owns(keyvalue):
+            return self._notmine(keyvalue)
+        if self.store is None:
+            return {"deleted": False}
+        return {"deleted": self.store.delete(keyvalue)}
 
     def fix_fingers(self):
-        i = random.randint(1, self.uid.idlength - 1)
+        # reloaded fingers are checked first
+        if self._unverified:
+            i = self._unverified.pop()
+        else:
+            i = self.rng.randint(1, self.uid.idlength - 1)
+        previous = self.fingers[i].respNode
         self.fingers[i].setRespNode(self.find_successor(self.fingers[i].key))
+        self.learn(self.fingers[i].respNode)
+        if self.metrics.enabled and previous.uid != self.fingers[i].respNode.uid:
+            self.metrics.addfingercorrection()
 
     def init_fingers(self, existingnode):
-        log.debug("%s - init_fingers with %s" %(self.uid, existingnode.uid))
+        log.debug("%s - init_fingers with %s", self.uid, existingnode.uid)
         find_pred_res = existingnode.methodProxy.find_predecessor(self.uid.value)
         self.setsuccessor(find_pred_res["succ"])
         self.setpredecessor(find_pred_res)
         self.predecessor.methodProxy.setsuccessor(self.asdict()) # added compare to paper
         self.successor.methodProxy.setpredecessor(self.asdict())
         for i in range(0, self.uid.idlength - 1):
-            if self.fingers[i + 1].key.isbetween(self.fingers[i].key, self.fingers[i].respNode.uid): #changed from paper's algo which use self.uid in place of fingers[I].key
+            if self.fingers[i + 1].key.isbetween(self.fingers[i].start, self.fingers[i].respNode.uid): #changed from paper's algo which use self.uid in place of fingers[I].key
                 self.fingers[i + 1].setRespNode(self.fingers[i].respNode)
             else:
                 nextfingersucc = existingnode.methodProxy.find_successor(
@@ -249,21 +857,125 @@ class LocalNode(BasicNode):
                 self.fingers[i+1].setRespNode(nextfingersucc)
 
     def update_others(self):
+        debug = log.isEnabledFor(logging.DEBUG)
         for i in range(0, self.uid.idlength):
-            log.debug("%s - update_others for i=%i" %(self.uid, i))
+            if debug:
+                log.debug("%s - update_others for i=%i", self.uid, i)
             predenode = self.find_predecessor(self.uid - pow(2, i))
             self.getNodeInterface(predenode).methodProxy.update_finger_table(self.asdict(), i)
 
+    def install_routing(self, predecessor, fingers):
+        """
+        Replace the predecessor and the finger table of self, as computed
+        from the whole membership by bootstrap.routingtables()
+
+        @param predecessor: node reference, None leaves it unchanged
+        @param fingers: list of [i, node reference]: fingers from i to the
+            next listed index are on the node. The first i is 0
+        """
+        nodes = {}
+        ends = [i for i, _ in fingers[1:]] + [self.uid.idlength]
+        for (start, ref), end in zip(fingers, ends):
+            # fingers on the same node share its interface
+            interface = self.getNodeInterface(ref)
+            for i in range(start, end):
+                nodes[i] = interface
+        if predecessor is None:
+            self.setfingers(nodes)
+        else:
+            self.setfingers(nodes, self.getNodeInterface(predecessor))
+
+    def leave(self):
+        """
+        Leave the ring gracefully, then stop the node
+        The predecessor and the successor are linked together, then the
+        nodes which may have self as finger i, the predecessors of
+        uid - 2^i as update_others() finds them, get a departure notice
+        (see notify_departure()). Self drives the propagation of the
+        notice along their predecessors.
+        """
+        try:
+            if self.successor.uid != self.uid and self.predecessor is not None:
+                self._leave()
+        finally:
+            # the saved state is no longer the one of a member of the ring
+            snapshot, self.snapshot = self.snapshot, None
+            self.stop()
+            if snapshot is not None and os.path.exists(snapshot):
+                os.remove(snapshot)
+
+    def _leave(self):
+        leaving = self.asdict()
+        successor = self.successor.asdict()
+        predecessor = self.predecessor
+        # targets of the notice are looked up while self still routes
+        targets = {}
+        for i in range(0, self.uid.idlength):
+            key = Key(self.uid.subint(FINGER_OFFSETS[i]))
+            if key.is_between_r_inclu(predecessor.uid, self.uid):
+                node = predecessor.asdict()
+            else:
+                node = self.find_predecessor(key)
+            targets.setdefault(node["uid"], node)
+        log.debug("%s - leave, %i nodes to notify", self.uid, len(targets))
+        predecessor.methodProxy.setsuccessor(successor)
+        if predecessor.uid == self.successor.uid:
+            # the last node left has no predecessor, the next one to join is
+            self.successor.methodProxy.setpredecessor(None)
+        else:
+            self.successor.methodProxy.setpredecessor(predecessor.asdict())
+        notified = set()
+        for node in targets.values():
+            while node is not None and node["uid"] != self.uid\
+                    and node["uid"] not in notified:
+                notified.add(node["uid"])
+                node = self.getNodeInterface(node).methodProxy.notify_departure(
+                        leaving, successor)
+
+    def notify_departure(self, leavingnode, successornode):
+        """
+        `leavingnode` leaves the ring and `successornode` was its successor
+        Fingers on leavingnode are set to successornode.
+        Return self.predecessor, which may have it as finger too, if a
+        finger has been changed. None otherwise
+
+        @param leavingnode: dict
+        @param successornode: dict
+        """
+        leaving = BasicNode(leavingnode)
+        successor = None
+        with self._pnslock:
+            for finger in self.fingers:
+                if finger.candidates:
+                    finger.candidates.pop(leaving.uid.value, None)
+        with self._routinglock:
+            changed = [i for i, node in enumerate(self.routing.fingers)
+                    if node.uid == leaving.uid]
+            if changed:
+                successor = self.getNodeInterface(successornode)
+                self.setfingers(dict.fromkeys(changed, successor))
+        self.rtt.remove(leaving.uid.value)
+        log.debug("%s - departure of %s, fingers changed: %s",
+                self.uid, leaving.uid, successor is not None)
+        predecessor = self.predecessor
+        if successor is None or predecessor is None\
+                or predecessor.uid == leaving.uid:
+            return None
+        return predecessor.asdict()
+
     def update_finger_table(self, callingnode, i):
         callingnode = BasicNode(callingnode)
         #update_finger_table looped over the ring and came back to self
         if callingnode.uid == self.uid:
             return
-        log.debug("%s - update_finger_table with node '%s' for i=%i" %(self.uid, callingnode.uid, i))
+        log.debug("%s - update_finger_table with node '%s' for i=%i", self.uid, callingnode.uid, i)
         #TODO check if key and node uid of the same finger could be equal and then lead to a exception in isbetween
-        if callingnode.uid.isbetween(self.fingers[i].key, self.fingers[i].respNode.uid):
-            log.debug("%s - update_finger_table:  callingnode uid is between self.uid and fingers(%i). node.uid" %(self.uid, i))
-            self.fingers[i].setRespNode(callingnode.asdict())
+        with self._routinglock:
+            updated = callingnode.uid.isbetween(self.fingers[i].start, self.fingers[i].respNode.uid)
+            if updated:
+                self.fingers[i].setRespNode(callingnode.asdict())
+        if updated:
+            log.debug("%s - update_finger_table:  callingnode uid is between self.uid and fingers(%i). node.uid", self.uid, i)
             #TODO optim : self knows fingers[i] uid so it can calculate if predecessor has chance or not to have to update his finger(i)
             if self.predecessor.uid != callingnode.uid: # dont rpc on callingnode it self
                 self.predecessor.methodProxy.update_finger_table(callingnode.asdict(), i)
@@ -294,58 +1006,194 @@ class LocalNode(BasicNode):
         if not isinstance(key, Key):
             raise TypeError("find_predecessor arg must be dict, str or Key")
 
-        log.debug("%s - find_predecessor for '%s'" %(self.uid, key.value))
-        if self.uid == self.successor.uid:
-            return self.asdict()
-        if key.is_between_r_inclu(self.uid, self.successor.uid):
-            return self.asdict()
+        log.debug("%s - find_predecessor for '%s'", self.uid, key.value)
+        if self.trace.enabled:
+            start = time.perf_counter()
+            resdict, hops = self._find_predecessor(key)
+            self.trace.addlookup(key.value, resdict, hops, time.perf_counter() - start)
+        else:
+            resdict, hops = self._find_predecessor(key)
+        if self.metrics.enabled:
+            self.metrics.addlookup(hops)
+        return resdict
+
+    def _find_predecessor(self, key):
+        """
+        Return the find_predecessor() result for `key` (a Key)
+        and the number of nodes asked to get it
+        """
+        successor = self.successor
+        if self.uid == successor.uid\
+                or key.is_between_r_inclu(self.uid, successor.uid):
+            resdict = self.asdict()
+            resdict["succ"] = successor.asdict()
+            return resdict, 0
         #TODO IDEA maybe: overwrite dispatch on xmlrpc server
         # then it is possible to dispatch on specific method for rpc
         # so in the next line case we are not force to transform cloPrecedFinger into a NodeInterface
         #TODO avoid casting directly in NodeInterface because we loose potential succ info from the original dict
-        cloPrecedFinger= self.getNodeInterface(self.closest_preceding_finger(key.value))
-        cloPrecedFingerSucc = BasicNode(cloPrecedFinger.methodProxy.getsuccessor())
+        # Hops exchange node references (see BasicNode.asref())
+        avoid = []
+        cloPrecedFinger, cloPrecedFingerSucc = self._visit(self,
+                self.getNodeInterface(self.closest_preceding_finger(key.value)), key, avoid)
+        self.learn(cloPrecedFinger)
         if cloPrecedFinger.uid == cloPrecedFingerSucc.uid:
             #TODO Here, self noticed that node has wrong fingers, should I correct it ?
+            if self.metrics.enabled:
+                self.metrics.addstalefinger()
             resdict = cloPrecedFinger.asdict()
             resdict["succ"] = cloPrecedFingerSucc.asdict()
-            return resdict
-        while not key.is_between_r_inclu(cloPrecedFinger.uid, cloPrecedFingerSucc.uid):
-            cloPrecedFingerDict = cloPrecedFinger.methodProxy.closest_preceding_finger(key.value)
-            if hasattr(cloPrecedFingerDict, "succ"):
-                #TODO in test, is this if usefull ?
-                breakpoint() #probably not...
-                cloPrecedFingerSucc = self.getNodeInterface(cloPrecedFingerDict["succ"])
-            else:
-                cloPrecedFinger = self.getNodeInterface(cloPrecedFingerDict)
-                if cloPrecedFinger.uid == self.uid:
-                    cloPrecedFingerSucc = BasicNode(self.getsuccessor())
+            return resdict, 1
+        hops = 1
+        # a node which is its own successor, as a node just restarted,
+        # precedes every key: it ends the lookup as on the first hop
+        while cloPrecedFinger.uid != cloPrecedFingerSucc.uid\
+                and not key.is_between_r_inclu(cloPrecedFinger.uid, cloPrecedFingerSucc.uid):
+            hops += 1
+            previous = cloPrecedFinger
+            try:
+                if self.loadaware:
+                    cloPrecedFingerRef = previous.methodProxy.closest_preceding_finger(key.value)
                 else:
-                    cloPrecedFingerSucc = BasicNode(cloPrecedFinger.methodProxy.getsuccessor())
+                    cloPrecedFingerRef = previous.methodProxy.closest_preceding_fingerref(key.value)
+            except Exception as e:
+                if not (self.loadaware and admission.isbusy(e)):
+                    raise
+                # previous precedes key and so does its successor: go on from it
+                cloPrecedFingerRef = cloPrecedFingerSucc.asref()
+            cloPrecedFinger, cloPrecedFingerSucc = self._visit(previous,
+                    self.getNodeInterface(cloPrecedFingerRef), key, avoid)
+            if cloPrecedFinger.uid != self.uid:
+                self.learn(cloPrecedFinger)
         resdict = cloPrecedFinger.asdict()
         resdict["succ"] = cloPrecedFingerSucc.asdict()
-        return resdict
+        return resdict, hops
 
-    def closest_preceding_finger(self, keyvalue):
+    def _visit(self, previous, node, key, avoid):
+        """
+        Return `node` and its successor, asked to `node`
+        If the node is load aware and `node` rejects the request as busy,
+        the lookup makes a detour (see _detour()). The busy nodes are
+        added to `avoid`, no more than MAXDETOURS detours are made.
+        """
+        while True:
+            if node.uid == self.uid:
+                return node, self.successor
+            if node.uid.value not in avoid:
+                try:
+                    # the dict response carries the load of the node
+                    if self.loadaware:
+                        return node, BasicNode(node.methodProxy.getsuccessor())
+                    return node, BasicNode(node.methodProxy.getsuccessorref())
+                except Exception as e:
+                    if not (self.loadaware and admission.isbusy(e)):
+                        raise
+            if len(avoid) >= MAXDETOURS:
+                raise admission.Busy("no way around the busy nodes to {}".format(key.value))
+            avoid.append(node.uid.value)
+            busy, node = node, self._detour(previous, key, avoid)
+            log.debug("%s - %s is busy, lookup goes through %s",
+                    self.uid, busy.uid, node.uid)
+
+    def _detour(self, previous, key, avoid):
+        """
+        Return another node preceding `key` than the ones in `avoid`,
+        asked to `previous`, which designated the busy one, or to self
+        """
+        if previous.uid != self.uid:
+            ref = previous.methodProxy.closest_preceding_fingerref(key.value, avoid)
+            if ref[0] != previous.uid:
+                return self.getNodeInterface(ref)
+        # previous knows no other node preceding key, self may
+        return self.getNodeInterface(self.closest_preceding_finger(key.value, avoid))
+
+    def closest_preceding_finger(self, keyvalue, exclude=None):
         """
         Return the closest preceding known node of provided keyvalue
 
         if keyvalue == self.uid -> self.predecessor
         Iterates reversly on fingers to find the closest known one.
+        Fingers on nodes whose uid value is in `exclude`, or which are
+        overloaded when self is load aware, are skipped. A load aware node
+        also prefers a less loaded finger (see _lessloaded()).
         """
+        # one consistent version of the routing state, without locking
+        routing = self.routing
         if self.uid == keyvalue:
-            return self.predecessor.asdict()
-        for i in range(self.uid.idlength - 1, -1, -1):
-            if self.fingers[i].respNode.uid == self.uid:
-                if self.successor.uid == self.uid:
+            return routing.predecessor.asdict()
+        if self.pns:
+            node = self._closest_preceding_candidate(routing, keyvalue, exclude)
+            if node is not None:
+                return node.asdict()
+        successor = routing.successor
+        for node in reversed(routing.fingers):
+            if node.uid == self.uid:
+                if successor.uid == self.uid:
                     return self.asdict() #self is alone on the ring
-                if Key(keyvalue).is_between_r_inclu(self.uid, self.successor.uid):
+                if Key(keyvalue).is_between_r_inclu(self.uid, successor.uid):
                     return self.asdict()
                 continue
-            if self.fingers[i].respNode.uid.is_between_exclu(self.uid, keyvalue):
-                return self.fingers[i].respNode.asdict()
+            if node.uid.is_between_exclu(self.uid, keyvalue):
+                if self._avoided(node.uid, exclude):
+                    continue
+                if self.loadaware:
+                    node = self._lessloaded(routing, node, exclude)
+                return node.asdict()
         return self.asdict()
 
+    def _lessloaded(self, routing, closest, exclude=None):
+        """
+        Return `closest` or, if it reported admission.HIGHLOAD or more, the
+        next finger preceding it when this one reported a lower load
+        """
+        load = self.loads.get(closest.uid.value)
+        if load is None or load < admission.HIGHLOAD:
+            return closest
+        for node in reversed(routing.fingers):
+            if node.uid == self.uid or not node.uid.is_between_exclu(self.uid, closest.uid):
+                continue
+            if self._avoided(node.uid, exclude):
+                continue
+            if (self.loads.get(node.uid.value) or 0.0) < load:
+                return node
+            break
+        return closest
+
+    def _avoided(self, uid, exclude):
+        """
+        True if lookups should not go through the node `uid`
+        """
+        if exclude and uid.value in exclude:
+            return True
+        return self.loadaware and self.loads.overloaded(uid.value)
+
+    def _closest_preceding_candidate(self, routing, keyvalue, exclude=None):
+        """
+        Proximity neighbor selection: return the node with the lowest rtt
+        among the finger and the candidates of the farthest finger interval
+        which have a node preceding keyvalue. None if there is no such node
+        Nodes not measured yet come after, the finger first.
+
+        @param routing: Routing version used by the lookup
+        """
+        for i in range(self.uid.idlength - 1, -1, -1):
+            finger = self.fingers[i]
+            nodes = [routing.fingers[i]]
+            if finger.candidates:
+                nodes.extend(list(finger.candidates.values()))
+            nodes = [n for n in nodes if n.uid != self.uid
+                    and n.uid.is_between_exclu(self.uid, keyvalue)
+                    and not self._avoided(n.uid, exclude)]
+            if nodes:
+                return min(nodes, key=lambda n: self.rtt.get(n.uid.value, float("inf")))
+        return None
+
+    def closest_preceding_fingerref(self, keyvalue, exclude=None):
+        """
+        Same as closest_preceding_finger() but return a node reference
+        """
+        return BasicNode(self.closest_preceding_finger(keyvalue, exclude)).asref()
+
     def updatefinger(self, firstnode):
         '''
         Update finger table
@@ -379,10 +1227,10 @@ class LocalNode(BasicNode):
 
         # Self is successor ?
         if self.uid == keyLookedUp:
-            return {"ip": self.ip, "port": self.port}
+            return BasicNode.asdict(self)
         # Is self.successor the successor of key ?
         if keyLookedUp.isbetween(self.uid.value, self.successor.uid.value):
-            return {"ip": self.successor.ip, "port": self.successor.port}
+            return self.successor.asdict()
 
         return self.successor.methodProxy.lookupWithSucc(key)
 
@@ -392,8 +1240,9 @@ class LocalNode(BasicNode):
         @param k: from 0 to (m - 1)
         '''
         if k > self.uid.idlength - 1:
-            raise ValueError("calcfinger: value above {} are not accepted".format(self.idlength))
-        return self.uid + pow(2, k)
+            raise ValueError("calcfinger: value above {} are not accepted".format(
+                self.uid.idlength - 1))
+        return self.uid.sumint(FINGER_OFFSETS[k])
 
     def printFingers(self):
         for n, f in enumerate(self.fingers):
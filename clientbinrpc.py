@@ -0,0 +1,209 @@
+import concurrent.futures
+import itertools
+import socket
+import threading
+
+import wire
+
+def connect(address, timeout=None):
+    """
+    Return a socket connected to `address`, as socket.create_connection()
+    SO_REUSEADDR is set so the local port of a long lived connection
+    doesn't prevent a server of the host from binding it
+    """
+    error = None
+    for family, socktype, proto, _, sockaddr in socket.getaddrinfo(
+            address[0], address[1], 0, socket.SOCK_STREAM):
+        sock = socket.socket(family, socktype, proto)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(timeout)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            sock.close()
+            error = e
+    raise error
+
+def connectunix(path, timeout=None):
+    """
+    Return a socket connected to the unix socket `path`
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        return sock
+    except OSError:
+        sock.close()
+        raise
+
+def connectlocal(address, unixpath, timeout=None):
+    """
+    Return a socket connected to the unix socket `unixpath` when a server
+    of this host listens on it, to `address` over tcp otherwise
+    """
+    if unixpath is not None:
+        try:
+            return connectunix(unixpath, timeout)
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+    return connect(address, timeout)
+
+class _Method(object):
+    def __init__(self, proxy, name):
+        self.proxy = proxy
+        self.name = name
+
+    def __call__(self, *params):
+        return self.proxy._call(self.name, params)
+
+class ChordClientbinrpcProxy(object):
+    """
+    Proxy on a node served by serverbinrpc.ChordServerbinrpc
+    Used like xmlrpc.client.ServerProxy: proxy.method(*params)
+    Keeps one connection open to the node, calls are serialized on it.
+    Raise wire.Fault when the remote method failed.
+
+    @param unixpath: unix socket on which the node may be served on this
+        host, used instead of tcp when it exists
+    """
+    def __init__(self, ip, port, timeout=None, unixpath=None):
+        self._address = (ip, port)
+        self._timeout = timeout
+        self._unixpath = unixpath
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Method(self, name)
+
+    def _call(self, method, params):
+        request = wire.encode([method, list(params)])
+        with self._lock:
+            # as xmlrpc.client does with keep-alive connections, retry once
+            # with a new connection if the kept one has been closed by the peer
+            for attempt in (0, 1):
+                reused = self._sock is not None
+                if not reused:
+                    self._connect()
+                try:
+                    wire.sendframe(self._sock, request)
+                    payload = wire.recvframe(self._sock)
+                    if payload is None:
+                        raise ConnectionError("connection closed by {}:{}".format(*self._address))
+                    break
+                except ConnectionError:
+                    self._close()
+                    if not reused or attempt:
+                        raise
+                except Exception:
+                    self._close()
+                    raise
+        ok, result = wire.decode(payload)
+        if not ok:
+            raise wire.Fault(result)
+        return result
+
+    def _connect(self):
+        self._sock = connectlocal(self._address, self._unixpath, self._timeout)
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+class ChordClientmuxrpcProxy(object):
+    """
+    Proxy on a node served by serverbinrpc.ChordServermuxrpc
+    Used like xmlrpc.client.ServerProxy: proxy.method(*params)
+    Each request is tagged with an id so many threads can have calls in
+    flight on the single connection, responses may come back in any order.
+    Raise wire.Fault when the remote method failed.
+    """
+    def __init__(self, ip, port, timeout=None):
+        self._address = (ip, port)
+        self._timeout = timeout
+        self._sock = None
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Method(self, name)
+
+    def _call(self, method, params):
+        reqid = next(self._ids)
+        request = wire.encode([reqid, method, list(params)])
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            sock = self._sock
+            self._pending[reqid] = (sock, future)
+            try:
+                wire.sendframe(sock, request)
+            except OSError as e:
+                self._fail(sock, e)
+        try:
+            ok, result = future.result(self._timeout)
+        except concurrent.futures.TimeoutError:
+            with self._lock:
+                self._pending.pop(reqid, None)
+            raise TimeoutError("{} on {}:{} timed out".format(method, *self._address))
+        if not ok:
+            raise wire.Fault(result)
+        return result
+
+    def _connect(self):
+        sock = connect(self._address, self._timeout)
+        sock.settimeout(None)
+        self._sock = sock
+        threading.Thread(target=self._readloop, args=(sock,), daemon=True).start()
+
+    def _readloop(self, sock):
+        """
+        Dispatch the responses read on `sock` to the waiting calls
+        """
+        try:
+            while True:
+                payload = wire.recvframe(sock)
+                if payload is None:
+                    raise ConnectionError("connection closed by {}:{}".format(*self._address))
+                reqid, ok, result = wire.decode(payload)
+                with self._lock:
+                    sock_future = self._pending.pop(reqid, None)
+                if sock_future is not None:
+                    sock_future[1].set_result((ok, result))
+        except (OSError, ValueError, wire.WireError) as e:
+            with self._lock:
+                self._fail(sock, e)
+
+    def _fail(self, sock, error):
+        """
+        Must be called with self._lock held
+        Close `sock` and fail all calls in flight on it
+        """
+        if self._sock is sock:
+            self._sock = None
+        sock.close()
+        if not isinstance(error, ConnectionError):
+            error = ConnectionError(str(error))
+        for reqid, (reqsock, future) in list(self._pending.items()):
+            if reqsock is sock:
+                del self._pending[reqid]
+                future.set_exception(error)
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._fail(self._sock, ConnectionError("proxy closed"))
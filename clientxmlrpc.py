@@ -1,9 +1,14 @@
 import xmlrpc.client
 
 class ChordClientxmlrpcProxy(xmlrpc.client.ServerProxy):
-    def __init__(self, ip, port):
+    def __init__(self, ip, port, path="/chord"):
+        """
+        @param path: rpc path of the node on the server.
+            Nodes served by a shared endpoint have their own path
+            (see serverxmlrpc.nodepath())
+        """
         xmlrpc.client.ServerProxy.__init__(self,
-                "http://{ip}:{port}/chord".format(ip=ip, port=port),
+                "http://{ip}:{port}{path}".format(ip=ip, port=port, path=path),
                 allow_none=True
         )
 
@@ -0,0 +1,182 @@
+"""
+Gossip of the ring membership, piggybacked on stabilization
+
+Without gossip a finger is only corrected when fix_fingers() draws it, at
+the cost of a whole lookup. A LocalNode created with gossip keeps a
+MembershipView of the members it heard of recently. Each stabilization
+round, the node sends a small sample of its view along with its notify to
+its successor, which answers with a sample of its own view (see
+LocalNode.stabilize() and LocalNode.notify_new_predecessor()). The
+members received fill the fingers they are a better candidate of locally,
+without any lookup (see LocalNode.fillfingers()). fix_fingers() still
+looks its fingers up: a view may hold members which failed.
+
+A member travels with the age of the last news of it: [reference, age in
+seconds]. A node heard directly has age 0, and the members whose news are
+older than `ttl` are dropped, so that the dead ones stop being gossiped.
+Each round the node also exchanges samples with a random member of its
+view (see LocalNode.exchangemembers()). The news of a member spread across
+the ring like an epidemic, in O(log N) rounds for N nodes. Passed only
+from neighbour to neighbour they would take about N * N / (2 * size)
+rounds. `ttl` has to exceed that time.
+
+A member that an rpc failed to reach is evicted (see MemberProxy), and
+the fingers on it move to the next member (see LocalNode._memberfailed()).
+News of it older than the failure are ignored, so the samples of the
+nodes which haven't noticed the failure yet don't bring it back.
+"""
+import random
+import threading
+import time
+
+from key import Key
+from keyindex import KeyIndex
+
+
+class MembershipView(object):
+    """
+    Members of the ring heard of in the last `ttl` seconds, by int uid
+
+    @param owner: reference of the node owning the view, always a member
+    @param clock: function returning the current time, in seconds
+    @param rng: random.Random drawing the samples
+    """
+    def __init__(self, owner, ttl=300.0, clock=time.monotonic, rng=random):
+        self.owner = list(owner)
+        self.owneruid = Key(owner[0]).toint()
+        self.ttl = ttl
+        self.clock = clock
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.index = KeyIndex([self.owneruid])
+        # int uid -> [reference, time of the last news]
+        self.members = {}
+        # int uid -> time of the failure of an evicted member
+        self.failed = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, uid):
+        """
+        True if the int `uid` is a member, the owner excluded
+        """
+        return uid in self.members
+
+    def heard(self, ref, age=0.0):
+        """
+        Record news of the member `ref`, `age` seconds old
+        Return True if it is a new member
+        """
+        uid = Key(ref[0]).toint()
+        if uid == self.owneruid or age > self.ttl:
+            return False
+        seen = self.clock() - age
+        with self.lock:
+            if uid in self.failed:
+                if seen <= self.failed[uid]:
+                    return False
+                # heard of since it failed, it is back
+                del self.failed[uid]
+            member = self.members.get(uid)
+            if member is not None:
+                member[1] = max(member[1], seen)
+                return False
+            self.members[uid] = [list(ref), seen]
+            self.index.add(uid)
+            return True
+
+    def get(self, uid):
+        """
+        Return the reference of the member of int uid `uid`, None if it is
+        not a member
+        """
+        member = self.members.get(uid)
+        return None if member is None else member[0]
+
+    def merge(self, sample):
+        """
+        Record the members of a received `sample` (see sample())
+        Return the references of the new ones
+        """
+        return [ref for ref, age in sample if self.heard(ref, age)]
+
+    def evict(self, uid):
+        """
+        Drop the member of int uid `uid`, which an rpc failed to reach
+        """
+        with self.lock:
+            self.failed[uid] = self.clock()
+            if self.members.pop(uid, None) is not None:
+                self.index.discard(uid)
+
+    def hasfailed(self, uid):
+        """
+        True if the member of int uid `uid` was evicted and not heard of since
+        """
+        return uid in self.failed
+
+    def expire(self):
+        """
+        Drop the members without news for more than ttl seconds
+        """
+        deadline = self.clock() - self.ttl
+        with self.lock:
+            for uid, (ref, seen) in list(self.members.items()):
+                if seen < deadline:
+                    del self.members[uid]
+                    self.index.discard(uid)
+            # older news are ignored anyway
+            for uid, failure in list(self.failed.items()):
+                if failure < deadline:
+                    del self.failed[uid]
+
+    def sample(self, size):
+        """
+        Return up to `size` random members as [reference, age], the owner
+        being always one of them
+        """
+        now = self.clock()
+        with self.lock:
+            members = list(self.members.values())
+        chosen = self.rng.sample(members, min(size - 1, len(members))) if size > 1 else []
+        return [[self.owner, 0.0]] + [[ref, max(now - seen, 0.0)] for ref, seen in chosen]
+
+    def successor(self, key):
+        """
+        Return the int uid of the first member at or after the int `key`
+        """
+        with self.lock:
+            return self.index.successor(key)
+
+    def refs(self):
+        """
+        Return the references of the members, the owner excluded
+        """
+        with self.lock:
+            return [ref for ref, seen in self.members.values()]
+
+
+class MemberProxy(object):
+    """
+    Wrap a methodProxy (see chord.NodeInterface) to call `onfailure(peer)`
+    when a call to `peer` fails to reach it (OSError: refused, timed out...)
+    """
+    def __init__(self, proxy, peer, onfailure):
+        self._proxy = proxy
+        self._peer = peer
+        self._onfailure = onfailure
+
+    def __getattr__(self, name):
+        method = getattr(self._proxy, name)
+        if not callable(method):
+            return method
+        proxy = self
+
+        def watched(*params):
+            try:
+                return method(*params)
+            except OSError:
+                proxy._onfailure(proxy._peer)
+                raise
+        return watched
@@ -2,23 +2,48 @@ import hashlib
 
 # TODO: operands on Key should they return a key or a str ??
 
+# bit lengths of the identifier space a ring may use. The uids are the
+# sha256 of the nodes truncated to their first idlength bits
+IDLENGTHS = (32, 64, 128, 160, 256)
+IDLENGTH = 256
+
 
 class Key(object):
+    # the int value is cached in a slot: it stays out of __dict__, which
+    # xmlrpc.client marshals when a Key is sent (and can't hold 256 bits int)
+    __slots__ = ("_int", "__dict__")
 
     def __init__(self, value):
-        # 256 because we use sha256
-        # which return string of 64 hexa char (or 256 bits)
-        self.idlength = 256
-        if len(value) != self.idlength // 4:
-            raise ValueError
+        # the identifier space is given by the length of the hexa str:
+        # idlength / 4 chars (see IDLENGTHS)
+        self.idlength = len(value) * 4
+        if self.idlength not in IDLENGTHS:
+            raise ValueError("key of {} bits not supported".format(self.idlength))
         if isinstance(value, str):
             self.value = value
+            self._int = int(value, 16)
         else:
             raise TypeError("Can create key only from str")
 
+    @classmethod
+    def fromint(cls, value, idlength=IDLENGTH):
+        """
+        Return a Key of the int `value`, which must be in [0, 2^idlength[
+        Saves the str to int conversion done when building from a str
+        """
+        key = cls.__new__(cls)
+        key.idlength = idlength
+        key.value = "%0*x" % (idlength // 4, value)
+        key._int = value
+        return key
+
+    def toint(self):
+        return self._int
+
     def setValue(self, newValue):
         if isinstance(newValue, str) and len(newValue) == self.idlength // 4:
             self.value = newValue
+            self._int = int(newValue, 16)
         else:
             raise ValueError
 
@@ -26,63 +51,39 @@ class Key(object):
         return self.value[:9]
 
     def __gt__(self, value):
-        if isinstance(value, str):
-            return int(self.value, 16) > int(value, 16)
-        elif isinstance(value, Key):
-            return int(self.value, 16) > int(value.value, 16)
-        elif isinstance(value, int):
-            return int(self.value, 16) > value
-        else:
+        try:
+            return self._int > _toint(value)
+        except TypeError:
             raise TypeError("__gt__ only supports str, int or Key as input")
 
     def __ge__(self, value):
-        if isinstance(value, str):
-            return int(self.value, 16) >= int(value, 16)
-        elif isinstance(value, Key):
-            return int(self.value, 16) >= int(value.value, 16)
-        elif isinstance(value, int):
-            return int(self.value, 16) >= value
-        else:
+        try:
+            return self._int >= _toint(value)
+        except TypeError:
             raise TypeError("__ge__ only supports str or Key as input")
 
     def __lt__(self, value):
-        if isinstance(value, str):
-            return int(self.value, 16) < int(value, 16)
-        elif isinstance(value, Key):
-            return int(self.value, 16) < int(value.value, 16)
-        elif isinstance(value, int):
-            return int(self.value, 16) < value
-        else:
+        try:
+            return self._int < _toint(value)
+        except TypeError:
             raise TypeError("__lt__ only supports str or Key as input")
 
     def __le__(self, value):
-        if isinstance(value, str):
-            return int(self.value, 16) <= int(value, 16)
-        elif isinstance(value, Key):
-            return int(self.value, 16) <= int(value.value, 16)
-        elif isinstance(value, int):
-            return int(self.value, 16) <= value
-        else:
+        try:
+            return self._int <= _toint(value)
+        except TypeError:
             raise TypeError("__le__ only supports str or Key as input")
 
     def __eq__(self, value):
-        if isinstance(value, str):
-            return int(self.value, 16) == int(value, 16)
-        elif isinstance(value, Key):
-            return int(self.value, 16) == int(value.value, 16)
-        elif isinstance(value, int):
-            return int(self.value, 16) == value
-        else:
+        try:
+            return self._int == _toint(value)
+        except TypeError:
             raise TypeError("__eq__ only supports str or Key as input")
 
     def __ne__(self, value):
-        if isinstance(value, str):
-            return int(self.value, 16) != int(value, 16)
-        elif isinstance(value, Key):
-            return int(self.value, 16) != int(value.value, 16)
-        elif isinstance(value, int):
-            return int(self.value, 16) != value
-        else:
+        try:
+            return self._int != _toint(value)
+        except TypeError:
             raise TypeError("__ne__ only supports str or Key as input")
 
     def canonicalize(self, value):
@@ -91,7 +92,7 @@ class Key(object):
         Returns the str repr of hexa value with the right number of hexa char
         Basically padd the input with'0' and get rid of '0x' and 'L'
         '''
-        return format(value, '0>{}x'.format(self.idlength // 4))
+        return "%0*x" % (self.idlength // 4, value)
 
     def __add__(self, value):
         if isinstance(value, int):
@@ -99,10 +100,9 @@ class Key(object):
         elif isinstance(value, str):
             return self.sumint(int(value, 16))
         elif isinstance(value, Key):
-            return self.sumint(int(value.value, 16))
+            return self.sumint(value._int)
         else:
             #self.log.error("Sum with unknow type")
-            print(type(value))
             raise TypeError
 
     def sumint(self, value):
@@ -110,8 +110,7 @@ class Key(object):
         Return sum uid + value in hexa representation
         @param value: int to sum with uid value
         '''
-        res = (int(self.value, 16) + value) % pow(2, self.idlength)
-        return self.canonicalize(res)
+        return "%0*x" % (self.idlength // 4, (self._int + value) & ((1 << self.idlength) - 1))
 
     def __sub__(self, value):
         if isinstance(value, int):
@@ -119,7 +118,7 @@ class Key(object):
         elif isinstance(value, str):
             return self.subint(int(value, 16))
         elif isinstance(value, Key):
-            return self.subint(int(value.value, 16))
+            return self.subint(value._int)
         else:
             #self.log.error("Sub with unknow type")
             raise TypeError
@@ -129,51 +128,58 @@ class Key(object):
         Return sub uid - value in hexa representation
         @param value: int to sub with uid value
         '''
-        res = (int(self.value, 16) - value) % pow(2, self.idlength)
-        return self.canonicalize(res)
+        return "%0*x" % (self.idlength // 4, (self._int - value) & ((1 << self.idlength) - 1))
 
     def __len__(self):
         return len(self.value)
 
+    # Interval predicates compare the operands given by _operands()
+    # and do the ring arithmetic with _inside(), without exception on the
+    # common path
+
     def is_between_r_inclu(self, limit1, limit2):
         """True if self.value is contained by ]limit1, limit2]
         Return False otherwise
         Raise EqualLimitError if limit1 == limit2
         """
-        if self.value == limit2:
+        value, limit1, limit2 = _operands(self, limit1, limit2)
+        if value == limit2:
             return True
-        elif self.value == limit1:
+        elif value == limit1:
             return False
-        return self._is_inside(limit1, limit2)
+        return _inside(value, limit1, limit2)
 
     def is_between_l_inclu(self, limit1, limit2):
         """True if self.value is contained by [limit1, limit2[
         Return False otherwise
         Raise EqualLimitError if limit1 == limit2
         """
-        if self.value == limit1:
+        value, limit1, limit2 = _operands(self, limit1, limit2)
+        if value == limit1:
             return True
-        elif self.value == limit2:
+        elif value == limit2:
             return False
-        return self._is_inside(limit1, limit2)
+        return _inside(value, limit1, limit2)
 
     def is_between_inclu(self, limit1, limit2):
         """True if self.value is contained by [limit1, limit2]
         Return False otherwise
         Raise EqualLimitError if limit1 == limit2
         """
-        if self.value == limit2 or self.value == limit1:
+        value, limit1, limit2 = _operands(self, limit1, limit2)
+        if value == limit2 or value == limit1:
             return True
-        return self._is_inside(limit1, limit2)
+        return _inside(value, limit1, limit2)
 
     def is_between_exclu(self, limit1, limit2):
         """True if self.value is contained by ]limit1, limit2[
         Return False otherwise
         Raise EqualLimitError if limit1 == limit2
         """
-        if self.value == limit2 or self.value == limit1:
+        value, limit1, limit2 = _operands(self, limit1, limit2)
+        if value == limit2 or value == limit1:
             return False
-        return self._is_inside(limit1, limit2)
+        return _inside(value, limit1, limit2)
 
     def _is_inside(self, limit1, limit2):
         '''
@@ -182,23 +188,10 @@ class Key(object):
         If self.value == limit1 or self.value == limit2, raise ValueError
         Raise ValueError if limit1 == limit2
         '''
-        if len(self) != len(limit1) != len(limit2):
-            raise ValueError(
-                "Unable to compare different length value and limit")
-        if self.value == limit1 or self.value == limit2:
+        value, limit1, limit2 = _operands(self, limit1, limit2)
+        if value == limit1 or value == limit2:
             raise ValueError("limit equal to self.value")
-
-        if limit1 > limit2:
-            if self.value > limit1 or self.value < limit2:
-                return True
-            return False
-        elif limit1 < limit2:
-            if self.value > limit1 and self.value < limit2:
-                return True
-            return False
-        else:
-            # limit1 == limit2
-            raise EqualLimitsError("limits equal to self.value")
+        return _inside(value, limit1, limit2)
 
     def isbetween(self, limit1, limit2):
         '''
@@ -206,33 +199,84 @@ class Key(object):
         So if self.value == limit1 or limit2 then return True
         Raise exception if limit1 == limit2
         '''
-        if len(self.value) != len(limit1) != len(limit2):
-            #self.log.error("Unable to compare.")
-            raise ValueError(
-                "Unable to compare different length value and limit")
-        if self.value == limit1 or self.value == limit2:
+        value, limit1, limit2 = _operands(self, limit1, limit2)
+        if value == limit1 or value == limit2:
             return True
-
-        if limit1 > limit2:
-            if self.value > limit1 or self.value < limit2:
-                return True
-            else:
-                return False
-        elif limit1 < limit2:
-            if self.value > limit1 and self.value < limit2:
-                return True
-            else:
-                return False
+        if limit1 < limit2:
+            return limit1 < value < limit2
+        elif limit1 > limit2:
+            return value > limit1 or value < limit2
         else:
             # limit1 == limit2
             raise ValueError("isbetween: limit1 == limit2")
 
 
+def _toint(value):
+    """
+    Return the int value of a Key, a hexa str or an int
+    """
+    if isinstance(value, Key):
+        return value._int
+    elif isinstance(value, str):
+        return int(value, 16)
+    elif isinstance(value, int):
+        return value
+    raise TypeError("only supports str, int or Key")
+
+
+def _operands(key, limit1, limit2):
+    """
+    Return the values of key, limit1 and limit2 in a comparable form
+    Hexa str of the key length are compared as str, as the ordering of
+    lowercase hexa str of the same length is the one of their values:
+    that saves their conversion to int. Otherwise int values are compared.
+    """
+    cls1 = limit1.__class__
+    cls2 = limit2.__class__
+    if cls1 is str:
+        if cls2 is str and len(limit1) == len(limit2) == len(key.value):
+            return key.value, limit1, limit2
+        if len(limit1) == len(key.value) and isinstance(limit2, Key):
+            return key.value, limit1, limit2.value
+    elif cls2 is str and len(limit2) == len(key.value) and isinstance(limit1, Key):
+        return key.value, limit1.value, limit2
+    return key._int, _toint(limit1), _toint(limit2)
+
+
+def _inside(value, limit1, limit2):
+    """
+    True if value is contained by ]limit1, limit2[ on the ring
+    value must differ from both limits
+    Raise EqualLimitsError if limit1 == limit2
+    """
+    if limit1 < limit2:
+        return limit1 < value < limit2
+    elif limit1 > limit2:
+        return value > limit1 or value < limit2
+    else:
+        # limit1 == limit2
+        raise EqualLimitsError("limits equal to self.value")
+
+
 class Uid(Key):
 
-    def __init__(self, strtohash):
+    def __init__(self, strtohash, idlength=IDLENGTH):
+        """
+        @param idlength: bit length of the identifier space, sha256 is
+            truncated to it (see IDLENGTHS)
+        """
         hash = hashlib.sha256(strtohash.encode("utf-8"))
-        Key.__init__(self, hash.hexdigest())
+        Key.__init__(self, hash.hexdigest()[:idlength // 4])
+
+    @classmethod
+    def fromvalue(cls, value):
+        """
+        Return a Uid of `value`, which is already a hash, without hashing it
+        Used for uid received from trusted node descriptors
+        """
+        uid = cls.__new__(cls)
+        Key.__init__(uid, value)
+        return uid
 
 
 class Error(Exception):
@@ -0,0 +1,205 @@
+"""
+Ordered index of the keys stored on a node, as ints
+
+Handoff on join, replication repair and debugging need the keys of a ring
+interval ]start, end], which wraps around zero when start >= end (see
+key.Key.is_between_r_inclu). KeyIndex keeps the keys in sorted chunks of
+at most 2 * `load` keys, with the list of their maxima: bisect finds a key
+in O(log n) and shifts only its chunk to add or remove it, where a single
+sorted list would move O(n) keys. The k keys of an interval cost
+O(log n + k), counting them O(log n + k / load), and splitting them off
+O(log n + k) plus the shift of the list of chunks.
+"""
+import bisect
+import itertools
+
+
+class KeyIndex(object):
+    """
+    Sorted set of int keys with ring interval queries
+
+    @param keys: initial keys
+    @param load: chunk size, chunks hold load / 2 to 2 * load keys
+    """
+    def __init__(self, keys=(), load=1000):
+        self.load = load
+        self._fill(sorted(set(keys)))
+
+    def _fill(self, keys):
+        """
+        Replace the content of the index with the sorted list `keys`
+        """
+        self.chunks = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+        self.size = len(keys)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.chunks)
+
+    def __contains__(self, key):
+        c = bisect.bisect_left(self.maxes, key)
+        if c == len(self.maxes):
+            return False
+        chunk = self.chunks[c]
+        return chunk[bisect.bisect_left(chunk, key)] == key
+
+    def add(self, key):
+        """
+        Add `key`, return False if it was already in the index
+        """
+        if not self.chunks:
+            self.chunks.append([key])
+            self.maxes.append(key)
+            self.size = 1
+            return True
+        c = min(bisect.bisect_left(self.maxes, key), len(self.maxes) - 1)
+        chunk = self.chunks[c]
+        i = bisect.bisect_left(chunk, key)
+        if i < len(chunk) and chunk[i] == key:
+            return False
+        chunk.insert(i, key)
+        self.maxes[c] = chunk[-1]
+        self.size += 1
+        if len(chunk) > 2 * self.load:
+            self.chunks[c + 1:c + 1] = [chunk[self.load:]]
+            del chunk[self.load:]
+            self.maxes[c:c + 1] = [chunk[-1], self.chunks[c + 1][-1]]
+        return True
+
+    def discard(self, key):
+        """
+        Remove `key`, return False if it was not in the index
+        """
+        c = bisect.bisect_left(self.maxes, key)
+        if c == len(self.maxes):
+            return False
+        chunk = self.chunks[c]
+        i = bisect.bisect_left(chunk, key)
+        if chunk[i] != key:
+            return False
+        del chunk[i]
+        self.size -= 1
+        if len(chunk) < self.load // 2 and len(self.chunks) > 1:
+            # merged with a neighbour, split again if too large
+            c = c - 1 if c > 0 else c
+            merged = self.chunks[c] + self.chunks[c + 1]
+            halves = [merged] if len(merged) <= 2 * self.load\
+                    else [merged[:len(merged) // 2], merged[len(merged) // 2:]]
+            self.chunks[c:c + 2] = halves
+            self.maxes[c:c + 2] = [half[-1] for half in halves]
+        elif not chunk:
+            del self.chunks[c]
+            del self.maxes[c]
+        else:
+            self.maxes[c] = chunk[-1]
+        return True
+
+    def successor(self, key):
+        """
+        Return the first key of the index greater than or equal to `key`,
+        wrapping around zero. None if the index is empty
+        """
+        if not self.chunks:
+            return None
+        c = bisect.bisect_left(self.maxes, key)
+        if c == len(self.maxes):
+            return self.chunks[0][0]
+        chunk = self.chunks[c]
+        return chunk[bisect.bisect_left(chunk, key)]
+
+    def _after(self, key):
+        """
+        Return the position (chunk, offset) of the first key above `key`,
+        (len(self.chunks), 0) if there is none
+        """
+        c = bisect.bisect_right(self.maxes, key)
+        if c == len(self.maxes):
+            return c, 0
+        return c, bisect.bisect_right(self.chunks[c], key)
+
+    def _bounds(self, start, end):
+        """
+        Return the ranges of positions [first, last[ holding ]start, end],
+        in ring order
+        """
+        first = self._after(start)
+        last = self._after(end)
+        if start < end:
+            return [(first, last)]
+        return [(first, (len(self.chunks), 0)), ((0, 0), last)]
+
+    def _range(self, first, last):
+        """
+        Yield the keys of the positions [first, last[
+        """
+        (c, i), (lastc, lasti) = first, last
+        while c < lastc:
+            yield from itertools.islice(self.chunks[c], i, None)
+            c, i = c + 1, 0
+        if c == lastc and c < len(self.chunks):
+            yield from itertools.islice(self.chunks[c], i, lasti)
+
+    def interval(self, start, end, limit=None):
+        """
+        Return the list of the keys in the ring interval ]start, end], in
+        ring order from start: when it wraps around zero, the keys above
+        start come before the keys up to end. start == end is the whole ring
+
+        @param limit: maximum number of keys returned, the first ones
+        """
+        keys = itertools.chain.from_iterable(
+                self._range(first, last) for first, last in self._bounds(start, end))
+        return list(itertools.islice(keys, limit))
+
+    def count(self, start, end):
+        """
+        Number of keys in ]start, end]
+        """
+        res = 0
+        for (c, i), (lastc, lasti) in self._bounds(start, end):
+            if c == lastc:
+                res += lasti - i
+            else:
+                res += len(self.chunks[c]) - i + lasti
+                res += sum(len(chunk) for chunk in self.chunks[c + 1:lastc])
+        return res
+
+    def _remove(self, first, last):
+        """
+        Remove and return the keys of the positions [first, last[
+        """
+        (c, i), (lastc, lasti) = first, last
+        if c == len(self.chunks) or (c, i) == (lastc, lasti):
+            return []
+        if c == lastc:
+            removed = self.chunks[c][i:lasti]
+            del self.chunks[c][i:lasti]
+        else:
+            removed = list(self._range(first, last))
+            del self.chunks[c][i:]
+            if lastc < len(self.chunks):
+                del self.chunks[lastc][:lasti]
+            del self.chunks[c + 1:lastc]
+            del self.maxes[c + 1:lastc]
+        # the chunks left at the ends of the range
+        ends = self.chunks[c:c + 2]
+        self.chunks[c:c + 2] = [chunk for chunk in ends if chunk]
+        self.maxes[c:c + 2] = [chunk[-1] for chunk in ends if chunk]
+        self.size -= len(removed)
+        return removed
+
+    def split(self, start, end):
+        """
+        Remove the keys of ]start, end] from the index and return them as a
+        new KeyIndex, e.g. the keys of a new predecessor: split(pred, newpred)
+        """
+        moved = []
+        # the range above start comes first: removing it leaves the other one
+        for first, last in self._bounds(start, end):
+            moved.extend(self._remove(first, last))
+        index = KeyIndex(load=self.load)
+        index._fill(sorted(moved) if start >= end else moved)
+        return index
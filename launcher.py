@@ -0,0 +1,231 @@
+"""
+Process pool running the nodes of many ring identities on all the cores
+
+All the LocalNode of an interpreter share one core because of the GIL.
+Supervisor shards the nodes of a host across worker processes, one per
+core by default, and looks after them:
+    - the nodes of all the workers are served with
+      transport.UnixRPCTransport: between the workers of the host, rpc go
+      through unix sockets instead of tcp on the loopback
+    - the shared port map (see Supervisor.portmap()) tells which process
+      serves each port, 0 when it is not served
+    - a worker which dies is restarted. Its nodes reload their routing
+      state from their snapshot (see snapshot) or, without one, join the
+      ring through a node of another worker, then the stabilizer repairs
+      the ring
+
+When all the workers are started, the ring is built from its known
+membership by bootstrap.bootstrap().
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+
+import bootstrap
+import chord
+import transport as chordtransport
+from key import IDLENGTH
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+
+class LauncherError(Error):
+    pass
+
+
+def shard(ports, workers):
+    """
+    Return the ports of each of the `workers` workers
+    """
+    return [ports[i::workers] for i in range(workers)]
+
+
+def _join(node, nodetojoin, stop, delay=0.2):
+    """
+    Join `node` to the ring through `nodetojoin`, retrying until it works
+    or `stop` is set: the lookup may still go through the dead nodes of
+    the worker, until the stabilizers or the restarted nodes repair it
+    """
+    while not stop.is_set():
+        try:
+            node.join_5(nodetojoin)
+            return
+        except Exception as e:
+            log.warning("%s failed to join the ring, retrying: %s", node.uid.value, e)
+            stop.wait(delay)
+
+
+def _serve(ip, ports, slots, rundir, portmap, join, options):
+    """
+    Body of a worker process: serve the nodes of `ports` until SIGTERM
+
+    @param slots: index in `portmap` of each port
+    @param join: node reference through which nodes without snapshot join
+        the ring, None to wait for the bootstrap
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    transport = chordtransport.UnixRPCTransport(rundir)
+    nodes = []
+    try:
+        for port in ports:
+            node = chord.LocalNode(ip, port, transport=transport,
+                    snapshot=os.path.join(rundir, "{}.snap".format(port)), **options)
+            nodes.append(node)
+        if join is not None:
+            for node in nodes:
+                if node.successor.uid == node.uid:
+                    _join(node, chord.NodeInterface(join, transport), stop)
+        for slot in slots:
+            portmap[slot] = os.getpid()
+        stop.wait()
+    finally:
+        for node in nodes:
+            node.stop()
+
+
+class Supervisor(object):
+    """
+    Run the nodes of `ports` on `ip` in a pool of worker processes
+
+    @param workers: number of worker processes, os.cpu_count() by default
+    @param rundir: directory of the unix sockets and of the routing
+        snapshots. By default a temporary one, removed by stop()
+    @param restart: restart the workers which die
+    @param context: multiprocessing start method. spawn doesn't inherit
+        the threads of the supervisor process
+    @param options: keyword arguments of the LocalNode of the workers
+    """
+    def __init__(self, ip, ports, workers=None, rundir=None, restart=True,
+            context="spawn", **options):
+        self.ip = ip
+        self.ports = list(ports)
+        workers = min(workers or os.cpu_count() or 1, len(self.ports))
+        self.shards = shard(self.ports, workers)
+        self.temporary = rundir is None
+        self.rundir = tempfile.mkdtemp(prefix="pychord") if rundir is None else rundir
+        self.transport = chordtransport.UnixRPCTransport(self.rundir)
+        self.restart = restart
+        self.options = options
+        self.context = multiprocessing.get_context(context)
+        self.slots = dict((port, i) for i, port in enumerate(self.ports))
+        # pid of the process serving each port, in shared memory
+        self._portmap = self.context.Array("i", len(self.ports), lock=False)
+        self._stop = threading.Event()
+        self.processes = [None] * workers
+        self.restarts = 0
+        self._watcher = None
+
+    def _spawn(self, index, join=None):
+        ports = self.shards[index]
+        slots = [self.slots[port] for port in ports]
+        for slot in slots:
+            self._portmap[slot] = 0
+        process = self.context.Process(target=_serve,
+                args=(self.ip, ports, slots, self.rundir, self._portmap,
+                    join, self.options),
+                daemon=True)
+        process.start()
+        self.processes[index] = process
+
+    def portmap(self):
+        """
+        Return a dict: port -> pid of the process serving it, 0 if none
+        """
+        return dict((port, self._portmap[slot]) for port, slot in self.slots.items())
+
+    def members(self):
+        """
+        Return the references of all the nodes
+        """
+        return [self._ref(port) for port in self.ports]
+
+    def _ref(self, port):
+        """
+        Return the reference of the node on `port`, its uid of the idlength
+        of the ring
+        """
+        return chord.BasicNode(self.ip, port,
+                idlength=self.options.get("idlength", IDLENGTH)).asref()
+
+    def wait(self, ports=None, timeout=30):
+        """
+        Wait until the nodes of `ports` (all by default) are served
+        Raise LauncherError after `timeout` seconds
+        """
+        slots = [self.slots[port] for port in (ports or self.ports)]
+        deadline = time.monotonic() + timeout
+        while not all(self._portmap[slot] for slot in slots):
+            if time.monotonic() > deadline:
+                raise LauncherError("nodes not served after {}s".format(timeout))
+            if self._watcher is None and not all(p.is_alive() for p in self.processes):
+                raise LauncherError("a worker failed to start")
+            time.sleep(0.05)
+
+    def start(self, timeout=30):
+        """
+        Start the workers, build the ring and watch the workers
+        """
+        for index in range(len(self.shards)):
+            self._spawn(index)
+        self.wait(timeout=timeout)
+        failures = bootstrap.bootstrap(self.members(), self.transport)
+        if failures:
+            raise LauncherError("bootstrap failed on {} nodes".format(len(failures)))
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while not self._stop.is_set():
+            for index, process in enumerate(self.processes):
+                if process.is_alive() or self._stop.is_set():
+                    continue
+                log.warning("worker %i (pid %i) died with code %s",
+                        index, process.pid, process.exitcode)
+                for port in self.shards[index]:
+                    self._portmap[self.slots[port]] = 0
+                if self.restart:
+                    self.restarts += 1
+                    self._spawn(index, self._joinref(index))
+            self._stop.wait(0.2)
+
+    def _joinref(self, index):
+        """
+        Return the reference of a node served by another worker than
+        `index`, None if there is none
+        """
+        for port, pid in self.portmap().items():
+            if pid and port not in self.shards[index]:
+                return self._ref(port)
+        return None
+
+    def stop(self, timeout=10):
+        """
+        Stop the workers, and remove the run directory if it is temporary
+        """
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        for process in self.processes:
+            if process is not None:
+                process.terminate()
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        if self.temporary:
+            shutil.rmtree(self.rundir, ignore_errors=True)
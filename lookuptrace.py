@@ -0,0 +1,67 @@
+"""
+Structured trace of the lookups of a LocalNode
+
+Lookups are recorded in a bounded ring buffer instead of being logged,
+so tracing can stay enabled on a production node: memory is bounded
+and nothing is formatted or written until the records are read.
+"""
+import collections
+import threading
+import time
+
+
+class LookupTrace(object):
+    """
+    Ring buffer of the last `size` lookups
+    Disabled when size is 0
+    """
+    def __init__(self, size=0):
+        self.lock = threading.Lock()
+        self.resize(size)
+
+    @property
+    def enabled(self):
+        return self.records.maxlen > 0
+
+    def resize(self, size):
+        """
+        Set the number of records kept, 0 disables the trace
+        The most recent records are kept
+        """
+        if size < 0:
+            raise ValueError("trace size must be positive")
+        with self.lock:
+            old = getattr(self, "records", ())
+            self.records = collections.deque(old, maxlen=size)
+
+    def addlookup(self, key, result, hops, secs):
+        """
+        @param key: value of the looked up key
+        @param result: dict returned by find_predecessor
+        @param hops: number of nodes asked
+        @param secs: duration of the lookup
+        """
+        record = (time.time(), key, result["uid"], result["succ"]["uid"], hops, secs)
+        with self.lock:
+            self.records.append(record)
+
+    def getrecords(self, last=None):
+        """
+        Return the records, oldest first, as dicts which can be sent by rpc
+        @param last: only return the `last` most recent records
+        """
+        with self.lock:
+            records = list(self.records)
+        if last is not None:
+            records = records[-last:] if last > 0 else []
+        return [{"time": t,
+                "key": key,
+                "predecessor": pred,
+                "successor": succ,
+                "hops": hops,
+                "duration": secs}
+                for t, key, pred, succ, hops, secs in records]
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
@@ -0,0 +1,156 @@
+"""
+Instrumentation of a LocalNode: lookup hop counts, rpc latencies per peer,
+stabilization rounds and finger corrections
+
+Metrics are disabled by default. The hot paths of chord.py only test
+Metrics.enabled, and rpc proxies are wrapped by TimedProxy only when the
+metrics are enabled at the time the NodeInterface is created.
+"""
+import threading
+import time
+
+# upper bounds of the histogram buckets, the last bucket is unbounded
+LATENCY_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+        0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+HOPS_BOUNDS = tuple(range(0, 17)) + (24, 32, 64, 128, 256)
+
+
+class Histogram(object):
+    """
+    Count of values per bucket, with their sum, min and max
+    """
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        i = 0
+        for bound in self.bounds:
+            if value <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Return the upper bound of the bucket containing the quantile `q`
+        (max for the unbounded bucket), None if empty
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def asdict(self):
+        return {"bounds": list(self.bounds),
+                "counts": list(self.counts),
+                "count": self.count,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max}
+
+
+class Metrics(object):
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.hops = Histogram(HOPS_BOUNDS)
+            self.rpclatency = {}
+            self.rpccalls = {}
+            self.rpcerrors = 0
+            self.stabilize = Histogram(LATENCY_BOUNDS)
+            self.fingercorrections = 0
+            self.stalefingers = 0
+
+    def addlookup(self, hops):
+        with self.lock:
+            self.hops.add(hops)
+
+    def addrpc(self, peer, method, secs, error=False):
+        """
+        @param peer: "ip:port" of the called node
+        """
+        with self.lock:
+            hist = self.rpclatency.get(peer)
+            if hist is None:
+                hist = self.rpclatency[peer] = Histogram(LATENCY_BOUNDS)
+            hist.add(secs)
+            self.rpccalls[method] = self.rpccalls.get(method, 0) + 1
+            if error:
+                self.rpcerrors += 1
+
+    def addstabilize(self, secs):
+        with self.lock:
+            self.stabilize.add(secs)
+
+    def addfingercorrection(self):
+        with self.lock:
+            self.fingercorrections += 1
+
+    def addstalefinger(self):
+        with self.lock:
+            self.stalefingers += 1
+
+    def snapshot(self):
+        """
+        Return a copy of all the metrics as a dict, which can be sent by rpc
+        """
+        with self.lock:
+            return {"enabled": self.enabled,
+                    "lookup_hops": self.hops.asdict(),
+                    "rpc_latency": dict((peer, hist.asdict())
+                        for peer, hist in self.rpclatency.items()),
+                    "rpc_calls": dict(self.rpccalls),
+                    "rpc_errors": self.rpcerrors,
+                    "stabilize_duration": self.stabilize.asdict(),
+                    "finger_corrections": self.fingercorrections,
+                    "stale_fingers": self.stalefingers}
+
+
+class TimedProxy(object):
+    """
+    Wrap a methodProxy (see chord.NodeInterface) to record the latency
+    of each call in `metrics`
+    """
+    def __init__(self, proxy, peer, metrics):
+        self._proxy = proxy
+        self._peer = peer
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        method = getattr(self._proxy, name)
+        if not callable(method):
+            return method
+        proxy = self
+
+        def timed(*params):
+            if not proxy._metrics.enabled:
+                return method(*params)
+            start = time.perf_counter()
+            try:
+                res = method(*params)
+            except Exception:
+                proxy._metrics.addrpc(proxy._peer, name, time.perf_counter() - start, True)
+                raise
+            proxy._metrics.addrpc(proxy._peer, name, time.perf_counter() - start)
+            return res
+        return timed
@@ -0,0 +1,139 @@
+"""
+Bulk assignment of keys to their owner node, given the ring membership
+
+The owner of a key is its successor on the ring, as returned by
+LocalNode.find_successor(): the first node whose uid is greater than or
+equal to the key, wrapping around zero.
+
+Uids and keys are handled as raw big-endian bytes of fixed width, so their
+byte order is their numeric order. With numpy, a batch of keys is a
+numpy array of dtype "S<width>" and owners are found by one vectorized
+searchsorted. Without numpy, the same functions work on lists with bisect.
+"""
+import bisect
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _width(idlength):
+    return idlength // 8
+
+
+def tobytes(values, idlength=256):
+    """
+    Return `values` as raw big-endian uids of idlength bits:
+    a numpy array of dtype "S<width>" if numpy is available, a list of
+    bytes otherwise
+
+    @param values: iterable of Key, hexa str, int or bytes, or a buffer
+        of concatenated raw uids (used without copy by numpy)
+    """
+    width = _width(idlength)
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        if len(values) % width:
+            raise ValueError("buffer length is not a multiple of {}".format(width))
+        if numpy is not None:
+            return numpy.frombuffer(values, dtype="S{}".format(width))
+        data = bytes(values)
+        return [data[i:i + width] for i in range(0, len(data), width)]
+    if numpy is not None and isinstance(values, numpy.ndarray) and values.dtype.kind == "S":
+        return values
+    res = []
+    for value in values:
+        value = getattr(value, "value", value)
+        if isinstance(value, str):
+            value = bytes.fromhex(value)
+        elif isinstance(value, int):
+            value = value.to_bytes(width, "big")
+        if len(value) != width:
+            raise ValueError("uid must be {} bytes long".format(width))
+        res.append(value)
+    if numpy is not None:
+        return numpy.array(res, dtype="S{}".format(width))
+    return res
+
+
+class RingOwnership(object):
+    """
+    Sorted uids of the members of a ring
+
+    @param nodes: BasicNode (or anything with an uid attribute), Key,
+        hexa str, int or bytes uids of the members, or raw uids as
+        accepted by tobytes(). In this last case self.nodes are the raw uids
+    @param idlength: number of bits of the uids
+    """
+    def __init__(self, nodes, idlength=256):
+        self.idlength = idlength
+        if isinstance(nodes, (bytes, bytearray, memoryview))\
+                or (numpy is not None and isinstance(nodes, numpy.ndarray)):
+            uids = tobytes(nodes, idlength)
+            if not len(uids):
+                raise ValueError("a ring needs at least one node")
+            if numpy is not None:
+                self.uids = numpy.sort(uids, kind="stable")
+                # numpy strips the trailing null bytes of the items
+                self.nodes = [bytes(uid).ljust(_width(idlength), b"\0") for uid in self.uids]
+            else:
+                self.uids = sorted(uids)
+                self.nodes = list(self.uids)
+            return
+        nodes = list(nodes)
+        if not nodes:
+            raise ValueError("a ring needs at least one node")
+        uids = [getattr(node, "uid", node) for node in nodes]
+        order = sorted(range(len(nodes)), key=lambda i: _sortkey(uids[i], idlength))
+        self.nodes = [nodes[i] for i in order]
+        self.uids = tobytes([uids[i] for i in order], idlength)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def owners(self, keys):
+        """
+        Return, for each key, the index in self.nodes of its owner
+        A numpy array of int with numpy, a list otherwise
+
+        @param keys: as accepted by tobytes()
+        """
+        keys = tobytes(keys, self.idlength)
+        if numpy is not None:
+            res = numpy.searchsorted(self.uids, keys, side="left")
+            res[res == len(self.uids)] = 0
+            return res
+        nb = len(self.uids)
+        return [i if i < nb else 0
+                for i in (bisect.bisect_left(self.uids, key) for key in keys)]
+
+    def ownerof(self, keys):
+        """
+        Return the owner node of each key
+        """
+        return [self.nodes[i] for i in self.owners(keys)]
+
+    def partition(self, keys):
+        """
+        Return a dict: index in self.nodes -> indexes of the keys it owns
+        Only nodes owning at least one key are present
+        """
+        owners = self.owners(keys)
+        if numpy is not None:
+            order = numpy.argsort(owners, kind="stable")
+            bounds = numpy.flatnonzero(numpy.diff(owners[order])) + 1
+            return dict((int(owners[group[0]]), group)
+                    for group in numpy.split(order, bounds) if len(group))
+        res = {}
+        for i, owner in enumerate(owners):
+            res.setdefault(owner, []).append(i)
+        return res
+
+
+def _sortkey(uid, idlength):
+    uid = getattr(uid, "value", uid)
+    if isinstance(uid, str):
+        return int(uid, 16)
+    if isinstance(uid, (bytes, bytearray)):
+        return int.from_bytes(uid, "big")
+    return uid
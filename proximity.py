@@ -0,0 +1,80 @@
+"""
+Proximity neighbor selection
+
+Any node of the interval [n + 2^i, n + 2^(i+1)[ is a valid i-th finger of
+the node n. A LocalNode created with pns keeps up to `pns` such candidates
+per finger, learnt from the nodes met while routing, and routes through the
+one with the lowest round trip time which still precedes the looked up key
+(see LocalNode.closest_preceding_finger()).
+
+Round trip times are measured passively on the rpc the node makes anyway:
+its proxies are wrapped by RttProxy, which feeds a RttTable.
+"""
+import threading
+import time
+
+
+class RttTable(object):
+    """
+    Smoothed round trip time of the peers, by uid value
+
+    @param alpha: weight of a new sample in the smoothed value, as TCP srtt
+    @param clock: function returning the current time, in seconds
+    """
+    def __init__(self, alpha=0.125, clock=time.perf_counter):
+        self.alpha = alpha
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.rtts = {}
+
+    def add(self, peer, secs):
+        with self.lock:
+            rtt = self.rtts.get(peer)
+            if rtt is None:
+                self.rtts[peer] = secs
+            else:
+                self.rtts[peer] = rtt + self.alpha * (secs - rtt)
+
+    def get(self, peer, default=None):
+        return self.rtts.get(peer, default)
+
+    def remove(self, peer):
+        """
+        Forget the measures of `peer`, e.g. when a call to it failed
+        """
+        with self.lock:
+            self.rtts.pop(peer, None)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.rtts)
+
+
+class RttProxy(object):
+    """
+    Wrap a methodProxy (see chord.NodeInterface) to measure the round trip
+    time of each call to `peer` in `table`.
+    A failed call removes the peer from the table.
+    """
+    def __init__(self, proxy, peer, table):
+        self._proxy = proxy
+        self._peer = peer
+        self._table = table
+
+    def __getattr__(self, name):
+        method = getattr(self._proxy, name)
+        if not callable(method):
+            return method
+        proxy = self
+
+        def measured(*params):
+            clock = proxy._table.clock
+            start = clock()
+            try:
+                res = method(*params)
+            except Exception:
+                proxy._table.remove(proxy._peer)
+                raise
+            proxy._table.add(proxy._peer, clock() - start)
+            return res
+        return measured
@@ -0,0 +1,199 @@
+"""
+Client of the data stored on a ring, routing with a cached view of it
+
+RingClient keeps the sorted uids of the ring members, fetched from a node
+by a ring walk (see ringwalk). The owner of a key, its successor on the
+ring, is found locally in O(log N) (see keyindex.KeyIndex.successor()),
+so a request goes straight to it: one hop instead of the lookup hops of
+find_successor.
+
+When the view is stale, the node asked answers with a "not mine" redirect
+(see LocalNode.getvalue()) carrying its predecessor, its successor and its
+closest preceding finger of the key. The client corrects its view with
+them and retries: the members the node doesn't know as neighbours are
+dropped, the ones it gave are added. A member which can't be reached is
+dropped too. A client may start with a partial view, the seed node only,
+and learn the ring from the redirects.
+"""
+import logging
+import threading
+
+import chord
+import ringwalk
+from key import Key
+from keyindex import KeyIndex
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+
+class RedirectError(Error):
+    """Raised when a request is still redirected after maxredirects"""
+    pass
+
+
+def _keyvalue(key, idlength):
+    if isinstance(key, Key):
+        return key.value
+    if isinstance(key, int):
+        return Key.fromint(key, idlength).value
+    return Key(key).value
+
+
+class RingClient(object):
+    """
+    Send the requests on keys straight to their owner
+
+    @param seed: LocalNode, dict or node reference the view is fetched from
+    @param transport: name or transport.Transport used to reach the nodes
+    @param full: fetch the whole view with a ring walk. Otherwise start
+        with the seed only and learn the ring from the redirects
+    @param maxredirects: redirects and unreachable nodes tolerated by request
+    """
+    def __init__(self, seed, transport=None, full=True, maxredirects=16):
+        self.seed = chord.NodeInterface(seed, transport).asref()
+        # int keys are taken in the identifier space of the ring
+        self.idlength = Key(self.seed[0]).idlength
+        self.transport = transport
+        self.maxredirects = maxredirects
+        self.lock = threading.Lock()
+        self.view = KeyIndex()
+        # uid int -> node reference, and its proxy once used
+        self.nodes = {}
+        self.proxies = {}
+        self.redirects = 0
+        if full:
+            self.refresh()
+        else:
+            self.learn(self.seed)
+
+    def refresh(self):
+        """
+        Replace the view by the members found by a walk of the ring from
+        the seed, or from a known member if the seed is gone
+        """
+        starts = [self.seed] + [ref for ref in list(self.nodes.values()) if ref != self.seed]
+        for start in starts:
+            try:
+                members = [chord.BasicNode(node).asref()
+                        for node in ringwalk.walk(start, self.transport)]
+            except ringwalk.WalkError as e:
+                log.debug("ring walk from %s failed: %s", start[0], e)
+                continue
+            with self.lock:
+                self.view = KeyIndex()
+                self.nodes = {}
+                for ref in members:
+                    self._learn(ref)
+            return
+        raise Error("no member of the view can be reached")
+
+    def learn(self, ref):
+        """
+        Add the node reference `ref` to the view
+        """
+        with self.lock:
+            self._learn(ref)
+
+    def _learn(self, ref):
+        uid = Key(ref[0]).toint()
+        self.view.add(uid)
+        self.nodes[uid] = list(ref)
+
+    def forget(self, uid):
+        """
+        Remove the node of int uid `uid` from the view
+        """
+        with self.lock:
+            self._forget(uid)
+
+    def _forget(self, uid):
+        self.view.discard(uid)
+        self.nodes.pop(uid, None)
+        self.proxies.pop(uid, None)
+
+    def owner(self, key):
+        """
+        Return the reference of the owner of `key` in the view
+        """
+        keyint = Key(_keyvalue(key, self.idlength)).toint()
+        uid = self.view.successor(keyint)
+        if uid is None:
+            # all the members were dropped, start again from the seed
+            self.learn(self.seed)
+            uid = self.view.successor(keyint)
+        return self.nodes[uid]
+
+    def _proxy(self, ref):
+        uid = Key(ref[0]).toint()
+        proxy = self.proxies.get(uid)
+        if proxy is None:
+            proxy = chord.NodeInterface(ref, self.transport).methodProxy
+            self.proxies[uid] = proxy
+        return proxy
+
+    def _correct(self, ref, redirect):
+        """
+        Correct the view with the `redirect` returned by the node `ref`
+        """
+        uid = Key(ref[0]).toint()
+        predecessor, successor = redirect["predecessor"], redirect["successor"]
+        intervals = []
+        if predecessor:
+            intervals.append((Key(predecessor[0]).toint(), uid))
+        intervals.append((uid, Key(successor[0]).toint()))
+        with self.lock:
+            # the node knows no member between its neighbours and itself
+            for start, end in intervals:
+                if start == end:
+                    continue
+                for stale in self.view.interval(start, end):
+                    if stale != end:
+                        self._forget(stale)
+            for node in (predecessor, successor, redirect["closest"]):
+                if node:
+                    self._learn(node)
+
+    def request(self, method, key, *params):
+        """
+        Call `method`(keyvalue, *params) on the owner of `key` and return
+        its result, following the redirects
+        """
+        keyvalue = _keyvalue(key, self.idlength)
+        for attempt in range(self.maxredirects + 1):
+            ref = self.owner(keyvalue)
+            try:
+                res = getattr(self._proxy(ref), method)(keyvalue, *params)
+            except OSError as e:
+                log.debug("%s unreachable, dropped from the view: %s", ref[0], e)
+                self.forget(Key(ref[0]).toint())
+                continue
+            if not res.get("notmine"):
+                return res
+            self.redirects += 1
+            self._correct(ref, res)
+        raise RedirectError("{} still redirected after {} attempts".format(
+            keyvalue, self.maxredirects + 1))
+
+    def get(self, key):
+        """
+        Return the value of `key` as bytes, None if it is not stored
+        """
+        value = self.request("getvalue", key)["value"]
+        # xmlrpc transports bytes as xmlrpc.client.Binary
+        return getattr(value, "data", value)
+
+    def put(self, key, value):
+        self.request("putvalue", key, value)
+
+    def delete(self, key):
+        """
+        Delete `key`, return False if it was not stored
+        """
+        return self.request("deletevalue", key)["deleted"]
+
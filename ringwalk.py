@@ -0,0 +1,120 @@
+"""
+Streaming traversal of a ring, for inspection and bulk export
+
+walk() follows the successor pointers from a node and yields the nodes of
+the ring one by one, in ring order, instead of recursing through them as
+LocalNode.updatefinger() and LocalNode.lookupWithSucc() do. A thread
+fetches the successors ahead of the consumer, at most `prefetch` nodes, so
+a walk of a ring of any size runs in constant memory. With keys=True, each
+node comes with an iterator on the keys it owns, fetched lazily by pages
+of LocalNode.getkeys().
+"""
+import logging
+import queue
+import threading
+
+import chord
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# end of the walk, in the queue of the prefetcher
+_END = object()
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+
+class WalkError(Error):
+    """Raised when the walk can't reach the successor of a node"""
+    pass
+
+
+def ownedkeys(node, transport=None, pagesize=1000):
+    """
+    Yield the values of the keys owned by `node`, fetched by pages of
+    `pagesize` keys
+
+    @param node: LocalNode, dict or node reference
+    """
+    proxy = chord.NodeInterface(node, transport).methodProxy
+    after = None
+    while True:
+        page = proxy.getkeys(after, pagesize)
+        for key in page:
+            yield key
+        if len(page) < pagesize:
+            return
+        after = page[-1]
+
+
+def _successors(start, transport, stop):
+    """
+    Yield the nodes of the ring from `start`, as dicts, until back to start
+    or until the event `stop` is set
+    """
+    first = chord.NodeInterface(start, transport)
+    node = first.asdict()
+    while not stop.is_set():
+        yield node
+        try:
+            successor = chord.NodeInterface(node, transport).methodProxy.getsuccessor()
+        except Exception as e:
+            raise WalkError("can't get the successor of {}:{}: {}".format(
+                node["ip"], node["port"], e)) from e
+        successor.pop("srvload", None)
+        # back to start, or past it if start left the ring during the walk
+        if successor["uid"] == node["uid"]\
+                or first.uid.is_between_r_inclu(node["uid"], successor["uid"]):
+            return
+        node = successor
+
+
+def walk(start, transport=None, prefetch=16, keys=False, pagesize=1000):
+    """
+    Yield the nodes of the ring of `start` as dicts, in ring order from it
+    With keys=True, yield (node, iterator on the values of its keys)
+
+    @param start: LocalNode, dict or node reference to start from
+    @param transport: name or transport.Transport used to reach the nodes
+    @param prefetch: maximum number of nodes fetched ahead of the consumer
+    @param pagesize: number of keys fetched by rpc
+    """
+    nodes = queue.Queue(prefetch)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for node in _successors(start, transport, stop):
+                _put(node)
+        except Exception as e:
+            _put(e)
+        _put(_END)
+
+    def _put(item):
+        # don't block forever if the consumer is gone
+        while not stop.is_set():
+            try:
+                nodes.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    prefetcher = threading.Thread(target=produce, daemon=True)
+    prefetcher.start()
+    try:
+        while True:
+            node = nodes.get()
+            if node is _END:
+                return
+            if isinstance(node, Exception):
+                raise node
+            if keys:
+                yield node, ownedkeys(node, transport, pagesize)
+            else:
+                yield node
+    finally:
+        stop.set()
+        prefetcher.join()
@@ -0,0 +1,54 @@
+"""
+Methods of a LocalNode which may be called remotely
+
+Both servers (serverxmlrpc, serverbinrpc) and the simulator serve only the
+methods of METHODS: the ones driving the node itself (stop(), leave(),
+savesnapshot(), settrace()...) are reserved to its process.
+install_routing() is exposed because bootstrap.bootstrap() installs the
+routing of the remote nodes through it.
+
+A node class may serve another set of methods with a `rpcmethods`
+attribute, e.g. `rpcmethods = rpcapi.METHODS | {"mymethod"}`.
+"""
+
+METHODS = frozenset((
+    # lookups
+    "find_successor",
+    "find_predecessor",
+    "closest_preceding_finger",
+    "closest_preceding_fingerref",
+    "lookupWithSucc",
+    # routing state
+    "getsuccessor",
+    "getsuccessorref",
+    "getpredecessor",
+    "setsuccessor",
+    "setpredecessor",
+    "notify_new_predecessor",
+    "notify_departure",
+    "exchangemembers",
+    "update_finger_table",
+    "updatefinger",
+    "install_routing",
+    "getchanges",
+    # store
+    "getkeys",
+    "getvalue",
+    "putvalue",
+    "deletevalue",
+    # observation
+    "getmetrics",
+    "gettrace",
+))
+
+def resolve(node, method):
+    """
+    Return the function serving the rpc `method` of `node`
+    Raise AttributeError if `method` is not served
+    """
+    if not isinstance(method, str) or method not in getattr(node, "rpcmethods", METHODS):
+        raise AttributeError("method {!r} is not supported".format(method))
+    func = getattr(node, method, None)
+    if not callable(func):
+        raise AttributeError("method {!r} is not supported".format(method))
+    return func
@@ -0,0 +1,181 @@
+import concurrent.futures
+import os
+import socket
+import socketserver
+import threading
+
+import rpcapi
+import wire
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    """
+    Serve the frames of one connection until the client closes it
+    A request is [method, params], a response is [True, result]
+    or [False, error message]
+    """
+    def handle(self):
+        node = self.server.node
+        while True:
+            try:
+                payload = wire.recvframe(self.request)
+            except (OSError, wire.WireError):
+                return
+            if payload is None:
+                return
+            try:
+                method, params = wire.decode(payload)
+                response = [True, dispatch(node, method, params)]
+            except Exception as e:
+                response = [False, "{}: {}".format(type(e).__name__, e)]
+            try:
+                data = wire.encode(response)
+            except Exception as e:
+                data = wire.encode([False, "{}: {}".format(type(e).__name__, e)])
+            try:
+                wire.sendframe(self.request, data)
+            except OSError:
+                return
+
+class MuxRequestHandler(socketserver.BaseRequestHandler):
+    """
+    Serve a multiplexed connection: a request is [id, method, params],
+    the response [id, True, result] or [id, False, error message].
+    Requests are executed concurrently by the server pool, so responses
+    are sent as soon as they are ready, in any order.
+    """
+    def handle(self):
+        node = self.server.node
+        writelock = threading.Lock()
+
+        def execute(reqid, method, params):
+            try:
+                response = [reqid, True, dispatch(node, method, params)]
+            except Exception as e:
+                response = [reqid, False, "{}: {}".format(type(e).__name__, e)]
+            try:
+                data = wire.encode(response)
+            except Exception as e:
+                data = wire.encode([reqid, False, "{}: {}".format(type(e).__name__, e)])
+            with writelock:
+                try:
+                    wire.sendframe(self.request, data)
+                except OSError:
+                    pass
+
+        while True:
+            try:
+                payload = wire.recvframe(self.request)
+                if payload is None:
+                    return
+                reqid, method, params = wire.decode(payload)
+            except (OSError, ValueError, wire.WireError):
+                return
+            try:
+                self.server.pool.submit(execute, reqid, method, params)
+            except RuntimeError:
+                # pool shut down, the server is stopping
+                return
+
+def dispatch(node, method, params):
+    """
+    Call `method` of `node` with `params`
+    Only the rpc methods of the node are exposed (see rpcapi)
+    Requests go through the admission control of the node (see admission)
+    """
+    func = rpcapi.resolve(node, method)
+    control = getattr(node, "admission", None)
+    if control is not None and control.limit:
+        return control.call(func, *params)
+    return func(*params)
+
+class _ConnectionsMixIn(object):
+    """
+    Track the connections of a threading server, so server_close() also
+    closes the persistent ones: their handler threads end and the address
+    can be bound again
+    """
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, *args, **kwargs):
+        self.connections = set()
+        self.connectionslock = threading.Lock()
+        super(_ConnectionsMixIn, self).__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        with self.connectionslock:
+            self.connections.add(request)
+        super(_ConnectionsMixIn, self).process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        with self.connectionslock:
+            self.connections.discard(request)
+        super(_ConnectionsMixIn, self).shutdown_request(request)
+
+    def server_close(self):
+        super(_ConnectionsMixIn, self).server_close()
+        with self.connectionslock:
+            connections = list(self.connections)
+        for request in connections:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+class TCPServer(_ConnectionsMixIn, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+class UnixServer(_ConnectionsMixIn, socketserver.ThreadingUnixStreamServer):
+    pass
+
+class ChordServerbinrpc(threading.Thread):
+    """
+    Serve a LocalNode with the binary protocol of wire.py
+    Connections are persistent, each one is served by its own thread
+
+    @param unixpath: path of a unix socket on which the node is also
+        served, for the clients of the same host (see transport.UnixRPCTransport)
+    """
+    def __init__(self, node, unixpath=None):
+        threading.Thread.__init__(self)
+        self.ip = node.ip
+        self.port = node.port
+        self.node = node
+        self.tcpserver = TCPServer((self.ip, self.port), RequestHandler)
+        self.tcpserver.node = node
+        self.servers = [self.tcpserver]
+        self.unixpath = unixpath
+        if unixpath is not None:
+            # left by a process which did not stop its server
+            if os.path.exists(unixpath):
+                os.remove(unixpath)
+            self.unixserver = UnixServer(unixpath, RequestHandler)
+            self.unixserver.node = node
+            self.servers.append(self.unixserver)
+
+    def run(self):
+        for server in self.servers[1:]:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.tcpserver.serve_forever()
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        if self.unixpath is not None and os.path.exists(self.unixpath):
+            os.remove(self.unixpath)
+
+class ChordServermuxrpc(ChordServerbinrpc):
+    """
+    Serve a LocalNode with the multiplexed protocol: many requests can be
+    in flight on one connection and are executed concurrently by a pool
+    of `workers` threads
+    """
+    def __init__(self, node, workers=32):
+        ChordServerbinrpc.__init__(self, node)
+        self.tcpserver.RequestHandlerClass = MuxRequestHandler
+        self.tcpserver.pool = concurrent.futures.ThreadPoolExecutor(workers)
+
+    def stop(self):
+        ChordServerbinrpc.stop(self)
+        self.tcpserver.pool.shutdown(wait=False)
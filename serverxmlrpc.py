@@ -1,18 +1,59 @@
 from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+from xmlrpc.server import MultiPathXMLRPCServer, SimpleXMLRPCDispatcher
+import socketserver
 import threading
+import xmlrpc.client
+
+import admission
+import rpcapi
 
 class RequestHandler(SimpleXMLRPCRequestHandler):
     rpc_paths = ('/chord',)
 
+class ThreadingXMLRPCServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+    block_on_close = False
+
+class ExposedNode(object):
+    """
+    Instance registered in place of a node: only its rpc methods are
+    served (see rpcapi). When its admission is limited (see
+    admission.Admission), requests go through its admission control and
+    a rejection is sent as a fault of code admission.BUSYCODE
+    """
+    def __init__(self, node):
+        self.node = node
+
+    def _dispatch(self, method, params):
+        func = rpcapi.resolve(self.node, method)
+        control = getattr(self.node, "admission", None)
+        if control is None or not control.limit:
+            return func(*params)
+        try:
+            return control.call(func, *params)
+        except admission.Busy as e:
+            raise xmlrpc.client.Fault(admission.BUSYCODE, "Busy: {}".format(e))
+
+def dispatchinstance(node):
+    """
+    Return the instance to register on a xmlrpc server to serve `node`
+    """
+    return ExposedNode(node)
+
 class ChordServerxmlrpc(threading.Thread):
-    def __init__(self, node, quiet=True):
+    def __init__(self, node, quiet=True, threaded=False):
+        """
+        @param threaded: serve each request in its own thread.
+            Otherwise requests are served one by one
+        """
         #TODO composition with threading.Thread rather than inheritance
         threading.Thread.__init__(self)
         self.ip = node.ip
         self.port = node.port
         self.node = node
         logReq = not quiet
-        self.tcpserver = SimpleXMLRPCServer(
+        servercls = ThreadingXMLRPCServer if threaded else SimpleXMLRPCServer
+        self.tcpserver = servercls(
                 (self.ip, self.port),
                 allow_none=True,
                 requestHandler=RequestHandler,
@@ -20,10 +61,109 @@ class ChordServerxmlrpc(threading.Thread):
         )
 
     def run(self):
-        #TODO only expose methods which should be used
-        self.tcpserver.register_instance(self.node)
+        self.tcpserver.register_instance(dispatchinstance(self.node))
         self.tcpserver.serve_forever()
 
     def stop(self):
         self.tcpserver.shutdown()
         self.tcpserver.server_close()
+
+# Nodes served by a ChordEndpointxmlrpc of this process, keyed by (ip, port)
+# RPC between them are short-circuited into direct calls (see chord.NodeInterface)
+_colocated = {}
+_endpoint = None
+_endpointlock = threading.Lock()
+
+def nodepath(uid):
+    """
+    Return the rpc path of the node `uid` on a shared endpoint
+    @param uid: Key or str
+    """
+    return "/chord/{}".format(getattr(uid, "value", uid))
+
+def getcolocated(ip, port):
+    """
+    Return the LocalNode (ip, port) if it is served by an endpoint
+    of this process, None otherwise
+    """
+    return _colocated.get((ip, port))
+
+def getendpoint(ip="127.0.0.1", port=0, quiet=True):
+    """
+    Return the ChordEndpointxmlrpc of the process
+    It is created and started on (ip, port) the first time it is asked for,
+    or when the previous one has been stopped.
+    Port 0 lets the os choose a free port.
+    """
+    global _endpoint
+    with _endpointlock:
+        if _endpoint is None or _endpoint.stopped:
+            _endpoint = ChordEndpointxmlrpc(ip, port, quiet=quiet)
+            _endpoint.start()
+        return _endpoint
+
+class EndpointRequestHandler(SimpleXMLRPCRequestHandler):
+    def is_rpc_path_valid(self):
+        return self.path in self.server.dispatchers
+
+class ChordEndpointxmlrpc(threading.Thread):
+    """
+    Single xmlrpc server shared by many LocalNode of the same process
+    Each node is exposed on its own path (see nodepath()) so one socket
+    and one thread serve all of them.
+    Nodes attached to the endpoint are also registered as co-located:
+    calls between them never go through xml serialization.
+    """
+    def __init__(self, ip, port, quiet=True):
+        threading.Thread.__init__(self, daemon=True)
+        self.tcpserver = MultiPathXMLRPCServer(
+                (ip, port),
+                allow_none=True,
+                requestHandler=EndpointRequestHandler,
+                logRequests=not quiet
+        )
+        self.ip, self.port = self.tcpserver.server_address[:2]
+        self.stopped = False
+
+    def attach(self, node):
+        """
+        Return an object with start() and stop() methods, like
+        ChordServerxmlrpc, which serves `node` through this endpoint
+        """
+        return EndpointBinding(self, node)
+
+    def register(self, node):
+        dispatcher = SimpleXMLRPCDispatcher(allow_none=True, encoding=None)
+        dispatcher.register_instance(dispatchinstance(node))
+        self.tcpserver.add_dispatcher(nodepath(node.uid), dispatcher)
+        _colocated[(node.ip, node.port)] = node
+
+    def unregister(self, node):
+        self.tcpserver.dispatchers.pop(nodepath(node.uid), None)
+        if _colocated.get((node.ip, node.port)) is node:
+            del _colocated[(node.ip, node.port)]
+
+    def run(self):
+        self.tcpserver.serve_forever()
+
+    def stop(self):
+        self.stopped = True
+        for path in list(self.tcpserver.dispatchers):
+            node = self.tcpserver.dispatchers[path].instance
+            self.unregister(getattr(node, "node", node))
+        self.tcpserver.shutdown()
+        self.tcpserver.server_close()
+
+class EndpointBinding(object):
+    """
+    Registration of one LocalNode on a ChordEndpointxmlrpc
+    """
+    def __init__(self, endpoint, node):
+        self.endpoint = endpoint
+        self.node = node
+
+    def start(self):
+        self.endpoint.register(self.node)
+
+    def stop(self):
+        self.endpoint.unregister(self.node)
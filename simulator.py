@@ -0,0 +1,277 @@
+"""
+In-process discrete-event simulator of a ring
+
+LocalNode instances created by a Simulator use its SimTransport: their rpc
+are delivered through an in-memory bus working in virtual time, with
+configurable latency, jitter and message loss. The routing and
+stabilization code of LocalNode runs unmodified; stabilization rounds are
+scheduled as events instead of Stabilizer threads.
+
+The shared clock `now` only moves from one event to the next: the events
+of different nodes overlap in virtual time as they would on a network.
+An rpc is synchronous: the time elapsed in the executing event advances by
+the latency of the request, the time taken by the remote node to answer
+(its own rpc) and the latency of the response, and what the event
+schedules is due from its end (see Simulator.clock()). A lost message
+costs `timeout` seconds and raises TimeoutError, a call to an absent node raises
+ConnectionRefusedError, a request rejected by the admission control of a
+node raises admission.Busy.
+"""
+import heapq
+import itertools
+import random
+
+import admission
+import chord
+import serverbinrpc
+from transport import Transport
+
+
+class SimServer(object):
+    """
+    Registration of a LocalNode on the bus of a Simulator
+    """
+    def __init__(self, sim, node):
+        self.sim = sim
+        self.node = node
+
+    def start(self):
+        self.sim.bus[(self.node.ip, self.node.port)] = self.node
+
+    def stop(self):
+        if self.sim.bus.get((self.node.ip, self.node.port)) is self.node:
+            del self.sim.bus[(self.node.ip, self.node.port)]
+
+
+class _Method(object):
+    def __init__(self, proxy, name):
+        self.proxy = proxy
+        self.name = name
+
+    def __call__(self, *params):
+        return self.proxy.sim.call(self.proxy.address, self.name, params)
+
+
+class SimProxy(object):
+    def __init__(self, sim, address):
+        self.sim = sim
+        self.address = address
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Method(self, name)
+
+
+class SimTransport(Transport):
+    name = "sim"
+
+    def __init__(self, sim):
+        self.sim = sim
+
+    def server(self, node):
+        return SimServer(self.sim, node)
+
+    def client(self, node):
+        return SimProxy(self.sim, (node.ip, node.rpcport))
+
+
+class Simulator(object):
+    """
+    @param latency: mean one way latency of a message, in seconds
+    @param jitter: latency is drawn uniformly in latency +- jitter
+    @param loss: probability for a message to be lost
+    @param timeout: time lost by the caller on a lost message
+    @param stabilizeperiod: virtual time between two stabilization rounds
+        of a node
+    @param seed: seed of the random generator, for reproducible runs
+    @param linklatency: function(src, dst) returning the mean one way
+        latency between the addresses (ip, port) src and dst, replaces
+        `latency` when the caller of an rpc is a node of the simulator
+    """
+    def __init__(self, latency=0.01, jitter=0.0, loss=0.0, timeout=1.0,
+            stabilizeperiod=1.0, seed=None, linklatency=None):
+        self.latency = latency
+        self.linklatency = linklatency
+        self.jitter = jitter
+        self.loss = loss
+        self.timeout = timeout
+        self.stabilizeperiod = stabilizeperiod
+        self.rng = random.Random(seed)
+        self.transport = SimTransport(self)
+        self.now = 0.0
+        # virtual time spent by the executing event, from self.now
+        self.elapsed = 0.0
+        self.bus = {}
+        self.nodes = []
+        self.events = []
+        self.seq = itertools.count()
+        self.rpccount = 0
+        self.lostcount = 0
+        self.failedrounds = 0
+        # addresses of the nodes executing code, the last one makes the rpc
+        self.callers = []
+
+    def clock(self):
+        """
+        Return the virtual time seen by the executing event
+        """
+        return self.now + self.elapsed
+
+    def delay(self, src=None, dst=None):
+        latency = self.latency
+        if self.linklatency is not None and src is not None:
+            latency = self.linklatency(src, dst)
+        if self.jitter:
+            return max(0.0, latency + self.rng.uniform(-self.jitter, self.jitter))
+        return latency
+
+    def lost(self):
+        if self.loss and self.rng.random() < self.loss:
+            self.lostcount += 1
+            self.elapsed += self.timeout
+            return True
+        return False
+
+    def call(self, address, method, params):
+        """
+        Deliver the rpc `method` to the node `address` and return its answer
+        """
+        self.rpccount += 1
+        if self.lost():
+            raise TimeoutError("request {} to {}:{} lost".format(method, *address))
+        node = self.bus.get(address)
+        if node is None:
+            self.elapsed += self.timeout
+            raise ConnectionRefusedError("no node on {}:{}".format(*address))
+        src = self.callers[-1] if self.callers else None
+        self.elapsed += self.delay(src, address)
+        res = self.execute(node, serverbinrpc.dispatch, node, method, params)
+        if self.lost():
+            raise TimeoutError("response of {} from {}:{} lost".format(method, *address))
+        self.elapsed += self.delay(address, src)
+        return res
+
+    def execute(self, node, function, *args):
+        """
+        Return function(*args), executed on behalf of `node`: the rpc it
+        makes are sent from the address of `node`
+        An execution which isn't nested in another one is an event starting
+        at self.now
+        """
+        if not self.callers:
+            self.elapsed = 0.0
+        self.callers.append((node.ip, node.port))
+        try:
+            return function(*args)
+        finally:
+            self.callers.pop()
+
+    def schedule(self, delay, callback, *args):
+        """
+        Execute callback(*args) in `delay` virtual seconds from the time
+        seen by the executing event
+        """
+        heapq.heappush(self.events, (self.clock() + delay, next(self.seq), callback, args))
+
+    def run(self, duration):
+        """
+        Execute the events due in the next `duration` virtual seconds
+        The clock is then exactly `duration` seconds later
+        """
+        end = self.now + duration
+        while self.events and self.events[0][0] <= end:
+            when, _, callback, args = heapq.heappop(self.events)
+            self.now = when
+            self.elapsed = 0.0
+            callback(*args)
+        self.now = end
+        self.elapsed = 0.0
+
+    def addnode(self, ip="10.0.0.1", port=None, stabilize=True, **kwargs):
+        """
+        Create and return a LocalNode on the bus
+        Its stabilization rounds start at a random phase of the period
+
+        @param port: default is the next unused port
+        @param kwargs: passed to LocalNode
+        """
+        if port is None:
+            port = 1024 + len(self.nodes)
+        # the nodes draw from the generator of the simulation
+        kwargs.setdefault("rng", self.rng)
+        node = chord.LocalNode(ip, port, _stabilizer=False,
+                transport=self.transport, **kwargs)
+        # rtt measured by proximity neighbor selection, load reports and
+        # gossiped membership ages are in virtual time
+        node.rtt.clock = self.clock
+        node.loads.clock = self.clock
+        if node.membership is not None:
+            node.membership.clock = self.clock
+        self.nodes.append(node)
+        if stabilize:
+            self.schedule(self.rng.uniform(0, self.stabilizeperiod), self._stabilize, node)
+        return node
+
+    def removenode(self, node):
+        """
+        Make `node` fail: it leaves the bus without notifying anyone
+        """
+        node.stop()
+        self.nodes.remove(node)
+
+    def leave(self, node):
+        """
+        Make `node` leave the ring gracefully (see LocalNode.leave())
+        """
+        self.execute(node, node.leave)
+        self.nodes.remove(node)
+
+    def _stabilize(self, node):
+        if self.bus.get((node.ip, node.port)) is not node:
+            return
+        try:
+            self.execute(node, node._stabilize_and_fix_fingers)
+        except (TimeoutError, ConnectionRefusedError, admission.Busy):
+            self.failedrounds += 1
+        self.schedule(self.stabilizeperiod, self._stabilize, node)
+
+    def join(self, node, existingnode):
+        """
+        Join `node` to the ring of `existingnode` as in the 5th paragraph
+        of the paper, the ring is then fixed by stabilization rounds
+        """
+        self.execute(node, node.join_5, node.getNodeInterface(existingnode.asdict()))
+
+    def lookup(self, node, keyvalue):
+        """
+        Return the find_successor() result of `keyvalue` from `node`,
+        with the number of rpc and the virtual time it took
+        """
+        rpccount = self.rpccount
+        res = self.execute(node, node.find_successor, keyvalue)
+        return res, self.rpccount - rpccount, self.elapsed
+
+    def ringconverged(self):
+        """
+        True if successors and predecessors of all the nodes are right
+        """
+        ring = sorted(self.nodes, key=lambda n: int(n.uid.value, 16))
+        for k, node in enumerate(ring):
+            if node.successor.uid != ring[(k + 1) % len(ring)].uid:
+                return False
+            if node.predecessor is None or node.predecessor.uid != ring[k - 1].uid:
+                return False
+        return True
+
+    def runtillconverged(self, step=1.0, maxtime=3600.0):
+        """
+        Run the simulation until ringconverged()
+        Return the virtual time it took, None if not converged in maxtime
+        """
+        start = self.now
+        while self.now - start < maxtime:
+            if self.ringconverged():
+                return self.now - start
+            self.run(step)
+        return None
@@ -0,0 +1,126 @@
+"""
+Snapshots of the routing state of a LocalNode, for fast warm restarts
+
+A LocalNode created with snapshot=<path> saves its predecessor and its
+finger table (whose first finger is the successor) to `path`
+periodically and on stop(). When it starts again with the same uid, the
+routing state is reloaded from the file instead of starting with all the
+fingers on itself. It is validated lazily: stabilize() checks the
+successor and the predecessor, and fix_fingers() checks the reloaded
+fingers first.
+
+The finger table is stored deduplicated, as the list of [i, node reference]
+where finger i is the first one on that node (the form installed by
+LocalNode.install_routing()), encoded with wire.py.
+"""
+import logging
+import os
+import time
+
+import wire
+
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+MAGIC = b"chordsnap"
+VERSION = 1
+
+
+def compactfingers(node):
+    """
+    Return the finger table of `node` as a list of [i, node reference]
+    where finger i is the first one of consecutive fingers on that node
+    """
+    return compactrouting(node.routing)
+
+
+def compactrouting(routing):
+    """
+    Same as compactfingers() for the fingers of a chord.Routing version
+    """
+    fingers = []
+    previous = None
+    for i, respnode in enumerate(routing.fingers):
+        uid = respnode.uid.value
+        if uid != previous:
+            fingers.append([i, respnode.asref()])
+            previous = uid
+    return fingers
+
+
+def dump(node):
+    """
+    Return the snapshot of the routing state of `node`, as bytes
+    """
+    # one consistent version of the routing state
+    routing = node.routing
+    state = {"version": VERSION,
+            "uid": node.uid.value,
+            "time": time.time(),
+            "predecessor": routing.predecessor.asref() if routing.predecessor else None,
+            "fingers": compactrouting(routing)}
+    return MAGIC + wire.encode(state)
+
+
+def save(node, path):
+    """
+    Write the snapshot of `node` to `path`
+    The file is replaced atomically: a crash never leaves a partial one
+    """
+    data = dump(node)
+    tmp = "{}.tmp".format(path)
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load(path):
+    """
+    Return the state saved in `path` as a dict with the keys version, uid,
+    time, predecessor and fingers. None if there is no valid snapshot
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if not data.startswith(MAGIC):
+        log.warning("%s is not a routing snapshot", path)
+        return None
+    try:
+        state = wire.decode(data[len(MAGIC):])
+    except (wire.WireError, ValueError) as e:
+        log.warning("corrupted routing snapshot %s: %s", path, e)
+        return None
+    if not isinstance(state, dict) or state.get("version") != VERSION:
+        log.warning("unsupported routing snapshot %s", path)
+        return None
+    if not wellformed(state):
+        log.warning("malformed routing snapshot %s", path)
+        return None
+    return state
+
+
+def _isref(ref):
+    return isinstance(ref, list) and len(ref) in (3, 4) and isinstance(ref[0], str)\
+            and isinstance(ref[1], str) and all(isinstance(port, int) for port in ref[2:])
+
+
+def wellformed(state):
+    """
+    True if the decoded snapshot `state` has the keys and the shape written
+    by dump(): the fingers start with finger 0, in increasing order
+    """
+    fingers = state.get("fingers")
+    if not isinstance(state.get("uid"), str)\
+            or not isinstance(state.get("time"), (int, float))\
+            or not (state.get("predecessor") is None or _isref(state.get("predecessor")))\
+            or not isinstance(fingers, list) or not fingers:
+        return False
+    previous = -1
+    for finger in fingers:
+        if not (isinstance(finger, list) and len(finger) == 2 and isinstance(finger[0], int)
+                and finger[0] > previous and _isref(finger[1])):
+            return False
+        previous = finger[0]
+    return fingers[0][0] == 0
@@ -0,0 +1,321 @@
+"""
+Local storage engine of the data of a node
+
+Records are appended to segment files of a directory, which are read
+through mmap: values are never copied into memory until they are used.
+An in-memory index maps each key, as its raw big-endian bytes, to the
+place of its last value, and a keyindex.KeyIndex of the keys serves
+scans of ring intervals in key order.
+
+A record is:
+    crc32 (u32) | flags (u8) | key (idlength / 8 bytes) | length (u32) | value
+The crc covers everything after itself. A record with the TOMBSTONE flag
+deletes its key. On open, the segments are replayed in order to rebuild
+the index. A torn record at the end of the last segment, the one written
+to, is truncated. A damaged record in a sealed segment raises
+CorruptSegmentError: the valid records after it are not dropped silently.
+
+Overwritten and deleted values stay in their segment until compact()
+rewrites the live records into new segments.
+"""
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from key import Key
+from keyindex import KeyIndex
+
+TOMBSTONE = 1
+
+_crc = struct.Struct(">I")
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+
+class StoreClosedError(Error):
+    pass
+
+
+class CorruptSegmentError(Error):
+    """Raised on open when a sealed segment holds a damaged record"""
+    pass
+
+
+def rawkey(key, idlength=256):
+    """
+    Return `key` (Key, hexa str, int or raw bytes) as raw big-endian bytes
+    """
+    width = idlength // 8
+    if isinstance(key, Key):
+        key = key.value
+    if isinstance(key, str):
+        key = bytes.fromhex(key)
+    elif isinstance(key, int):
+        key = key.to_bytes(width, "big")
+    else:
+        key = bytes(key)
+    if len(key) != width:
+        raise ValueError("key must be {} bytes long".format(width))
+    return key
+
+
+class Segment(object):
+    """
+    Append-only file of records, read through mmap
+    The mapping is extended when reads go past the mapped size.
+    """
+    def __init__(self, path, number):
+        self.path = path
+        self.number = number
+        self.file = open(path, "a+b")
+        self.size = self.file.seek(0, os.SEEK_END)
+        self.map = None
+        self.mapped = 0
+        self.lock = threading.Lock()
+
+    def append(self, data):
+        """
+        Write `data` at the end of the segment and return its offset
+        """
+        offset = self.size
+        self.file.write(data)
+        self.size += len(data)
+        return offset
+
+    def flush(self, sync=False):
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def view(self, offset, length):
+        """
+        Return a memoryview on `length` bytes at `offset`, without copy
+        """
+        if offset + length > self.mapped:
+            with self.lock:
+                if offset + length > self.mapped:
+                    self.file.flush()
+                    # the previous mapping stays valid for the views on it
+                    self.map = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+                    self.mapped = self.size
+        return memoryview(self.map)[offset:offset + length]
+
+    def truncate(self, size):
+        self.file.truncate(size)
+        self.size = size
+
+    def close(self):
+        self.file.close()
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # views on it are still used, it is freed with them
+                pass
+            self.map = None
+
+
+class SegmentStore(object):
+    """
+    Key-value store of the directory `directory`
+
+    @param segmentsize: size from which a new segment is started
+    @param sync: fsync every write
+    @param idlength: number of bits of the keys
+    """
+    def __init__(self, directory, segmentsize=64 * 1024 * 1024, sync=False, idlength=256):
+        self.directory = directory
+        self.segmentsize = segmentsize
+        self.sync = sync
+        self.idlength = idlength
+        self.keywidth = idlength // 8
+        self._header = struct.Struct(">IB{}sI".format(self.keywidth))
+        self.lock = threading.RLock()
+        self.segments = {}
+        # raw key -> (segment number, value offset, value length)
+        self.index = {}
+        self.keys = KeyIndex()
+        self.garbage = 0
+        self.closed = False
+        os.makedirs(directory, exist_ok=True)
+        numbers = sorted(int(name[:-4]) for name in os.listdir(directory)
+                if name.endswith(".seg") and name[:-4].isdigit())
+        try:
+            for number in numbers:
+                self._replay(self._opensegment(number), number == numbers[-1])
+        except Error:
+            for segment in self.segments.values():
+                segment.close()
+            raise
+        if not numbers:
+            self._opensegment(0)
+        self.active = self.segments[max(self.segments)]
+        self.keys = KeyIndex(int.from_bytes(key, "big") for key in self.index)
+
+    def _segmentpath(self, number):
+        return os.path.join(self.directory, "{:08d}.seg".format(number))
+
+    def _opensegment(self, number):
+        segment = Segment(self._segmentpath(number), number)
+        self.segments[number] = segment
+        return segment
+
+    def _replay(self, segment, last):
+        """
+        Rebuild the index from the records of `segment`
+
+        @param last: `segment` is the last one, whose torn end is truncated
+        """
+        offset = 0
+        headersize = self._header.size
+        while offset + headersize <= segment.size:
+            header = bytes(segment.view(offset, headersize))
+            crc, flags, key, length = self._header.unpack(header)
+            end = offset + headersize + length
+            if end > segment.size or\
+                    zlib.crc32(segment.view(offset + _crc.size, end - offset - _crc.size)) != crc:
+                break
+            self._indexrecord(key, flags, segment.number, offset + headersize, length)
+            offset = end
+        if offset != segment.size:
+            if not last:
+                raise CorruptSegmentError("{}: damaged record at offset {}, {} bytes after it".format(
+                        segment.path, offset, segment.size - offset))
+            # torn write of the last record
+            segment.truncate(offset)
+
+    def _indexrecord(self, key, flags, number, offset, length):
+        previous = self.index.pop(key, None)
+        if previous is not None:
+            self.garbage += previous[2] + self._header.size
+        if flags & TOMBSTONE:
+            self.garbage += self._header.size
+        else:
+            self.index[key] = (number, offset, length)
+
+    def _record(self, key, flags, value):
+        body = self._header.pack(0, flags, key, len(value))[_crc.size:] + value
+        return _crc.pack(zlib.crc32(body)) + body
+
+    def _append(self, key, flags, value):
+        if self.closed:
+            raise StoreClosedError("store of {} is closed".format(self.directory))
+        if self.active.size >= self.segmentsize:
+            self.active.flush(self.sync)
+            self.active = self._opensegment(self.active.number + 1)
+        offset = self.active.append(self._record(key, flags, value))
+        if self.sync:
+            self.active.flush(True)
+        return offset + self._header.size
+
+    def put(self, key, value):
+        """
+        Store `value` (bytes) for `key`
+        """
+        key = rawkey(key, self.idlength)
+        value = bytes(value)
+        with self.lock:
+            offset = self._append(key, 0, value)
+            self.keys.add(int.from_bytes(key, "big"))
+            self._indexrecord(key, 0, self.active.number, offset, len(value))
+
+    def delete(self, key):
+        """
+        Delete `key`, return False if it was not stored
+        """
+        key = rawkey(key, self.idlength)
+        with self.lock:
+            if key not in self.index:
+                return False
+            self._append(key, TOMBSTONE, b"")
+            self._indexrecord(key, TOMBSTONE, self.active.number, 0, 0)
+            self.keys.discard(int.from_bytes(key, "big"))
+            return True
+
+    def getview(self, key):
+        """
+        Return a memoryview on the value of `key`, None if it is not stored
+        The view is only valid until the store is closed
+        """
+        key = rawkey(key, self.idlength)
+        with self.lock:
+            location = self.index.get(key)
+            if location is None:
+                return None
+            number, offset, length = location
+            return self.segments[number].view(offset, length)
+
+    def get(self, key):
+        """
+        Return the value of `key` as bytes, None if it is not stored
+        """
+        view = self.getview(key)
+        return None if view is None else bytes(view)
+
+    def __contains__(self, key):
+        return rawkey(key, self.idlength) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def scan(self, start, end):
+        """
+        Yield (raw key, memoryview on the value) for the keys in the ring
+        interval ]start, end], in key order from start: when the interval
+        wraps around zero, keys above start come before keys up to end.
+        start == end is the whole ring.
+        Values are read only when the views are used.
+        """
+        start = int.from_bytes(rawkey(start, self.idlength), "big")
+        end = int.from_bytes(rawkey(end, self.idlength), "big")
+        with self.lock:
+            selected = self.keys.interval(start, end)
+        for keyint in selected:
+            key = keyint.to_bytes(self.keywidth, "big")
+            view = self.getview(key)
+            # deleted since the interval was read
+            if view is not None:
+                yield key, view
+
+    def compact(self):
+        """
+        Rewrite the live records into new segments and remove the old ones
+        Return the number of bytes reclaimed
+        """
+        with self.lock:
+            old = self.segments
+            before = sum(segment.size for segment in old.values())
+            self.segments = {}
+            self.active = self._opensegment(max(old) + 1)
+            index = {}
+            for keyint in self.keys:
+                key = keyint.to_bytes(self.keywidth, "big")
+                number, offset, length = self.index[key]
+                value = old[number].view(offset, length)
+                offset = self._append(key, 0, value.tobytes())
+                index[key] = (self.active.number, offset, length)
+            self.active.flush(True)
+            self.index = index
+            self.garbage = 0
+            for segment in old.values():
+                segment.close()
+                os.remove(segment.path)
+            return before - sum(segment.size for segment in self.segments.values())
+
+    def flush(self):
+        with self.lock:
+            self.active.flush(self.sync)
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.active.flush(True)
+            for segment in self.segments.values():
+                segment.close()
+            self.closed = True
@@ -1,5 +1,10 @@
+import bootstrap
 import chord
 import random
+import shutil
+import simulator
+import socket
+import tempfile
 import time
 
 def get_sha256(strtohash):
@@ -7,7 +12,29 @@ def get_sha256(strtohash):
     """
     return hashlib.sha256(strtohash).encode("utf-8").hexdigest()
 
-def createlocalnodes(nb, *args, printports=True, setfingers=False, setpredecessor=False, stabilizer=True):
+def randomport(nb=1):
+    """
+    Return a random port below the usual ephemeral range (32768-60999)
+    so it can't be held by the local end of a client connection
+    The `nb` ports from it are free when it is returned
+    """
+    while True:
+        port = random.randint(1025, 32000 - nb)
+        if all(isfree(port + i) for i in range(nb)):
+            return port
+
+def isfree(port):
+    sock = socket.socket()
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", port))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def createlocalnodes(nb, *args, printports=True, setfingers=False, setpredecessor=False, stabilizer=True, endpoint=None, transport=None):
     """
     Return a list of LocalNode instantiated
     Their ip are 127.0.0.1 and their ports are either provided as args,
@@ -16,6 +43,9 @@ def createlocalnodes(nb, *args, printports=True, setfingers=False, setpredecesso
     @param nb: number of node to generate
     @param port1,port2,... ports of generated nodes
     @param printports: If it print ports of nodes. Default True
+    @param endpoint: shared ChordEndpointxmlrpc serving all the nodes.
+        By default each node has its own xmlrpc server
+    @param transport: transport used by the nodes. Default is xmlrpc
     """
     if not isinstance(nb, int) or nb < 1:
         raise ValueError
@@ -24,7 +54,7 @@ def createlocalnodes(nb, *args, printports=True, setfingers=False, setpredecesso
     ports = []
     if len(args) == 0:
         for i in range(0, nb):
-            ports.append(random.randint(1025, 60000))
+            ports.append(randomport())
     else:
         for port in args:
             ports.append(port)
@@ -45,7 +75,7 @@ def createlocalnodes(nb, *args, printports=True, setfingers=False, setpredecesso
 
     nodelist = []
     for i in range(0, nb):
-        nodelist.append(chord.LocalNode("127.0.0.1", ports[i], _stabilizer=stabilizer))
+        nodelist.append(chord.LocalNode("127.0.0.1", ports[i], _stabilizer=stabilizer, endpoint=endpoint, transport=transport))
 
     if printports:
         output = ", ".join([str(x.port) for x in nodelist])
@@ -129,3 +159,45 @@ def stoplocalnodes(nodes):
     time.sleep(1)
     for node in nodes:
         node.stopXmlRPCServer()
+
+def storenode(testcase, port, transport="binrpc"):
+    """
+    Return a LocalNode without stabilizer storing its keys in its own
+    temporary datadir. The node is stopped and its datadir removed at the
+    cleanup of `testcase`
+    """
+    directory = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, directory)
+    node = chord.LocalNode("127.0.0.1", port, _stabilizer=False,
+            transport=transport, datadir=directory)
+    testcase.addCleanup(node.stop)
+    return node
+
+def storering(testcase, nb, transport="binrpc"):
+    """
+    Return a ring of `nb` nodes made by storenode(), bootstrapped and
+    sorted by uid
+    """
+    port = randomport(nb)
+    nodes = [storenode(testcase, port + i, transport) for i in range(nb)]
+    testcase.assertEqual(bootstrap.bootstrap(nodes), {})
+    nodes.sort(key=lambda node: node.uid.toint())
+    return nodes
+
+def simring(testcase, seed, nb=32, **kwargs):
+    """
+    Return a Simulator seeded with `seed` and a converged ring of `nb` of
+    its nodes, created with `kwargs`. Every finger is then looked up, so
+    the routing is exact and not only good enough for lookups
+
+    @param testcase: fails if the ring doesn't converge
+    """
+    sim = simulator.Simulator(seed=seed)
+    nodes = [sim.addnode(port=1000 + i, **kwargs) for i in range(nb)]
+    for node in nodes[1:]:
+        sim.join(node, nodes[0])
+    testcase.assertIsNotNone(sim.runtillconverged(maxtime=3000))
+    for node in nodes:
+        for finger in node.fingers:
+            finger.setRespNode(sim.execute(node, node.find_successor, finger.key))
+    return sim, nodes
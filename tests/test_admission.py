@@ -0,0 +1,165 @@
+import bisect
+import random
+import threading
+import time
+import unittest
+import admission
+import chord
+import rpcapi
+import tests.commons
+
+
+class HoldingNode(chord.LocalNode):
+    rpcmethods = rpcapi.METHODS | {"hold"}
+
+    def hold(self, secs):
+        time.sleep(secs)
+        return True
+
+
+class TestAdmission(unittest.TestCase):
+    def test_limit(self):
+        control = admission.Admission(1)
+        started = threading.Event()
+
+        def hold():
+            started.set()
+            time.sleep(0.3)
+            return {"uid": "a"}
+
+        results = []
+        holder = threading.Thread(target=lambda: results.append(control.call(hold)))
+        holder.start()
+        started.wait()
+        with self.assertRaises(admission.Busy):
+            control.call(dict)
+        holder.join()
+        self.assertEqual(control.rejected, 1)
+        self.assertEqual(control.inflight, 0)
+        # the load counts the request answered
+        self.assertEqual(results, [{"uid": "a", "srvload": 1.0}])
+
+    def test_no_limit(self):
+        control = admission.Admission()
+        self.assertEqual(control.call(dict), {})
+        self.assertEqual(control.load(), 0.0)
+
+    def test_loadtable(self):
+        clock = [0.0]
+        table = admission.LoadTable(ttl=1.0, clock=lambda: clock[0])
+        table.add("a", 0.5)
+        table.setbusy("b")
+        # the last request a node has room for is answered
+        table.add("c", 1.0)
+        self.assertEqual(table.get("a"), 0.5)
+        self.assertFalse(table.overloaded("a"))
+        self.assertFalse(table.overloaded("c"))
+        self.assertTrue(table.overloaded("b"))
+        clock[0] = 2.0
+        self.assertIsNone(table.get("a"))
+        self.assertFalse(table.overloaded("b"))
+
+
+class TestBusyRejection(unittest.TestCase):
+    def assertBusy(self, transport):
+        node = HoldingNode("127.0.0.1", tests.commons.randomport(),
+                _stabilizer=False, transport=transport, maxinflight=1)
+        caller = chord.LocalNode("127.0.0.1", tests.commons.randomport(),
+                _stabilizer=False, transport=transport, loadaware=True)
+        try:
+            interface = caller.getNodeInterface(node.asdict())
+            # an idle node answering its only slot is not overloaded
+            self.assertEqual(interface.methodProxy.getsuccessor()["srvload"], 1.0)
+            self.assertFalse(caller.loads.overloaded(node.uid.value))
+            holder = threading.Thread(target=interface.methodProxy.hold, args=(0.5,))
+            holder.start()
+            time.sleep(0.2)
+            with self.assertRaises(Exception) as context:
+                caller.getNodeInterface(node.asdict()).methodProxy.getsuccessor()
+            holder.join()
+            self.assertTrue(admission.isbusy(context.exception))
+            self.assertTrue(caller.loads.overloaded(node.uid.value))
+            self.assertEqual(node.admission.rejected, 1)
+        finally:
+            node.stop()
+            caller.stop()
+
+    def test_xmlrpc(self):
+        self.assertBusy("xmlrpc")
+
+    def test_binrpc(self):
+        self.assertBusy("binrpc")
+
+
+class TestLoadAwareRouting(unittest.TestCase):
+    def setUp(self):
+        # a detour needs exact fingers to go past the busy node
+        self.sim, self.nodes = tests.commons.simring(self, 4, maxinflight=4, loadaware=True)
+        self.uids = sorted(int(n.uid.value, 16) for n in self.nodes)
+        # saturate a node
+        self.busy = self.nodes[7]
+        self.busy.admission.inflight = self.busy.admission.limit
+
+    def lookups(self, origin=None):
+        """
+        Lookup keys which busy doesn't precede, return the number of failures
+
+        @param origin: node doing the lookups, a random one by default
+        """
+        busyint = int(self.busy.uid.value, 16)
+        succint = self.uids[(self.uids.index(busyint) + 1) % len(self.uids)]
+        rng = random.Random(6)
+        failures = 0
+        for i in range(100):
+            keyint = rng.getrandbits(256)
+            if chord.Key.fromint(keyint).is_between_r_inclu(busyint, succint):
+                continue
+            node = origin or rng.choice([n for n in self.nodes if n is not self.busy])
+            try:
+                res, _, _ = self.sim.lookup(node, chord.Key.fromint(keyint).value)
+            except admission.Busy:
+                failures += 1
+                continue
+            owner = self.uids[bisect.bisect_left(self.uids, keyint) % len(self.uids)]
+            self.assertEqual(int(res["uid"], 16), owner)
+        return failures
+
+    def test_route_around_busy_node(self):
+        self.assertEqual(self.lookups(), 0)
+        self.assertGreater(self.busy.admission.rejected, 0)
+
+    def test_prefer_less_loaded_finger(self):
+        origin = self.nodes[0]
+        keyvalue = origin.fingers[-1].key.value
+        closest = origin.closest_preceding_finger(keyvalue)
+        origin.loads.add(closest["uid"], 0.9)
+        alternative = origin.closest_preceding_finger(keyvalue)
+        self.assertNotEqual(alternative["uid"], closest["uid"])
+        self.assertTrue(chord.Key(alternative["uid"]).is_between_exclu(origin.uid, closest["uid"]))
+        # not if the alternative is loaded as well
+        origin.loads.add(alternative["uid"], 0.95)
+        self.assertEqual(origin.closest_preceding_finger(keyvalue)["uid"], closest["uid"])
+
+    def test_avoid_reported_load(self):
+        # busy answers, but reports a high load
+        self.busy.admission.inflight = self.busy.admission.limit - 2
+        calls = []
+        call = self.busy.admission.call
+        self.busy.admission.call = lambda *args: calls.append(args[0].__name__) or call(*args)
+        origin = self.nodes[0]
+        origin.loads.ttl = 3600
+        origin.loadaware = False
+        self.assertEqual(self.lookups(origin), 0)
+        unaware = len(calls)
+        origin.loadaware = True
+        self.assertEqual(self.lookups(origin), 0)
+        self.assertGreaterEqual(origin.loads.get(self.busy.uid.value), admission.HIGHLOAD)
+        # the load reported, the lookups go through other fingers
+        del calls[:]
+        self.assertEqual(self.lookups(origin), 0)
+        self.assertLess(len(calls) * 2, unaware)
+
+    def test_not_load_aware(self):
+        for node in self.nodes:
+            node.loadaware = False
+        self.assertGreater(self.lookups(), 0)
@@ -0,0 +1,206 @@
+import socket
+import threading
+import time
+import unittest
+import xmlrpc.client
+import clientbinrpc
+import key
+import serverbinrpc
+import wire
+import tests.commons
+
+class TestWireEncoding(unittest.TestCase):
+    def setUp(self):
+        self.node = {
+                "ip": "127.0.0.1",
+                "port": 5000,
+                "uid": "a" * 64,
+                "succ": {"ip": "localhost", "port": 5001, "uid": "b" * 64, "rpcport": 6000}
+        }
+
+    def test_roundtrip(self):
+        values = [None, True, False, 0, -1, 2**200, 1.5, "abc", b"\x00\x01",
+                [1, "a", [None]], {"a": 1, "b": {"c": [2]}}, self.node]
+        for value in values:
+            self.assertEqual(wire.decode(wire.encode(value)), value)
+
+    def test_key(self):
+        res = wire.decode(wire.encode(key.Key("c" * 64)))
+        self.assertIsInstance(res, key.Key)
+        self.assertEqual(res.value, "c" * 64)
+
+    def test_packed_node(self):
+        data = wire.encode(self.node)
+        self.assertEqual(data[:1], wire.NODE)
+        self.assertIn(bytes.fromhex("a" * 64), data)
+        self.assertLess(len(data), len(xmlrpc.client.dumps((self.node,))) // 4)
+
+    def test_packed_noderef(self):
+        for ref in (["a" * 64, "127.0.0.1", 5000], ["a" * 64, "localhost", 5000, 6000]):
+            data = wire.encode(ref)
+            self.assertEqual(data[:1], wire.NODEREF)
+            self.assertEqual(wire.decode(data), ref)
+        self.assertEqual(wire.encode(["a" * 64, "127.0.0.1", "5000"])[:1], wire.LIST)
+
+    def test_not_a_node(self):
+        value = {"ip": "127.0.0.1", "port": 5000, "uid": "short"}
+        self.assertEqual(wire.encode(value)[:1], wire.DICT)
+        self.assertEqual(wire.decode(wire.encode(value)), value)
+
+    def test_not_hex(self):
+        for value in (["zzzzzzzz", "a", 1], {"ip": "a", "port": 1, "uid": "z" * 64}):
+            self.assertEqual(wire.decode(wire.encode(value)), value)
+
+    def test_exact_roundtrip(self):
+        # uppercase uids are not packed, shorthand addresses not as ipv4:
+        # they would come back as another str
+        ref = ["A" * 64, "127.0.0.1", 5000]
+        self.assertEqual(wire.encode(ref)[:1], wire.LIST)
+        self.assertEqual(wire.decode(wire.encode(ref)), ref)
+        ref = ["a" * 64, "127.1", 5000]
+        self.assertIn(b"127.1", wire.encode(ref))
+        self.assertEqual(wire.decode(wire.encode(ref)), ref)
+
+    def test_malformed(self):
+        self.assertRaises(wire.WireError, wire.decode, wire.encode("abc")[:-1])
+        self.assertRaises(wire.WireError, wire.decode, b"?")
+
+    def test_max_frame(self):
+        ours, theirs = socket.socketpair()
+        try:
+            # a http client talking to a binrpc server
+            theirs.sendall(b"POST / HTTP/1.1\r\n")
+            self.assertRaises(wire.WireError, wire.recvframe, ours)
+        finally:
+            ours.close()
+            theirs.close()
+
+class TestBinRPCRing(unittest.TestCase):
+    def setUp(self):
+        self.nodes = tests.commons.createlocalnodes(
+                3,
+                stabilizer=False,
+                transport="binrpc"
+        )
+
+    def tearDown(self):
+        tests.commons.stoplocalnodes(self.nodes)
+
+    def test_proxy(self):
+        interface = self.nodes[0].getNodeInterface(self.nodes[1].asdict())
+        self.assertIsInstance(interface.methodProxy, clientbinrpc.ChordClientbinrpcProxy)
+        self.assertEqual(interface.methodProxy.getsuccessor()["uid"], self.nodes[1].uid.value)
+        self.assertRaises(wire.Fault, interface.methodProxy._call, "_stabilize_and_fix_fingers", [])
+        self.assertRaises(wire.Fault, interface.methodProxy.unknownmethod)
+        # the node is driven by its own process only
+        self.assertRaises(wire.Fault, interface.methodProxy.stop)
+        self.assertRaises(wire.Fault, interface.methodProxy.settrace, 1.0)
+        self.assertEqual(interface.methodProxy.getsuccessor()["uid"], self.nodes[1].uid.value)
+
+    def test_join(self):
+        self.nodes[1].join(self.nodes[1].getNodeInterface(self.nodes[0].asdict()))
+        self.nodes[2].join(self.nodes[2].getNodeInterface(self.nodes[0].asdict()))
+        ring = sorted(self.nodes, key=lambda n: int(n.uid.value, 16))
+        for k, node in enumerate(ring):
+            self.assertEqual(node.successor.uid, ring[(k + 1) % 3].uid)
+            self.assertEqual(node.predecessor.uid, ring[k - 1].uid)
+            self.assertEqual(
+                    node.find_successor(node.uid + 1)["uid"],
+                    ring[(k + 1) % 3].uid.value
+            )
+
+class SlowNode(object):
+    rpcmethods = {"wait"}
+
+    def __init__(self, port):
+        self.ip = "127.0.0.1"
+        self.port = port
+        self.done = []
+
+    def wait(self, secs, tag):
+        time.sleep(secs)
+        self.done.append(tag)
+        return tag
+
+class TestMuxRPC(unittest.TestCase):
+    def setUp(self):
+        self.node = SlowNode(tests.commons.randomport())
+        self.server = serverbinrpc.ChordServermuxrpc(self.node)
+        self.server.start()
+        self.proxy = clientbinrpc.ChordClientmuxrpcProxy(self.node.ip, self.node.port)
+
+    def tearDown(self):
+        self.proxy.close()
+        self.server.stop()
+
+    def test_out_of_order(self):
+        results = []
+        slow = threading.Thread(target=lambda: results.append(self.proxy.wait(0.5, "slow")))
+        slow.start()
+        time.sleep(0.1)
+        self.assertEqual(self.proxy.wait(0, "fast"), "fast")
+        results.append("fast")
+        slow.join()
+        self.assertEqual(results, ["fast", "slow"])
+        self.assertEqual(self.node.done, ["fast", "slow"])
+
+    def test_many_in_flight(self):
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(self.proxy.wait(0.2, i)))
+                for i in range(10)]
+        start = time.time()
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(sorted(results), list(range(10)))
+
+    def test_fault(self):
+        self.assertRaises(wire.Fault, self.proxy.unknownmethod)
+        self.assertEqual(self.proxy.wait(0, "ok"), "ok")
+
+class UnencodableNode(SlowNode):
+    rpcmethods = {"wait", "unencodable"}
+
+    def unencodable(self):
+        return {1, 2}
+
+class TestBinRPCServer(unittest.TestCase):
+    def test_unencodable_result(self):
+        node = UnencodableNode(tests.commons.randomport())
+        server = serverbinrpc.ChordServerbinrpc(node)
+        server.start()
+        proxy = clientbinrpc.ChordClientbinrpcProxy(node.ip, node.port)
+        try:
+            self.assertRaises(wire.Fault, proxy.unencodable)
+            # the connection is still served
+            self.assertEqual(proxy.wait(0, "ok"), "ok")
+        finally:
+            proxy.close()
+            server.stop()
+
+class TestMuxRPCRing(unittest.TestCase):
+    def setUp(self):
+        self.nodes = tests.commons.createlocalnodes(
+                3,
+                stabilizer=False,
+                transport="muxrpc"
+        )
+
+    def tearDown(self):
+        tests.commons.stoplocalnodes(self.nodes)
+
+    def test_shared_connection(self):
+        a = self.nodes[0].getNodeInterface(self.nodes[1].asdict())
+        b = self.nodes[2].getNodeInterface(self.nodes[1].asdict())
+        self.assertIsInstance(a.methodProxy, clientbinrpc.ChordClientmuxrpcProxy)
+        self.assertIs(a.methodProxy, b.methodProxy)
+
+    def test_join(self):
+        self.nodes[1].join(self.nodes[1].getNodeInterface(self.nodes[0].asdict()))
+        self.nodes[2].join(self.nodes[2].getNodeInterface(self.nodes[0].asdict()))
+        ring = sorted(self.nodes, key=lambda n: int(n.uid.value, 16))
+        for k, node in enumerate(ring):
+            self.assertEqual(node.successor.uid, ring[(k + 1) % 3].uid)
+            self.assertEqual(node.predecessor.uid, ring[k - 1].uid)
@@ -0,0 +1,73 @@
+import bisect
+import random
+import unittest
+import bootstrap
+import chord
+import simulator
+import tests.commons
+
+class TestRoutingTables(unittest.TestCase):
+    def test_fingers(self):
+        members = [chord.BasicNode("10.0.0.{}".format(i), 1000 + i).asdict() for i in range(50)]
+        uids = sorted(int(m["uid"], 16) for m in members)
+        tables = bootstrap.routingtables(members)
+        self.assertEqual([node.uid.toint() for node, _, _ in tables], uids)
+        for k, (node, predecessor, fingers) in enumerate(tables):
+            self.assertEqual(int(predecessor[0], 16), uids[k - 1])
+            self.assertEqual(fingers[0][0], 0)
+            self.assertLessEqual(len(fingers), len(members))
+            expanded = []
+            ends = [i for i, _ in fingers[1:]] + [256]
+            for (start, ref), end in zip(fingers, ends):
+                expanded.extend([int(ref[0], 16)] * (end - start))
+            for i, owner in enumerate(expanded):
+                start = (node.uid.toint() + 2**i) % 2**256
+                self.assertEqual(owner, uids[bisect.bisect_left(uids, start) % len(uids)])
+            self.assertEqual(expanded[0], uids[(k + 1) % len(uids)])
+
+class TestBootstrapXmlRPC(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.nodes = tests.commons.createlocalnodes(10, stabilizer=False, printports=False)
+
+    @classmethod
+    def tearDownClass(self):
+        tests.commons.stoplocalnodes(self.nodes)
+
+    def test_bootstrap(self):
+        failures = bootstrap.bootstrap([node.asdict() for node in self.nodes])
+        self.assertEqual(failures, {})
+        uids = sorted(int(n.uid.value, 16) for n in self.nodes)
+        for node in self.nodes:
+            k = uids.index(node.uid.toint())
+            self.assertEqual(node.successor.uid.toint(), uids[(k + 1) % len(uids)])
+            self.assertEqual(node.predecessor.uid.toint(), uids[k - 1])
+        rng = random.Random(2)
+        for i in range(30):
+            keyint = rng.getrandbits(256)
+            res = rng.choice(self.nodes).find_successor(chord.Key.fromint(keyint).value)
+            self.assertEqual(int(res["uid"], 16), uids[bisect.bisect_left(uids, keyint) % len(uids)])
+
+    def test_unreachable_member(self):
+        members = [node.asdict() for node in self.nodes]
+        members.append(chord.BasicNode("127.0.0.1", tests.commons.randomport()).asdict())
+        failures = bootstrap.bootstrap(members)
+        self.assertEqual(list(failures), [members[-1]["uid"]])
+
+class TestBootstrapSimulator(unittest.TestCase):
+    def test_large_ring(self):
+        sim = simulator.Simulator(seed=3)
+        nodes = [sim.addnode(port=1000 + i) for i in range(500)]
+        # the simulator runs one rpc at a time
+        failures = bootstrap.bootstrap([node.asdict() for node in nodes],
+                transport=sim.transport, workers=1)
+        self.assertEqual(failures, {})
+        self.assertTrue(sim.ringconverged())
+        self.assertEqual(sim.rpccount, 500)
+        uids = sorted(int(n.uid.value, 16) for n in nodes)
+        rng = random.Random(4)
+        for i in range(50):
+            keyint = rng.getrandbits(256)
+            res, rpcs, _ = sim.lookup(rng.choice(nodes), chord.Key.fromint(keyint).value)
+            self.assertEqual(int(res["uid"], 16), uids[bisect.bisect_left(uids, keyint) % len(uids)])
+            self.assertLess(rpcs, 30)
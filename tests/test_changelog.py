@@ -0,0 +1,105 @@
+import unittest
+import bootstrap
+import changelog
+import chord
+import tests.commons
+
+
+class TestChangeLog(unittest.TestCase):
+    def setUp(self):
+        port = tests.commons.randomport(4)
+        self.nodes = []
+        for i in range(4):
+            self.nodes.append(chord.LocalNode("127.0.0.1", port + i,
+                    _stabilizer=False, transport="binrpc", changelog=8))
+            self.addCleanup(self.nodes[-1].stop)
+        self.assertEqual(bootstrap.bootstrap(self.nodes), {})
+        self.nodes.sort(key=lambda node: node.uid.toint())
+        self.node = self.nodes[0]
+
+    def assertInSync(self, subscriber):
+        routing = self.node.routing
+        self.assertEqual(subscriber.seq, routing.version)
+        self.assertEqual(subscriber.predecessor, routing.predecessor.asref())
+        self.assertEqual(subscriber.fingers, [n.asref() for n in routing.fingers])
+
+    def test_changes(self):
+        version = self.node.routing.version
+        before = [n.asref() for n in self.node.routing.fingers]
+        self.node.setsuccessor(self.nodes[2].asdict())
+        # a finger set to the node it was on is not a change
+        self.node.fingers[1].setRespNode(self.node.fingers[1].respNode)
+        self.node.install_routing(self.nodes[1].asref(),
+                [[0, self.nodes[1].asref()], [10, self.nodes[2].asref()]])
+        res = self.node.getchanges(version)
+        self.assertEqual(res["seq"], version + 3)
+        self.assertEqual([c["seq"] for c in res["changes"]], [version + 1, version + 3])
+        self.assertEqual(res["changes"][0], {"seq": version + 1,
+                "fingers": [[0, 0, self.nodes[2].asref()]]})
+        self.assertEqual(res["changes"][1]["predecessor"], self.nodes[1].asref())
+        for first, last, ref in res["changes"][1]["fingers"]:
+            before[first:last + 1] = [ref] * (last + 1 - first)
+        self.assertEqual(before, [n.asref() for n in self.node.routing.fingers])
+        self.assertEqual(self.node.getchanges(res["seq"], self.node.epoch),
+                {"seq": res["seq"], "epoch": self.node.epoch, "changes": []})
+
+    def test_subscriber(self):
+        subscriber = changelog.Subscriber(self.nodes[0].asdict(), "binrpc")
+        self.assertEqual(subscriber.poll(), [])
+        self.assertInSync(subscriber)
+        self.node.setpredecessor(self.nodes[2].asdict())
+        self.node.fingers[200].setRespNode(self.nodes[3].asdict())
+        self.assertEqual(len(subscriber.poll()), 2)
+        self.assertInSync(subscriber)
+
+    def test_reset(self):
+        subscriber = changelog.Subscriber(self.nodes[0].asdict(), "binrpc")
+        subscriber.poll()
+        # more changes than the log keeps
+        for i in range(10):
+            self.node.setsuccessor(self.nodes[1 + i % 2].asdict())
+        res = self.node.getchanges(subscriber.seq)
+        self.assertTrue(res["reset"])
+        self.assertEqual(subscriber.poll(), [])
+        self.assertInSync(subscriber)
+
+    def test_restart(self):
+        subscriber = changelog.Subscriber(self.node.asdict(), "binrpc")
+        for i in range(4):
+            self.node.setsuccessor(self.nodes[1 + i % 2].asdict())
+        subscriber.poll()
+        self.node.stop()
+        # same address, its versions start again from 0
+        self.node = chord.LocalNode(self.node.ip, self.node.port,
+                _stabilizer=False, transport="binrpc")
+        self.addCleanup(self.node.stop)
+        self.node.setpredecessor(self.nodes[3].asdict())
+        self.node.setsuccessor(self.nodes[3].asdict())
+        self.assertLess(self.node.routing.version, subscriber.seq)
+        self.assertTrue(self.node.getchanges(subscriber.seq)["reset"])
+        self.assertEqual(subscriber.poll(), [])
+        self.assertInSync(subscriber)
+
+    def test_restart_ahead(self):
+        subscriber = changelog.Subscriber(self.node.asdict(), "binrpc")
+        subscriber.poll()
+        self.node.stop()
+        self.node = chord.LocalNode(self.node.ip, self.node.port,
+                _stabilizer=False, transport="binrpc")
+        self.addCleanup(self.node.stop)
+        # the versions of the new process pass the seq of the subscriber
+        for i in range(subscriber.seq + 2):
+            self.node.setsuccessor(self.nodes[1 + i % 2].asdict())
+        self.node.setpredecessor(self.nodes[3].asdict())
+        self.assertGreater(self.node.routing.version, subscriber.seq)
+        self.assertTrue(self.node.getchanges(subscriber.seq, subscriber.epoch)["reset"])
+        self.assertEqual(subscriber.poll(), [])
+        self.assertInSync(subscriber)
+        self.assertEqual(subscriber.epoch, self.node.epoch)
+
+    def test_disabled(self):
+        node = chord.LocalNode("127.0.0.1", tests.commons.randomport(),
+                _stabilizer=False, transport="binrpc", changelog=0)
+        self.addCleanup(node.stop)
+        self.assertIsNone(node.changes)
+        self.assertTrue(node.getchanges(node.routing.version)["reset"])
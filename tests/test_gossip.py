@@ -0,0 +1,163 @@
+import bisect
+import unittest
+import bootstrap
+import chord
+import gossip
+import simulator
+import snapshot
+import tests.commons
+from key import Key
+
+
+class TestMembershipView(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.refs = [chord.BasicNode("10.0.0.1", 1000 + i).asref() for i in range(4)]
+        self.view = gossip.MembershipView(self.refs[0], ttl=30, clock=lambda: self.now)
+
+    def test_heard(self):
+        self.assertFalse(self.view.heard(self.refs[0]))
+        self.assertTrue(self.view.heard(self.refs[1]))
+        self.assertFalse(self.view.heard(self.refs[1]))
+        # news older than ttl are ignored
+        self.assertFalse(self.view.heard(self.refs[2], age=40))
+        self.assertEqual(self.view.merge([[self.refs[2], 10], [self.refs[1], 0]]),
+                [self.refs[2]])
+        self.assertEqual(len(self.view), 3)
+        uid = Key(self.refs[2][0]).toint()
+        self.assertEqual(self.view.successor(uid), uid)
+        self.assertEqual(self.view.successor(uid + 1),
+                min([Key(ref[0]).toint() for ref in self.refs[:3]
+                    if Key(ref[0]).toint() > uid] or
+                    [Key(ref[0]).toint() for ref in self.refs[:3]]))
+
+    def test_expire(self):
+        self.view.heard(self.refs[1])
+        self.view.heard(self.refs[2], age=20)
+        self.now += 15
+        # fresher news of a member make it live longer
+        self.view.heard(self.refs[2], age=5)
+        self.now += 20
+        self.view.expire()
+        self.assertEqual(self.view.refs(), [self.refs[2]])
+        self.now += 20
+        self.view.expire()
+        self.assertEqual(self.view.refs(), [])
+        self.assertEqual(len(self.view), 1)
+
+    def test_evict(self):
+        self.view.heard(self.refs[1])
+        self.view.evict(Key(self.refs[1][0]).toint())
+        self.assertEqual(self.view.refs(), [])
+        self.assertTrue(self.view.hasfailed(Key(self.refs[1][0]).toint()))
+        # news from before the failure don't bring it back
+        self.assertEqual(self.view.merge([[self.refs[1], 0]]), [])
+        self.now += 10
+        self.assertEqual(self.view.merge([[self.refs[1], 20]]), [])
+        # it was heard of since
+        self.assertEqual(self.view.merge([[self.refs[1], 5]]), [self.refs[1]])
+        self.assertFalse(self.view.hasfailed(Key(self.refs[1][0]).toint()))
+        self.assertEqual(self.view.get(Key(self.refs[1][0]).toint()), self.refs[1])
+
+    def test_sample(self):
+        self.assertEqual(self.view.sample(3), [[self.refs[0], 0.0]])
+        for ref in self.refs[1:]:
+            self.view.heard(ref, age=2)
+        sample = self.view.sample(3)
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(sample[0], [self.refs[0], 0.0])
+        for ref, age in sample[1:]:
+            self.assertIn(ref, self.refs[1:])
+            self.assertEqual(age, 2)
+
+
+class TestGossipRing(unittest.TestCase):
+    def test_notify_exchange(self):
+        port = tests.commons.randomport(3)
+        nodes = []
+        for i, size in enumerate((4, 4, 0)):
+            nodes.append(chord.LocalNode("127.0.0.1", port + i,
+                    _stabilizer=False, transport="binrpc", gossip=size))
+            self.addCleanup(nodes[-1].stop)
+        first, second, plain = nodes
+        proxy = first.getNodeInterface(second.asdict()).methodProxy
+        sample = proxy.notify_new_predecessor(first.asdict(), first.membership.sample(4))
+        # second gossips itself and first, heard just now
+        self.assertEqual(sample[0], [second.asref(), 0.0])
+        self.assertEqual([ref for ref, age in sample[1:]], [first.asref()])
+        self.assertEqual(second.membership.refs(), [first.asref()])
+        # a node which doesn't gossip answers nothing
+        proxy = first.getNodeInterface(plain.asdict()).methodProxy
+        self.assertIsNone(proxy.notify_new_predecessor(first.asdict(), []))
+        self.assertIsNone(proxy.exchangemembers(first.asref(), []))
+        # a member which is not the successor exchanges without notify
+        proxy = plain.getNodeInterface(second.asdict()).methodProxy
+        sample = proxy.exchangemembers(plain.asref(), [[plain.asref(), 0.0]])
+        self.assertEqual(sample[0], [second.asref(), 0.0])
+        self.assertIn(plain.asref(), second.membership.refs())
+        self.assertEqual(second.predecessor.uid, first.uid)
+
+    def test_stabilize_fills_fingers(self):
+        port = tests.commons.randomport(8)
+        nodes = []
+        for i in range(8):
+            nodes.append(chord.LocalNode("127.0.0.1", port + i,
+                    _stabilizer=False, transport="binrpc", gossip=8))
+            self.addCleanup(nodes[-1].stop)
+        # successors and predecessors only, the fingers are on self
+        ring = sorted(nodes, key=lambda node: node.uid.toint())
+        for k, node in enumerate(ring):
+            node.install_routing(ring[k - 1].asref(),
+                    [[0, ring[(k + 1) % len(ring)].asref()], [1, node.asref()]])
+        for _ in range(4):
+            for node in ring:
+                node.stabilize()
+        for node, predecessor, fingers in bootstrap.routingtables(nodes):
+            self.assertEqual(snapshot.compactrouting(node.routing), fingers)
+
+
+class TestGossipSimulator(unittest.TestCase):
+    def ring(self, size):
+        sim = simulator.Simulator(latency=0.01, seed=1)
+        nodes = [sim.addnode(port=1000 + i, gossip=size) for i in range(30)]
+        for node in nodes[1:]:
+            sim.join(node, nodes[0])
+        return sim, nodes
+
+    def wrongfingers(self, nodes):
+        uids = sorted(node.uid.toint() for node in nodes)
+        wrong = 0
+        for node in nodes:
+            for finger in node.fingers:
+                i = bisect.bisect_left(uids, finger.start)
+                if finger.respNode.uid.toint() != uids[i % len(uids)]:
+                    wrong += 1
+        return wrong
+
+    def test_convergence(self):
+        sim, nodes = self.ring(0)
+        gossipsim, gossipnodes = self.ring(4)
+        sim.run(30)
+        gossipsim.run(30)
+        self.assertLess(self.wrongfingers(gossipnodes) * 100, self.wrongfingers(nodes))
+        sim.run(90)
+        gossipsim.run(90)
+        self.assertEqual(self.wrongfingers(gossipnodes), 0)
+        self.assertGreater(self.wrongfingers(nodes), 0)
+
+    def test_failed_member(self):
+        sim, nodes = self.ring(4)
+        sim.run(120)
+        failed = nodes.pop(5)
+        sim.removenode(failed)
+        sim.run(120)
+        # evicted from the views, before their ttl, and the fingers avoid it
+        for node in nodes:
+            self.assertNotIn(failed.uid.toint(), node.membership)
+            for finger in node.fingers:
+                self.assertNotEqual(finger.respNode.uid, failed.uid)
+        self.assertEqual(self.wrongfingers(nodes), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import bisect
+import hashlib
+import random
+import unittest
+import bootstrap
+import chord
+import key
+import ringclient
+import simulator
+import tests.commons
+import wire
+
+
+class TestKeyIdLength(unittest.TestCase):
+    def test_uid(self):
+        digest = hashlib.sha256(b"127.0.0.1:6000").hexdigest()
+        for idlength in key.IDLENGTHS:
+            uid = key.Uid("127.0.0.1:6000", idlength)
+            self.assertEqual(uid.value, digest[:idlength // 4])
+            self.assertEqual(uid.idlength, idlength)
+            self.assertEqual(key.Key(uid.value).idlength, idlength)
+        self.assertRaises(ValueError, key.Uid, "127.0.0.1:6000", 48)
+        self.assertRaises(ValueError, key.Key, "0" * 10)
+
+    def test_arithmetic(self):
+        k = key.Key("fffffff0")
+        self.assertEqual(k.sumint(0x20), "00000010")
+        self.assertEqual(k.subint(2**32), "fffffff0")
+        self.assertEqual(k.canonicalize(1), "00000001")
+        self.assertEqual(key.Key.fromint(1, 64).value, "0" * 15 + "1")
+        self.assertTrue(key.Key("00000010").is_between_r_inclu(k, "00000010"))
+
+    def test_wire(self):
+        for idlength in (64, 256):
+            node = chord.BasicNode("127.0.0.1", 6000, idlength=idlength)
+            values = [node.asref(), node.asdict(), node.uid]
+            decoded = wire.decode(wire.encode(values))
+            self.assertEqual(decoded[:2], values[:2])
+            self.assertEqual(decoded[2].value, node.uid.value)
+        # the default 256 bits uids don't pay for their length
+        node = chord.BasicNode("127.0.0.1", 6000)
+        self.assertEqual(len(wire.encode(node.asref())), 1 + 1 + 32 + 4 + 2)
+
+
+class TestRingIdLength(unittest.TestCase):
+    def setUp(self):
+        port = tests.commons.randomport(6)
+        self.nodes = []
+        for i in range(6):
+            self.nodes.append(chord.LocalNode("127.0.0.1", port + i, _stabilizer=False,
+                    transport="binrpc", idlength=32))
+            self.addCleanup(self.nodes[-1].stop)
+        self.assertEqual(bootstrap.bootstrap(self.nodes, "binrpc"), {})
+        self.uids = sorted(node.uid.toint() for node in self.nodes)
+
+    def test_lookup(self):
+        rng = random.Random(1)
+        for node in self.nodes:
+            self.assertEqual(len(node.fingers), 32)
+            self.assertEqual(len(node.routing.fingers), 32)
+            self.assertEqual(len(node.calcfinger(31)), 8)
+        for i in range(50):
+            keyvalue = key.Key.fromint(rng.getrandbits(32), 32).value
+            res = rng.choice(self.nodes).find_successor(keyvalue)
+            owner = self.uids[bisect.bisect_left(self.uids, int(keyvalue, 16)) % len(self.uids)]
+            self.assertEqual(int(res["uid"], 16), owner)
+
+    def test_ringclient(self):
+        client = ringclient.RingClient(self.nodes[0].asref(), "binrpc")
+        self.assertEqual(client.idlength, 32)
+        owner = client.owner(5)
+        self.assertEqual(key.Key(owner[0]).toint(),
+                self.uids[bisect.bisect_left(self.uids, 5) % len(self.uids)])
+
+
+class TestSimulatorIdLength(unittest.TestCase):
+    def test_convergence(self):
+        sim = simulator.Simulator(latency=0.01, seed=1)
+        nodes = [sim.addnode(port=1000 + i, idlength=64) for i in range(20)]
+        for node in nodes[1:]:
+            sim.join(node, nodes[0])
+        self.assertIsNotNone(sim.runtillconverged(maxtime=600))
+        rng = random.Random(2)
+        uids = sorted(node.uid.toint() for node in nodes)
+        for i in range(20):
+            keyvalue = nodes[0].uid.canonicalize(rng.getrandbits(64))
+            res, rpcs, elapsed = sim.lookup(rng.choice(nodes), keyvalue)
+            self.assertEqual(int(res["uid"], 16),
+                    uids[bisect.bisect_left(uids, int(keyvalue, 16)) % len(uids)])
+
+
+if __name__ == "__main__":
+    unittest.main()
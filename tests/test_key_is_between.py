@@ -71,3 +71,45 @@ class KeyIsBetweenTest(unittest.TestCase):
             "0" * 64
             )
         )
+
+class KeyIsBetweenOperandsTest(unittest.TestCase):
+    """
+    Limits can be given as Key, str or int, with the same results
+    """
+
+    @classmethod
+    def setUpClass(self):
+        self.keys = [key.Key(c * 64) for c in "01ae"]
+
+    def forms(self, k):
+        return (k, k.value, int(k.value, 16))
+
+    def test_same_results(self):
+        predicates = ("isbetween", "is_between_r_inclu", "is_between_l_inclu",
+                "is_between_inclu", "is_between_exclu", "_is_inside")
+        for k in self.keys:
+            for limit1 in self.keys:
+                for limit2 in self.keys:
+                    for name in predicates:
+                        results = set()
+                        for form1 in self.forms(limit1):
+                            for form2 in self.forms(limit2):
+                                try:
+                                    results.add(getattr(k, name)(form1, form2))
+                                except Exception as e:
+                                    results.add(type(e))
+                        self.assertEqual(len(results), 1, (name, k, limit1, limit2, results))
+
+    def test_set_value(self):
+        k = key.Key("1" * 64)
+        k.setValue("f" * 64)
+        self.assertTrue(k.is_between_r_inclu(self.keys[0], "f" * 64))
+        self.assertEqual(k + 1, "0" * 64)
+
+    def test_xmlrpc_marshal(self):
+        """
+        A Key sent by xmlrpc is marshalled as its value and idlength only
+        """
+        import xmlrpc.client
+        params, _ = xmlrpc.client.loads(xmlrpc.client.dumps((self.keys[2],)))
+        self.assertEqual(params[0], {"idlength": 256, "value": "a" * 64})
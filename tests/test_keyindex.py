@@ -0,0 +1,93 @@
+import random
+import unittest
+import chord
+import keyindex
+
+
+class TestKeyIndex(unittest.TestCase):
+    load = 1000
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.keys = sorted(set(rng.getrandbits(16) for i in range(500)))
+        self.index = keyindex.KeyIndex(reversed(self.keys), load=self.load)
+
+    def expected(self, start, end):
+        if start < end:
+            return [k for k in self.keys if start < k <= end]
+        return [k for k in self.keys if k > start] + [k for k in self.keys if k <= end]
+
+    def test_add_discard(self):
+        index = keyindex.KeyIndex(load=self.load)
+        self.assertTrue(index.add(5))
+        self.assertFalse(index.add(5))
+        self.assertTrue(index.add(2))
+        self.assertEqual(list(index), [2, 5])
+        self.assertIn(5, index)
+        self.assertTrue(index.discard(5))
+        self.assertFalse(index.discard(5))
+        self.assertNotIn(5, index)
+        self.assertEqual(len(index), 1)
+
+    def test_successor(self):
+        self.assertEqual(self.index.successor(self.keys[3]), self.keys[3])
+        self.assertEqual(self.index.successor(self.keys[3] + 1), self.keys[4])
+        self.assertEqual(self.index.successor(self.keys[-1] + 1), self.keys[0])
+        self.assertIsNone(keyindex.KeyIndex(load=self.load).successor(1))
+
+    def test_interval(self):
+        rng = random.Random(2)
+        bounds = [(self.keys[10], self.keys[100]), (self.keys[400], self.keys[20]),
+                (self.keys[30], self.keys[30]), (0, 2 ** 16 - 1)]
+        bounds += [(rng.getrandbits(16), rng.getrandbits(16)) for i in range(50)]
+        for start, end in bounds:
+            self.assertEqual(self.index.interval(start, end), self.expected(start, end))
+            self.assertEqual(self.index.count(start, end), len(self.expected(start, end)))
+
+    def test_interval_limit(self):
+        start, end = self.keys[480], self.keys[40]
+        expected = self.expected(start, end)
+        for limit in (0, 5, 19, 30, 100):
+            self.assertEqual(self.index.interval(start, end, limit), expected[:limit])
+
+    def test_interval_matches_key(self):
+        start, end = self.keys[450], self.keys[40]
+        for k in self.index.interval(start, end):
+            self.assertTrue(chord.Key.fromint(k, 16).is_between_r_inclu(start, end))
+
+    def test_split(self):
+        for start, end in [(self.keys[10], self.keys[100]), (self.keys[400], self.keys[20])]:
+            index = keyindex.KeyIndex(self.keys, load=self.load)
+            moved = index.split(start, end)
+            self.assertEqual(list(moved), sorted(self.expected(start, end)))
+            self.assertEqual(sorted(list(moved) + list(index)), self.keys)
+            self.assertEqual(index.count(start, end), 0)
+            self.assertEqual(len(index) + len(moved), len(self.keys))
+            self.assertEqual(index.interval(end, start), self.expected(end, start))
+
+    def test_updates(self):
+        rng = random.Random(3)
+        index = keyindex.KeyIndex(load=self.load)
+        keys = set()
+        for i in range(3000):
+            key = rng.getrandbits(12)
+            if rng.random() < 0.6:
+                self.assertEqual(index.add(key), key not in keys)
+                keys.add(key)
+            else:
+                self.assertEqual(index.discard(key), key in keys)
+                keys.discard(key)
+        self.assertEqual(list(index), sorted(keys))
+        self.assertEqual(len(index), len(keys))
+        for key in range(0, 2 ** 12, 7):
+            self.assertEqual(key in index, key in keys)
+        self.assertEqual(index.count(100, 3000), len([k for k in keys if 100 < k <= 3000]))
+        # chunks stay bounded
+        self.assertLessEqual(max(len(chunk) for chunk in index.chunks), 2 * self.load)
+
+
+class TestKeyIndexSmallChunks(TestKeyIndex):
+    """
+    The same with many chunks: intervals span and remove several of them
+    """
+    load = 4
@@ -0,0 +1,97 @@
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+import chord
+import launcher
+import ringwalk
+import transport
+import tests.commons
+
+
+class TestUnixRPCTransport(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.transport = transport.UnixRPCTransport(self.dir)
+        port = tests.commons.randomport(2)
+        self.nodes = [chord.LocalNode("127.0.0.1", port + i, _stabilizer=False,
+                transport=self.transport) for i in range(2)]
+
+    def tearDown(self):
+        for node in self.nodes:
+            node.stop()
+        shutil.rmtree(self.dir)
+
+    def test_unix_socket(self):
+        interface = self.nodes[0].getNodeInterface(self.nodes[1].asdict())
+        self.assertEqual(interface.methodProxy.getsuccessor()["uid"], self.nodes[1].uid.value)
+        self.assertEqual(interface.methodProxy._sock.family, socket.AF_UNIX)
+
+    def test_tcp_fallback(self):
+        # a binrpc client of another host reaches the node over tcp
+        interface = chord.NodeInterface(self.nodes[1].asdict(), "binrpc")
+        self.assertEqual(interface.methodProxy.getsuccessor()["uid"], self.nodes[1].uid.value)
+        # so does a client which finds no socket for the node
+        other = transport.UnixRPCTransport(tempfile.gettempdir())
+        interface = chord.NodeInterface(self.nodes[1].asdict(), other)
+        self.assertEqual(interface.methodProxy.getsuccessor()["uid"], self.nodes[1].uid.value)
+        self.assertEqual(interface.methodProxy._sock.family, socket.AF_INET)
+
+    def test_socket_removed_on_stop(self):
+        path = self.transport.unixpath("127.0.0.1", self.nodes[0].port)
+        self.assertTrue(os.path.exists(path))
+        self.nodes[0].stop()
+        self.assertFalse(os.path.exists(path))
+        self.nodes.pop(0)
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        port = tests.commons.randomport(6)
+        self.supervisor = launcher.Supervisor("127.0.0.1", range(port, port + 6), workers=2)
+        self.supervisor.start()
+
+    def tearDown(self):
+        self.supervisor.stop()
+
+    def walk(self):
+        return [node["port"] for node in
+                ringwalk.walk(self.supervisor.members()[0], self.supervisor.transport)]
+
+    def test_ring(self):
+        portmap = self.supervisor.portmap()
+        self.assertEqual(len(set(portmap.values())), 2)
+        self.assertNotIn(os.getpid(), portmap.values())
+        self.assertEqual(sorted(self.walk()), self.supervisor.ports)
+
+    def test_restart(self):
+        process = self.supervisor.processes[1]
+        process.kill()
+        process.join()
+        ports = self.supervisor.shards[1]
+        deadline = time.monotonic() + 30
+        while self.supervisor.processes[1] is process and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.supervisor.wait(ports)
+        self.assertEqual(self.supervisor.restarts, 1)
+        pid = self.supervisor.portmap()[ports[0]]
+        self.assertNotIn(pid, (0, process.pid))
+        # the stabilizers bring the restarted nodes back in the ring
+        deadline = time.monotonic() + 30
+        while sorted(self.walk()) != self.supervisor.ports and time.monotonic() < deadline:
+            time.sleep(0.5)
+        self.assertEqual(sorted(self.walk()), self.supervisor.ports)
+
+
+class TestSupervisorIdLength(unittest.TestCase):
+    def test_ring(self):
+        port = tests.commons.randomport(4)
+        supervisor = launcher.Supervisor("127.0.0.1", range(port, port + 4),
+                workers=2, idlength=64)
+        supervisor.start()
+        self.addCleanup(supervisor.stop)
+        walked = list(ringwalk.walk(supervisor.members()[0], supervisor.transport))
+        self.assertEqual(sorted(node["port"] for node in walked), supervisor.ports)
+        self.assertEqual(set(len(node["uid"]) for node in walked), {16})
@@ -0,0 +1,86 @@
+import bisect
+import random
+import unittest
+import chord
+import tests.commons
+
+class TestLeave(unittest.TestCase):
+    def setUp(self):
+        self.sim, self.nodes = tests.commons.simring(self, 8)
+
+    def assertRingHealed(self, leavers):
+        """
+        Without any stabilization round after the departures
+        """
+        self.assertTrue(self.sim.ringconverged())
+        gone = set(node.uid.value for node in leavers)
+        uids = sorted(int(n.uid.value, 16) for n in self.sim.nodes)
+        for node in self.sim.nodes:
+            for i, finger in enumerate(node.fingers):
+                self.assertNotIn(finger.respNode.uid.value, gone)
+                owner = uids[bisect.bisect_left(uids, finger.start) % len(uids)]
+                self.assertEqual(int(finger.respNode.uid.value, 16), owner)
+
+    def test_leave(self):
+        leaver = self.nodes[5]
+        self.sim.leave(leaver)
+        self.assertRingHealed([leaver])
+
+    def test_leave_many(self):
+        leavers = self.nodes[1:30:3]
+        for node in leavers:
+            self.sim.leave(node)
+        self.assertRingHealed(leavers)
+        rng = random.Random(9)
+        uids = sorted(int(n.uid.value, 16) for n in self.sim.nodes)
+        for i in range(50):
+            keyint = rng.getrandbits(256)
+            res, _, _ = self.sim.lookup(rng.choice(self.sim.nodes), chord.Key.fromint(keyint).value)
+            self.assertEqual(int(res["uid"], 16), uids[bisect.bisect_left(uids, keyint) % len(uids)])
+
+class TestLeaveXmlRPC(unittest.TestCase):
+    def setUp(self):
+        self.nodes = tests.commons.createlocalnodes(3, setfingers=True,
+                setpredecessor=True, stabilizer=False)
+
+    def tearDown(self):
+        tests.commons.stoplocalnodes(self.nodes)
+
+    def test_leave(self):
+        leaver = self.nodes[0]
+        self.nodes.remove(leaver)
+        leaver.leave()
+        node0, node1 = self.nodes
+        self.assertEqual(node0.successor.uid, node1.uid)
+        self.assertEqual(node0.predecessor.uid, node1.uid)
+        self.assertEqual(node1.successor.uid, node0.uid)
+        self.assertEqual(node1.predecessor.uid, node0.uid)
+        for node in self.nodes:
+            for finger in node.fingers:
+                self.assertNotEqual(finger.respNode.uid, leaver.uid)
+
+    def test_last_nodes(self):
+        for node in self.nodes[:2]:
+            node.leave()
+        last = self.nodes[2]
+        self.nodes = [last]
+        self.assertEqual(last.successor.uid, last.uid)
+        self.assertIsNone(last.predecessor)
+        for finger in last.fingers:
+            self.assertEqual(finger.respNode.uid, last.uid)
+        self.assertEqual(last.find_successor(last.uid + 1)["uid"], last.uid.value)
+
+    def test_join_after_last_leave(self):
+        for node in self.nodes[:2]:
+            node.leave()
+        last = self.nodes[2]
+        joiner = chord.LocalNode("127.0.0.1", tests.commons.randomport(), _stabilizer=False)
+        self.nodes = [last, joiner]
+        joiner.join_5(joiner.getNodeInterface(last.asdict()))
+        for _ in range(2):
+            joiner.stabilize()
+            last.stabilize()
+        self.assertEqual(last.successor.uid, joiner.uid)
+        self.assertEqual(last.predecessor.uid, joiner.uid)
+        self.assertEqual(joiner.successor.uid, last.uid)
+        self.assertEqual(joiner.predecessor.uid, last.uid)
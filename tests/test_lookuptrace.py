@@ -0,0 +1,64 @@
+import logging
+import unittest
+import chord
+import lookuptrace
+import tests.commons
+
+class TestLookupTrace(unittest.TestCase):
+    def setUp(self):
+        self.result = {"uid": "a" * 64, "succ": {"uid": "b" * 64}}
+
+    def test_disabled(self):
+        trace = lookuptrace.LookupTrace()
+        self.assertFalse(trace.enabled)
+        trace.addlookup("c" * 64, self.result, 2, 0.1)
+        self.assertEqual(trace.getrecords(), [])
+
+    def test_ring_buffer(self):
+        trace = lookuptrace.LookupTrace(3)
+        for hops in range(5):
+            trace.addlookup("c" * 64, self.result, hops, 0.1)
+        self.assertEqual([r["hops"] for r in trace.getrecords()], [2, 3, 4])
+        self.assertEqual([r["hops"] for r in trace.getrecords(1)], [4])
+        trace.resize(2)
+        self.assertEqual([r["hops"] for r in trace.getrecords()], [3, 4])
+        record = trace.getrecords()[0]
+        self.assertEqual(record["predecessor"], "a" * 64)
+        self.assertEqual(record["successor"], "b" * 64)
+        self.assertRaises(ValueError, trace.resize, -1)
+
+class TestLogging(unittest.TestCase):
+    def test_no_root_configuration(self):
+        """
+        Importing chord must not configure the root logger
+        """
+        self.assertNotIn(chord.log, logging.getLogger().handlers)
+        self.assertEqual(chord.log.name, "chord")
+        self.assertEqual(chord.log.level, logging.NOTSET)
+
+class TestNodeTrace(unittest.TestCase):
+    def setUp(self):
+        self.nodes = tests.commons.createlocalnodes(
+                3,
+                setfingers=True,
+                setpredecessor=True,
+                stabilizer=False
+        )
+
+    def tearDown(self):
+        tests.commons.stoplocalnodes(self.nodes)
+
+    def test_trace_lookups(self):
+        node = self.nodes[0]
+        node.find_predecessor(self.nodes[1].uid.value)
+        self.assertEqual(node.gettrace(), [])
+        node.settrace(10)
+        for other in self.nodes:
+            res = node.find_predecessor(other.uid.value)
+            record = node.gettrace(1)[0]
+            self.assertEqual(record["key"], other.uid.value)
+            self.assertEqual(record["predecessor"], res["uid"])
+            self.assertEqual(record["successor"], other.uid.value)
+        self.assertEqual(len(node.gettrace()), 3)
+        remote = chord.NodeInterface(node.asdict())
+        self.assertEqual(len(remote.methodProxy.gettrace()), 3)
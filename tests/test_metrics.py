@@ -0,0 +1,66 @@
+import unittest
+import chord
+import metrics
+import tests.commons
+
+class TestHistogram(unittest.TestCase):
+    def test_add(self):
+        hist = metrics.Histogram((1, 2, 4))
+        for value in (0, 1, 2, 3, 10):
+            hist.add(value)
+        self.assertEqual(hist.counts, [2, 1, 1, 1])
+        self.assertEqual(hist.count, 5)
+        self.assertEqual(hist.sum, 16)
+        self.assertEqual((hist.min, hist.max), (0, 10))
+        self.assertEqual(hist.quantile(0.5), 2)
+        self.assertEqual(hist.quantile(1), 10)
+        self.assertIsNone(metrics.Histogram((1,)).quantile(0.5))
+
+class TestNodeMetrics(unittest.TestCase):
+    def setUp(self):
+        self.nodes = tests.commons.createlocalnodes(3, stabilizer=False)
+        for node in self.nodes:
+            node.metrics.enabled = True
+        tests.commons.hardsetfingers(self.nodes)
+        tests.commons.hardsetpredecessor(self.nodes)
+
+    def tearDown(self):
+        tests.commons.stoplocalnodes(self.nodes)
+
+    def test_disabled(self):
+        node = self.nodes[0]
+        node.metrics.enabled = False
+        node.metrics.reset()
+        for other in self.nodes:
+            node.find_predecessor(other.uid.value)
+        snapshot = node.getmetrics()
+        self.assertFalse(snapshot["enabled"])
+        self.assertEqual(snapshot["lookup_hops"]["count"], 0)
+        self.assertEqual(snapshot["rpc_latency"], {})
+
+    def test_lookup(self):
+        node = self.nodes[0]
+        for other in self.nodes:
+            node.find_predecessor(other.uid.value)
+        snapshot = node.getmetrics()
+        self.assertEqual(snapshot["lookup_hops"]["count"], 3)
+        self.assertGreater(snapshot["lookup_hops"]["sum"], 0)
+        peers = ["127.0.0.1:{}".format(n.port) for n in self.nodes[1:]]
+        self.assertTrue(set(snapshot["rpc_latency"]).issubset(peers))
+        self.assertGreater(sum(snapshot["rpc_calls"].values()), 0)
+        self.assertEqual(
+                sum(snapshot["rpc_calls"].values()),
+                sum(h["count"] for h in snapshot["rpc_latency"].values())
+        )
+
+    def test_rpc_snapshot(self):
+        self.nodes[0].find_predecessor(self.nodes[1].uid.value)
+        remote = chord.NodeInterface(self.nodes[0].asdict())
+        self.assertEqual(remote.methodProxy.getmetrics(), self.nodes[0].getmetrics())
+
+    def test_stabilize(self):
+        node = self.nodes[0]
+        node._stabilize_and_fix_fingers()
+        snapshot = node.getmetrics()
+        self.assertEqual(snapshot["stabilize_duration"]["count"], 1)
+        self.assertEqual(snapshot["finger_corrections"], 0)
@@ -213,3 +213,37 @@ class UidIsBetweenTest(unittest.TestCase):
             "0" * 64
             )
         )
+
+class FingerStartTest(unittest.TestCase):
+    """
+    Test the finger starts computed from the shared offsets table
+    """
+
+    @classmethod
+    def setUpClass(self):
+        self.ip = "127.0.0.1"
+        self.port = 3500
+        self.node = chord.LocalNode(self.ip, self.port, _stabilizer=False)
+
+    @classmethod
+    def tearDownClass(self):
+        self.node.stopXmlRPCServer()
+
+    def test_start_equals_calcfinger(self):
+        for i in range(0, self.node.uid.idlength):
+            self.assertEqual(self.node.fingers[i].key, self.node.calcfinger(i))
+            self.assertEqual(self.node.fingers[i].start,
+                    int(self.node.calcfinger(i), 16))
+
+    def test_start_wraps_around_ring(self):
+        node = chord.BasicNode(self.ip, self.port)
+        finger = chord.Finger(None, self.node, node.asdict(), 255)
+        self.assertEqual(finger.start,
+                (int(self.node.uid.value, 16) + 2**255) % 2**256)
+        self.assertEqual(len(finger.key.value), 64)
+
+    def test_key_fromint(self):
+        key = chord.Key.fromint(1)
+        self.assertEqual(key.value, "1".zfill(64))
+        self.assertEqual(key, chord.Key("1".zfill(64)))
+        self.assertEqual(key.toint(), 1)
@@ -0,0 +1,62 @@
+import unittest
+import chord
+import tests.commons
+
+class TestNodeRef(unittest.TestCase):
+    def setUp(self):
+        self.node = chord.BasicNode("127.0.0.1", 7000)
+
+    def test_roundtrip(self):
+        ref = self.node.asref()
+        self.assertEqual(ref, [self.node.uid.value, "127.0.0.1", 7000])
+        node = chord.BasicNode(ref)
+        self.assertEqual(node.asdict(), self.node.asdict())
+        self.assertIsInstance(node.uid, chord.Uid)
+
+    def test_rpcport(self):
+        self.node.rpcport = 8000
+        node = chord.BasicNode(self.node.asref())
+        self.assertEqual(node.rpcport, 8000)
+        self.assertEqual(node.asdict(), self.node.asdict())
+
+    def test_uid_trusted(self):
+        """
+        A provided uid is used as is, the address is not hashed
+        """
+        node = chord.BasicNode(["f" * 64, "127.0.0.1", 7000])
+        self.assertEqual(node.uid.value, "f" * 64)
+        node = chord.BasicNode({"ip": "127.0.0.1", "port": 7000, "uid": "f" * 64})
+        self.assertEqual(node.uid.value, "f" * 64)
+        node = chord.BasicNode({"ip": "127.0.0.1", "port": 7000})
+        self.assertEqual(node.uid, self.node.uid)
+
+class TestNodeRefRing(unittest.TestCase):
+    def setUp(self):
+        self.nodes = tests.commons.createlocalnodes(
+                3,
+                setfingers=True,
+                setpredecessor=True,
+                stabilizer=False
+        )
+
+    def tearDown(self):
+        tests.commons.stoplocalnodes(self.nodes)
+
+    def test_asdict_without_succ(self):
+        for node in self.nodes:
+            self.assertNotIn("succ", node.asdict())
+
+    def test_find_predecessor_succ(self):
+        for node in self.nodes:
+            for other in self.nodes:
+                res = node.find_predecessor(other.uid.value)
+                self.assertEqual(res["succ"]["uid"], other.uid.value)
+                self.assertEqual(res["uid"], other.predecessor.uid.value)
+
+    def test_ref_methods(self):
+        interface = self.nodes[0].getNodeInterface(self.nodes[1].asref())
+        self.assertEqual(interface.methodProxy.getsuccessorref(), self.nodes[1].successor.asref())
+        self.assertEqual(
+                interface.methodProxy.closest_preceding_fingerref(self.nodes[2].uid.value),
+                chord.BasicNode(self.nodes[1].closest_preceding_finger(self.nodes[2].uid.value)).asref()
+        )
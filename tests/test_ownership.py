@@ -0,0 +1,79 @@
+import random
+import unittest
+import chord
+import key
+import ownership
+
+class TestRingOwnership(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.nodes = [chord.BasicNode("127.0.0.1", 2000 + i) for i in range(20)]
+        self.ring = ownership.RingOwnership(self.nodes)
+        self.keys = ["%064x" % self.rng.getrandbits(256) for i in range(500)]
+        # keys equal to uids, around zero and past the last node
+        self.keys += [n.uid.value for n in self.nodes] + ["0" * 64, "f" * 64]
+
+    def expected(self, keyvalue):
+        """
+        Owner found with the predicates used by LocalNode
+        """
+        k = key.Key(keyvalue)
+        ring = self.ring.nodes
+        for i, node in enumerate(ring):
+            if k.is_between_r_inclu(ring[i - 1].uid, node.uid):
+                return node
+
+    def test_owners(self):
+        owners = self.ring.ownerof(self.keys)
+        for keyvalue, owner in zip(self.keys, owners):
+            self.assertIs(owner, self.expected(keyvalue))
+
+    def test_forms(self):
+        expected = list(self.ring.owners(self.keys))
+        ints = [int(k, 16) for k in self.keys]
+        buf = b"".join(bytes.fromhex(k) for k in self.keys)
+        self.assertEqual(list(self.ring.owners(ints)), expected)
+        self.assertEqual(list(self.ring.owners(buf)), expected)
+        self.assertEqual(list(self.ring.owners([key.Key(k) for k in self.keys])), expected)
+
+    def test_partition(self):
+        owners = self.ring.owners(self.keys)
+        partition = self.ring.partition(self.keys)
+        self.assertEqual(sum(len(v) for v in partition.values()), len(self.keys))
+        for owner, indexes in partition.items():
+            for i in indexes:
+                self.assertEqual(owners[i], owner)
+
+    def test_raw_uids(self):
+        buf = b"".join(bytes.fromhex(n.uid.value) for n in self.nodes)
+        ring = ownership.RingOwnership(buf)
+        self.assertEqual(
+                [bytes(n).hex() for n in ring.nodes],
+                [n.uid.value for n in self.ring.nodes]
+        )
+        self.assertEqual(list(ring.owners(self.keys)), list(self.ring.owners(self.keys)))
+
+    def test_single_node(self):
+        ring = ownership.RingOwnership([self.nodes[0]])
+        self.assertEqual(list(ring.owners(self.keys)), [0] * len(self.keys))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, ownership.RingOwnership, [])
+        self.assertRaises(ValueError, self.ring.owners, b"\x00" * 31)
+        self.assertRaises(ValueError, self.ring.owners, ["00"])
+
+@unittest.skipUnless(ownership.numpy, "numpy not installed")
+class TestRingOwnershipNumpy(unittest.TestCase):
+    def test_vectorized(self):
+        numpy = ownership.numpy
+        rng = numpy.random.default_rng(0)
+        nodes = rng.integers(0, 256, size=(50, 32), dtype=numpy.uint8).tobytes()
+        keys = rng.integers(0, 256, size=(10000, 32), dtype=numpy.uint8).tobytes()
+        ring = ownership.RingOwnership(nodes)
+        owners = ring.owners(keys)
+        self.assertIsInstance(owners, numpy.ndarray)
+        uids = sorted(int.from_bytes(nodes[i:i + 32], "big") for i in range(0, len(nodes), 32))
+        for i in range(0, 10000, 97):
+            k = int.from_bytes(keys[i * 32:(i + 1) * 32], "big")
+            expected = next((j for j, u in enumerate(uids) if u >= k), 0)
+            self.assertEqual(owners[i], expected)
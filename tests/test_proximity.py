@@ -0,0 +1,77 @@
+import bisect
+import random
+import unittest
+import proximity
+import simulator
+
+
+def linklatency(src, dst):
+    # nodes sharing an ip are in the same region
+    return 0.001 if src[0] == dst[0] else 0.05
+
+
+class TestRttTable(unittest.TestCase):
+    def test_smoothing(self):
+        table = proximity.RttTable(alpha=0.5)
+        self.assertIsNone(table.get("a"))
+        table.add("a", 1.0)
+        self.assertEqual(table.get("a"), 1.0)
+        table.add("a", 3.0)
+        self.assertEqual(table.get("a"), 2.0)
+        table.remove("a")
+        self.assertEqual(table.snapshot(), {})
+
+    def test_proxy(self):
+        class Proxy(object):
+            def ok(self):
+                clock[0] += 0.25
+                return "ok"
+
+            def ko(self):
+                raise ConnectionRefusedError()
+
+        clock = [0.0]
+        table = proximity.RttTable(clock=lambda: clock[0])
+        proxy = proximity.RttProxy(Proxy(), "a", table)
+        self.assertEqual(proxy.ok(), "ok")
+        self.assertEqual(table.get("a"), 0.25)
+        with self.assertRaises(ConnectionRefusedError):
+            proxy.ko()
+        self.assertIsNone(table.get("a"))
+
+
+class TestProximityNeighborSelection(unittest.TestCase):
+    def lookups(self, pns):
+        sim = simulator.Simulator(seed=3, linklatency=linklatency)
+        nodes = [sim.addnode(ip="10.0.{}.1".format(i % 4), port=1000 + i, pns=pns)
+                for i in range(64)]
+        for node in nodes[1:]:
+            sim.join(node, nodes[0])
+        self.assertIsNotNone(sim.runtillconverged(maxtime=3000))
+        sim.run(300)
+        uids = sorted(int(n.uid.value, 16) for n in nodes)
+        rng = random.Random(5)
+        elapsed = []
+        for i in range(400):
+            keyvalue = nodes[0].uid.canonicalize(rng.getrandbits(256))
+            res, rpcs, secs = sim.lookup(rng.choice(nodes), keyvalue)
+            owner = uids[bisect.bisect_left(uids, int(keyvalue, 16)) % len(uids)]
+            self.assertEqual(int(res["uid"], 16), owner)
+            elapsed.append(secs)
+        # the first lookups are the ones nodes learn candidates from
+        return nodes, sum(elapsed[200:]) / 200
+
+    def test_candidates(self):
+        nodes, latency = self.lookups(4)
+        node = nodes[0]
+        self.assertGreater(len(node.rtt.snapshot()), 0)
+        for i, finger in enumerate(node.fingers):
+            for uid in finger.candidates or ():
+                distance = (int(uid, 16) - int(node.uid.value, 16)) % 2**256
+                self.assertEqual(distance.bit_length() - 1, i)
+            self.assertLessEqual(len(finger.candidates or ()), 4)
+
+    def test_lower_latency(self):
+        _, latency = self.lookups(0)
+        _, pnslatency = self.lookups(4)
+        self.assertLess(pnslatency, latency)
@@ -0,0 +1,65 @@
+import random
+import unittest
+import bootstrap
+import chord
+import ringclient
+import tests.commons
+
+
+class TestRingClient(unittest.TestCase):
+    transport = "binrpc"
+
+    def setUp(self):
+        self.nodes = tests.commons.storering(self, 8, self.transport)
+        rng = random.Random(5)
+        self.keys = [chord.Key.fromint(rng.getrandbits(256)).value for i in range(40)]
+
+    def ownerof(self, keyvalue):
+        return next((n for n in self.nodes if n.uid.value >= keyvalue), self.nodes[0])
+
+    def test_one_hop(self):
+        client = ringclient.RingClient(self.nodes[0].asdict(), self.transport)
+        self.assertEqual(len(client.view), 8)
+        for i, key in enumerate(self.keys):
+            client.put(key, str(i).encode())
+        for i, key in enumerate(self.keys):
+            self.assertEqual(client.get(key), str(i).encode())
+            self.assertEqual(self.ownerof(key).store.get(key), str(i).encode())
+        self.assertTrue(client.delete(self.keys[0]))
+        self.assertIsNone(client.get(self.keys[0]))
+        self.assertEqual(client.redirects, 0)
+
+    def test_partial_view(self):
+        client = ringclient.RingClient(self.nodes[0].asdict(), self.transport, full=False)
+        for key in self.keys:
+            client.put(key, b"v")
+        self.assertGreater(client.redirects, 0)
+        redirects = client.redirects
+        for key in self.keys:
+            self.assertEqual(client.get(key), b"v")
+        self.assertEqual(client.redirects, redirects)
+
+    def test_stale_view(self):
+        client = ringclient.RingClient(self.nodes[0].asdict(), self.transport)
+        # a node the client doesn't know joins: its keys are redirected to it
+        newcomer = tests.commons.storenode(self, tests.commons.randomport(), self.transport)
+        self.nodes.append(newcomer)
+        self.assertEqual(bootstrap.bootstrap(self.nodes), {})
+        self.nodes.sort(key=lambda node: node.uid.toint())
+        key = chord.Key.fromint(newcomer.uid.toint() - 1).value
+        client.put(key, b"v")
+        self.assertEqual(newcomer.store.get(key), b"v")
+        self.assertEqual(client.redirects, 1)
+        self.assertIn(newcomer.uid.toint(), client.view)
+        # a node leaves: it is dropped once unreachable
+        leaver = self.nodes[3]
+        leaver.leave()
+        self.nodes.remove(leaver)
+        key = leaver.uid.value
+        client.put(key, b"w")
+        self.assertEqual(self.ownerof(key).store.get(key), b"w")
+        self.assertNotIn(leaver.uid.toint(), client.view)
+
+
+class TestRingClientXmlRPC(TestRingClient):
+    transport = "xmlrpc"
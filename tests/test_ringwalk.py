@@ -0,0 +1,52 @@
+import random
+import unittest
+import chord
+import ringwalk
+import tests.commons
+
+
+class TestRingWalk(unittest.TestCase):
+    def setUp(self):
+        self.nodes = tests.commons.storering(self, 8)
+        rng = random.Random(3)
+        uids = [node.uid.toint() for node in self.nodes]
+        # keys on a uid and above the last uid, owned by the first node
+        keys = [rng.getrandbits(256) for i in range(300)] + [uids[2], (uids[-1] + 1) % 2 ** 256]
+        self.owned = dict((node.uid.value, []) for node in self.nodes)
+        for k, node in enumerate(self.nodes):
+            predecessor = uids[k - 1]
+            # in ring order from the predecessor
+            for key in sorted(keys, key=lambda key: (key - predecessor) % 2 ** 256):
+                if chord.Key.fromint(key).is_between_r_inclu(predecessor, uids[k]):
+                    node.store.put(key, b"v")
+                    self.owned[node.uid.value].append(chord.Key.fromint(key).value)
+
+    def test_walk(self):
+        start = self.nodes[3]
+        walked = [node["uid"] for node in ringwalk.walk(start.asdict(), "binrpc", prefetch=2)]
+        expected = [node.uid.value for node in self.nodes[3:] + self.nodes[:3]]
+        self.assertEqual(walked, expected)
+
+    def test_keys(self):
+        walked = dict((node["uid"], list(keys)) for node, keys in
+                ringwalk.walk(self.nodes[0], "binrpc", keys=True, pagesize=7))
+        self.assertEqual(walked, self.owned)
+
+    def test_abandoned(self):
+        walk = ringwalk.walk(self.nodes[0].asdict(), "binrpc", prefetch=1)
+        self.assertEqual(next(walk)["uid"], self.nodes[0].uid.value)
+        walk.close()
+
+    def test_unreachable(self):
+        self.nodes[4].stop()
+        with self.assertRaises(ringwalk.WalkError):
+            list(ringwalk.walk(self.nodes[0].asdict(), "binrpc"))
+
+    def test_single_node(self):
+        node = chord.LocalNode("127.0.0.1", tests.commons.randomport(),
+                _stabilizer=False, transport="binrpc")
+        try:
+            self.assertEqual(list(ringwalk.walk(node, "binrpc")), [node.asdict()])
+            self.assertEqual(list(ringwalk.ownedkeys(node)), [])
+        finally:
+            node.stop()
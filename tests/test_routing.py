@@ -0,0 +1,75 @@
+import threading
+import unittest
+import bootstrap
+import chord
+import tests.commons
+
+
+class TestRouting(unittest.TestCase):
+    def setUp(self):
+        port = tests.commons.randomport(4)
+        self.nodes = []
+        for i in range(4):
+            self.nodes.append(chord.LocalNode("127.0.0.1", port + i,
+                    _stabilizer=False, transport="binrpc"))
+            self.addCleanup(self.nodes[-1].stop)
+        self.assertEqual(bootstrap.bootstrap(self.nodes), {})
+        self.nodes.sort(key=lambda node: node.uid.toint())
+
+    def test_published_versions(self):
+        node = self.nodes[0]
+        routing = node.routing
+        node.setsuccessor(self.nodes[2].asdict())
+        self.assertEqual(node.routing.version, routing.version + 1)
+        self.assertEqual(node.successor.uid, self.nodes[2].uid)
+        self.assertEqual(node.fingers[0].respNode.uid, self.nodes[2].uid)
+        # the previous version is left untouched for its readers
+        self.assertEqual(routing.successor.uid, self.nodes[1].uid)
+        node.fingers[5].setRespNode(self.nodes[3].asdict())
+        self.assertEqual(node.routing.version, routing.version + 2)
+        self.assertEqual(node.routing.fingers[5].uid, self.nodes[3].uid)
+        node.setpredecessor(self.nodes[1].asdict())
+        self.assertEqual(node.routing.predecessor.uid, self.nodes[1].uid)
+        self.assertEqual(routing.predecessor.uid, self.nodes[3].uid)
+
+    def test_install_routing_is_one_version(self):
+        node = self.nodes[0]
+        version = node.routing.version
+        node.install_routing(self.nodes[3].asref(), [[0, self.nodes[2].asref()]])
+        self.assertEqual(node.routing.version, version + 1)
+        self.assertEqual(set(n.uid.value for n in node.routing.fingers),
+                set([self.nodes[2].uid.value]))
+
+    def test_concurrent_readers(self):
+        node = self.nodes[0]
+        others = [n.asdict() for n in self.nodes[1:]]
+        stop = threading.Event()
+        errors = []
+
+        def write():
+            k = 0
+            while not stop.is_set():
+                node.install_routing(others[k % 3], [[0, others[k % 3]]])
+                k += 1
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for i in range(2000):
+                routing = node.routing
+                # a version never mixes two updates
+                if len(set(n.uid.value for n in routing.fingers)) != 1\
+                        or routing.predecessor.uid != routing.successor.uid:
+                    errors.append(routing.version)
+                node.closest_preceding_finger(self.nodes[2].uid.value)
+        finally:
+            stop.set()
+            writer.join()
+        self.assertEqual(errors, [])
+
+    def test_standalone_finger(self):
+        node = self.nodes[0]
+        version = node.routing.version
+        finger = chord.Finger(None, node, self.nodes[1].asdict(), 3)
+        self.assertEqual(finger.respNode.uid, self.nodes[1].uid)
+        self.assertEqual(node.routing.version, version)
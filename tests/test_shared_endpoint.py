@@ -0,0 +1,60 @@
+import unittest
+import xmlrpc.client
+import chord
+import clientxmlrpc
+import serverxmlrpc
+import tests.commons
+
+class TestSharedEndpoint(unittest.TestCase):
+    """
+    Nodes of the same process served by a single ChordEndpointxmlrpc
+    """
+    def setUp(self):
+        self.endpoint = serverxmlrpc.getendpoint("127.0.0.1", 0)
+        self.nodes = tests.commons.createlocalnodes(
+                3,
+                stabilizer=False,
+                endpoint=self.endpoint
+        )
+
+    def tearDown(self):
+        tests.commons.stoplocalnodes(self.nodes)
+        self.endpoint.stop()
+
+    def test_single_endpoint(self):
+        self.assertIs(serverxmlrpc.getendpoint(), self.endpoint)
+        for node in self.nodes:
+            self.assertEqual(node.rpcport, self.endpoint.port)
+            self.assertEqual(node.asdict()["rpcport"], self.endpoint.port)
+
+    def test_colocated_short_circuit(self):
+        interface = chord.NodeInterface(self.nodes[1].asdict())
+        self.assertIs(interface.methodProxy, self.nodes[1])
+        interface = self.nodes[0].getNodeInterface(self.nodes[2].asdict())
+        self.assertIs(interface.methodProxy, self.nodes[2])
+
+    def test_route_by_path(self):
+        for node in self.nodes:
+            proxy = clientxmlrpc.ChordClientxmlrpcProxy(
+                    "127.0.0.1", self.endpoint.port, node.rpcpath())
+            self.assertEqual(proxy.getsuccessor()["uid"], node.uid.value)
+
+    def test_rpc_methods_only(self):
+        proxy = clientxmlrpc.ChordClientxmlrpcProxy(
+                "127.0.0.1", self.endpoint.port, self.nodes[0].rpcpath())
+        self.assertRaises(xmlrpc.client.Fault, proxy.stop)
+        self.assertRaises(xmlrpc.client.Fault, proxy.savesnapshot)
+        self.assertEqual(proxy.getsuccessor()["uid"], self.nodes[0].uid.value)
+
+    def test_join(self):
+        self.nodes[1].join(chord.NodeInterface(self.nodes[0].asdict()))
+        self.nodes[2].join(chord.NodeInterface(self.nodes[0].asdict()))
+        ring = sorted(self.nodes, key=lambda n: int(n.uid.value, 16))
+        for k, node in enumerate(ring):
+            self.assertEqual(node.successor.uid, ring[(k + 1) % 3].uid)
+            self.assertEqual(node.predecessor.uid, ring[k - 1].uid)
+
+    def test_unregister_on_stop(self):
+        node = self.nodes.pop()
+        node.stop()
+        self.assertIsNone(serverxmlrpc.getcolocated(node.ip, node.port))
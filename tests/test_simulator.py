@@ -0,0 +1,75 @@
+import bisect
+import random
+import time
+import unittest
+import simulator
+
+class TestSimulator(unittest.TestCase):
+    def setUp(self):
+        self.sim = simulator.Simulator(latency=0.01, jitter=0.005, seed=1)
+        self.nodes = [self.sim.addnode(port=1000 + i) for i in range(30)]
+        for node in self.nodes[1:]:
+            self.sim.join(node, self.nodes[0])
+
+    def owner(self, keyvalue):
+        uids = sorted(int(n.uid.value, 16) for n in self.nodes)
+        i = bisect.bisect_left(uids, int(keyvalue, 16))
+        return uids[i % len(uids)]
+
+    def test_reproducible(self):
+        runs = []
+        for i in range(2):
+            sim = simulator.Simulator(latency=0.01, jitter=0.005, seed=7)
+            nodes = [sim.addnode(port=1000 + i, gossip=2) for i in range(10)]
+            for node in nodes[1:]:
+                sim.join(node, nodes[0])
+            sim.run(60)
+            runs.append((sim.rpccount, [[f.respNode.uid.value for f in node.fingers]
+                    for node in nodes]))
+        self.assertEqual(runs[0], runs[1])
+
+    def test_virtual_time(self):
+        start = time.time()
+        self.sim.run(3600)
+        self.assertLess(time.time() - start, 60)
+        self.assertEqual(self.sim.now, 3600)
+
+    def test_events_overlap(self):
+        # the rpc of an event don't delay the events of the other nodes
+        for size in (2, 20, 80):
+            sim = simulator.Simulator(latency=0.01, seed=3)
+            nodes = [sim.addnode(port=1000 + i) for i in range(size)]
+            for node in nodes[1:]:
+                sim.join(node, nodes[0])
+            for i in range(5):
+                sim.run(1.0)
+                self.assertEqual(sim.now, i + 1.0)
+            rounds = sim.rpccount
+            sim.run(10)
+            self.assertEqual(sim.now, 15.0)
+            # every node stabilizes about once per period
+            self.assertGreater(sim.rpccount - rounds, 9 * size)
+
+    def test_convergence_and_lookups(self):
+        self.assertIsNotNone(self.sim.runtillconverged(maxtime=600))
+        rng = random.Random(2)
+        for i in range(50):
+            keyvalue = self.nodes[0].uid.canonicalize(rng.getrandbits(256))
+            res, rpcs, elapsed = self.sim.lookup(rng.choice(self.nodes), keyvalue)
+            self.assertEqual(int(res["uid"], 16), self.owner(keyvalue))
+            self.assertAlmostEqual(elapsed, 0, delta=rpcs * 0.03)
+
+    def test_loss(self):
+        self.sim.loss = 0.05
+        self.sim.run(300)
+        self.assertGreater(self.sim.lostcount, 0)
+        self.assertGreater(self.sim.failedrounds, 0)
+        self.sim.loss = 0
+        self.assertIsNotNone(self.sim.runtillconverged(maxtime=600))
+
+    def test_failed_node(self):
+        self.sim.runtillconverged(maxtime=600)
+        node = self.nodes.pop()
+        self.sim.removenode(node)
+        self.assertRaises(ConnectionRefusedError, self.sim.call,
+                (node.ip, node.port), "getsuccessor", [])
@@ -0,0 +1,102 @@
+import bisect
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import bootstrap
+import chord
+import simulator
+import snapshot
+import wire
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "node.snap")
+        self.sim = simulator.Simulator(seed=5)
+        self.nodes = [self.sim.addnode(port=1000 + i) for i in range(31)]
+        self.node = self.sim.addnode(port=2000, snapshot=self.path)
+        self.nodes.append(self.node)
+        failures = bootstrap.bootstrap([node.asdict() for node in self.nodes],
+                transport=self.sim.transport, workers=1)
+        self.assertEqual(failures, {})
+        self.uids = sorted(int(n.uid.value, 16) for n in self.nodes)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def restart(self):
+        self.sim.removenode(self.node)
+        self.assertTrue(os.path.exists(self.path))
+        rpccount = self.sim.rpccount
+        node = self.sim.addnode(port=2000, snapshot=self.path)
+        self.assertEqual(self.sim.rpccount, rpccount)
+        return node
+
+    def test_warm_restart(self):
+        node = self.restart()
+        self.assertEqual(node.predecessor.uid, self.node.predecessor.uid)
+        for old, new in zip(self.node.fingers, node.fingers):
+            self.assertEqual(old.respNode.uid, new.respNode.uid)
+        rng = random.Random(6)
+        for i in range(30):
+            keyint = rng.getrandbits(256)
+            res, _, _ = self.sim.lookup(node, chord.Key.fromint(keyint).value)
+            self.assertEqual(int(res["uid"], 16),
+                    self.uids[bisect.bisect_left(self.uids, keyint) % len(self.uids)])
+
+    def test_lazy_validation(self):
+        node = self.restart()
+        unverified = len(node._unverified)
+        self.assertEqual(unverified, len(snapshot.compactfingers(self.node)))
+        self.sim.run(unverified * self.sim.stabilizeperiod + 1)
+        self.assertEqual(node._unverified, [])
+        self.assertTrue(self.sim.ringconverged())
+
+    def test_periodic(self):
+        path = os.path.join(self.dir, "periodic.snap")
+        node = self.sim.addnode(port=3000, snapshot=path, snapshotperiod=0)
+        self.sim.join(node, self.node)
+        self.assertIsNone(snapshot.load(path))
+        self.sim.run(2)
+        state = snapshot.load(path)
+        self.assertEqual(state["uid"], node.uid.value)
+        self.assertEqual(state["fingers"][0], [0, node.successor.asref()])
+
+    def test_other_uid(self):
+        self.sim.removenode(self.node)
+        node = self.sim.addnode(port=2001, snapshot=self.path)
+        self.assertIsNone(node.predecessor)
+        self.assertEqual(node.successor.uid, node.uid)
+
+    def test_corrupted(self):
+        self.sim.removenode(self.node)
+        with open(self.path, "r+b") as f:
+            f.seek(len(snapshot.MAGIC) + 1)
+            f.write(b"\xff" * 8)
+        self.assertIsNone(snapshot.load(self.path))
+        node = self.sim.addnode(port=2000, snapshot=self.path)
+        self.assertIsNone(node.predecessor)
+
+    def test_malformed(self):
+        self.sim.removenode(self.node)
+        state = snapshot.load(self.path)
+        for key in ("uid", "fingers", "time"):
+            broken = dict(state)
+            del broken[key]
+            with open(self.path, "wb") as f:
+                f.write(snapshot.MAGIC + wire.encode(broken))
+            self.assertIsNone(snapshot.load(self.path))
+        state["fingers"] = state["fingers"][1:] or [[1, self.node.asref()]]
+        with open(self.path, "wb") as f:
+            f.write(snapshot.MAGIC + wire.encode(state))
+        self.assertIsNone(snapshot.load(self.path))
+        # the node starts as without snapshot
+        node = self.sim.addnode(port=2000, snapshot=self.path)
+        self.assertIsNone(node.predecessor)
+        self.assertEqual(node.successor.uid, node.uid)
+
+    def test_leave(self):
+        self.sim.leave(self.node)
+        self.assertFalse(os.path.exists(self.path))
@@ -0,0 +1,148 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import chord
+import store
+
+def rawkeys(nb, seed):
+    rng = random.Random(seed)
+    return [rng.getrandbits(256).to_bytes(32, "big") for i in range(nb)]
+
+class TestSegmentStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.store = store.SegmentStore(self.dir, segmentsize=4096)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+
+    def reopen(self):
+        self.store.close()
+        self.store = store.SegmentStore(self.dir, segmentsize=4096)
+
+    def test_put_get_delete(self):
+        key = chord.Key("ab" * 32)
+        self.store.put(key, b"value")
+        self.assertEqual(self.store.get("ab" * 32), b"value")
+        self.assertEqual(bytes(self.store.getview(int("ab" * 32, 16))), b"value")
+        self.store.put(key, b"other")
+        self.assertEqual(self.store.get(key), b"other")
+        self.assertEqual(len(self.store), 1)
+        self.assertTrue(self.store.delete(key))
+        self.assertFalse(self.store.delete(key))
+        self.assertIsNone(self.store.get(key))
+        self.assertNotIn(key, self.store)
+        with self.assertRaises(ValueError):
+            self.store.get("ab")
+
+    def test_reopen(self):
+        keys = rawkeys(200, 1)
+        for i, key in enumerate(keys):
+            self.store.put(key, str(i).encode() * 10)
+        for key in keys[::2]:
+            self.store.delete(key)
+        self.store.put(keys[1], b"last")
+        self.assertGreater(len(self.store.segments), 1)
+        self.reopen()
+        self.assertEqual(len(self.store), 100)
+        self.assertEqual(self.store.get(keys[1]), b"last")
+        self.assertEqual(self.store.get(keys[3]), b"3" * 10)
+        self.assertIsNone(self.store.get(keys[2]))
+
+    def test_torn_record(self):
+        keys = rawkeys(2, 2)
+        self.store.put(keys[0], b"kept")
+        self.store.put(keys[1], b"torn")
+        path = self.store.active.path
+        self.store.close()
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 2)
+        self.reopen()
+        self.assertEqual(self.store.get(keys[0]), b"kept")
+        self.assertIsNone(self.store.get(keys[1]))
+        self.store.put(keys[1], b"again")
+        self.reopen()
+        self.assertEqual(self.store.get(keys[1]), b"again")
+
+    def test_damaged_sealed_segment(self):
+        keys = rawkeys(200, 3)
+        for i, key in enumerate(keys):
+            self.store.put(key, str(i).encode() * 10)
+        self.assertGreater(len(self.store.segments), 1)
+        path = self.store.segments[min(self.store.segments)].path
+        self.store.close()
+        with open(path, "r+b") as f:
+            f.seek(os.path.getsize(path) // 2)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xff]))
+        size = os.path.getsize(path)
+        with self.assertRaises(store.CorruptSegmentError):
+            store.SegmentStore(self.dir, segmentsize=4096)
+        # nothing was truncated
+        self.assertEqual(os.path.getsize(path), size)
+
+    def test_scan(self):
+        keys = sorted(rawkeys(100, 3))
+        for key in keys:
+            self.store.put(key, key[:4])
+        start, end = keys[10], keys[50]
+        res = [(k, bytes(v)) for k, v in self.store.scan(start, end)]
+        self.assertEqual(res, [(k, k[:4]) for k in keys[11:51]])
+        # interval wrapping around zero, in ring order from start
+        res = [k for k, v in self.store.scan(keys[90], keys[5])]
+        self.assertEqual(res, keys[91:] + keys[:6])
+        self.assertEqual([k for k, v in self.store.scan(keys[0], keys[0])],
+                keys[1:] + keys[:1])
+
+    def test_compact(self):
+        keys = rawkeys(100, 4)
+        for key in keys:
+            self.store.put(key, b"x" * 100)
+        for key in keys[:80]:
+            self.store.delete(key)
+        view = self.store.getview(keys[90])
+        reclaimed = self.store.compact()
+        self.assertGreater(reclaimed, 80 * 100)
+        # views taken before the compaction stay readable
+        self.assertEqual(bytes(view), b"x" * 100)
+        self.assertEqual(len(self.store), 20)
+        self.reopen()
+        self.assertEqual(sorted(k for k, v in self.store.scan(keys[0], keys[0])
+                if k != keys[0]), sorted(keys[80:]))
+
+class TestLocalNodeStore(unittest.TestCase):
+    def test_datadir(self):
+        directory = tempfile.mkdtemp()
+        try:
+            node = chord.LocalNode("127.0.0.1", 0, _stabilizer=False,
+                    transport="binrpc", datadir=directory)
+            node.store.put(node.uid, b"value")
+            node.stop()
+            self.assertTrue(node.store.closed)
+            reopened = store.SegmentStore(directory)
+            self.assertEqual(reopened.get(node.uid), b"value")
+            reopened.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_handoffkeys(self):
+        directory = tempfile.mkdtemp()
+        node = chord.LocalNode("127.0.0.1", 0, _stabilizer=False,
+                transport="binrpc", datadir=directory)
+        try:
+            uid = node.uid.toint()
+            keys = [(uid + offset) % 2 ** 256 for offset in (-30, -20, -10, 0, 10)]
+            for key in keys:
+                node.store.put(key, b"value")
+            node.setpredecessor(chord.BasicNode(
+                    [chord.Key.fromint((uid - 25) % 2 ** 256).value, "127.0.0.1", 1]).asdict())
+            newpredecessor = chord.Key.fromint((uid - 10) % 2 ** 256).value
+            self.assertEqual(node.handoffkeys(newpredecessor),
+                    [chord.Key.fromint(key).value for key in keys[1:3]])
+        finally:
+            node.stop()
+            shutil.rmtree(directory)
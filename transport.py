@@ -0,0 +1,127 @@
+"""
+Transports used by a LocalNode to serve rpc and by NodeInterface to reach
+remote nodes
+
+A transport provides server(node), which returns an object with start()
+and stop() methods serving the LocalNode, and client(node), which returns
+a proxy on which methods of the remote BasicNode `node` are called.
+
+All the nodes of a ring have to use the same transport.
+xmlrpc is the default one and the interoperable choice,
+binrpc uses the compact binary protocol of wire.py and muxrpc the same
+protocol with many calls in flight per connection. UnixRPCTransport is
+binrpc with a unix socket fast path between the processes of a host.
+"""
+import os
+import threading
+
+import clientbinrpc
+import clientxmlrpc
+import serverbinrpc
+import serverxmlrpc
+
+DEFAULT = "xmlrpc"
+
+class Transport(object):
+    name = None
+
+    def server(self, node):
+        raise NotImplementedError
+
+    def client(self, node):
+        raise NotImplementedError
+
+class XmlRPCTransport(Transport):
+    name = "xmlrpc"
+
+    def server(self, node):
+        control = getattr(node, "admission", None)
+        # a bounded admission needs concurrent requests to be useful
+        return serverxmlrpc.ChordServerxmlrpc(node,
+                threaded=bool(control and control.limit))
+
+    def client(self, node):
+        return clientxmlrpc.ChordClientxmlrpcProxy(
+                node.ip, node.rpcport, node.rpcpath())
+
+class BinRPCTransport(Transport):
+    name = "binrpc"
+
+    def server(self, node):
+        return serverbinrpc.ChordServerbinrpc(node)
+
+    def client(self, node):
+        return clientbinrpc.ChordClientbinrpcProxy(node.ip, node.rpcport)
+
+class UnixRPCTransport(BinRPCTransport):
+    """
+    binrpc protocol, with each node also served on a unix socket of
+    `directory`. Clients of the same host use it instead of tcp on the
+    loopback; the nodes of the other hosts are still reached over tcp, so
+    they can use binrpc. Created per directory, it is not registered
+    """
+    name = "unixrpc"
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def unixpath(self, ip, port):
+        return os.path.join(self.directory, "{}-{}.sock".format(ip, port))
+
+    def server(self, node):
+        return serverbinrpc.ChordServerbinrpc(node,
+                unixpath=self.unixpath(node.ip, node.rpcport))
+
+    def client(self, node):
+        return clientbinrpc.ChordClientbinrpcProxy(node.ip, node.rpcport,
+                unixpath=self.unixpath(node.ip, node.rpcport))
+
+class MuxRPCTransport(Transport):
+    """
+    binrpc protocol with request ids: all the proxies of the process on
+    the same peer share one connection, on which concurrent calls are
+    multiplexed
+    """
+    name = "muxrpc"
+
+    def __init__(self):
+        self.proxies = {}
+        self.lock = threading.Lock()
+
+    def server(self, node):
+        return serverbinrpc.ChordServermuxrpc(node)
+
+    def client(self, node):
+        address = (node.ip, node.rpcport)
+        with self.lock:
+            proxy = self.proxies.get(address)
+            if proxy is None:
+                proxy = clientbinrpc.ChordClientmuxrpcProxy(*address)
+                self.proxies[address] = proxy
+        return proxy
+
+_transports = {}
+
+def register(transport):
+    """
+    Make `transport` available by its name
+    """
+    _transports[transport.name] = transport
+
+def get(transport=None):
+    """
+    Return the Transport instance named `transport`
+    A Transport instance is returned as is, None gives the default transport
+    """
+    if transport is None:
+        transport = DEFAULT
+    if isinstance(transport, Transport):
+        return transport
+    try:
+        return _transports[transport]
+    except KeyError:
+        raise ValueError("unknown transport {!r}".format(transport))
+
+register(XmlRPCTransport())
+register(BinRPCTransport())
+register(MuxRPCTransport())
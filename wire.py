@@ -0,0 +1,361 @@
+"""
+Compact binary encoding used by the binrpc transport
+
+Values are encoded with a one byte tag followed by their payload.
+Node descriptors (dict with ip, port, uid and optional succ, rpcport) and
+node references ([uid, ip, port] and optional rpcport, see
+chord.BasicNode.asref()) are packed: uid travels as its raw bytes, 32 for
+the default 256 bits identifier space (see key.IDLENGTHS), ipv4 address and
+ports as fixed width fields.
+Messages are framed with their length as an unsigned 32 bits integer, up
+to MAXFRAME bytes.
+"""
+import socket
+import struct
+
+from key import IDLENGTH, IDLENGTHS, Key
+
+_u8 = struct.Struct(">B")
+_u16 = struct.Struct(">H")
+_u32 = struct.Struct(">I")
+_i64 = struct.Struct(">q")
+_f64 = struct.Struct(">d")
+
+NONE = b"N"
+TRUE = b"T"
+FALSE = b"F"
+INT = b"i"
+BIGINT = b"I"
+FLOAT = b"f"
+STR = b"s"
+BYTES = b"b"
+LIST = b"l"
+DICT = b"d"
+KEY = b"k"
+NODE = b"n"
+NODEREF = b"r"
+
+# flags of a packed node descriptor
+_NODE_SUCC = 1
+_NODE_RPCPORT = 2
+_NODE_IPV4 = 4
+# the uid length byte follows the flags, the uid isn't of IDLENGTH bits
+_NODE_UIDLEN = 8
+
+_NODE_KEYS = frozenset(("ip", "port", "uid", "succ", "rpcport"))
+_UIDLEN = IDLENGTH // 8
+# lengths of the hexa str of the uids
+_UIDCHARS = frozenset(idlength // 4 for idlength in IDLENGTHS)
+# uids are packed only when they decode to the same str
+_HEXCHARS = frozenset("0123456789abcdef")
+
+# larger frames are rejected, a peer speaking another protocol announces
+# random lengths
+MAXFRAME = 64 * 1024 * 1024
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+
+class WireError(Error):
+    """Raised on malformed or truncated data"""
+    pass
+
+
+class Fault(Error):
+    """Raised by a client when the remote method failed"""
+    pass
+
+
+def _isuid(uid):
+    return isinstance(uid, str) and len(uid) in _UIDCHARS and _HEXCHARS.issuperset(uid)
+
+
+def _isnode(value):
+    if not _NODE_KEYS.issuperset(value) or "uid" not in value:
+        return False
+    if not isinstance(value.get("ip"), str) or not isinstance(value.get("port"), int):
+        return False
+    if not 0 <= value["port"] < 65536:
+        return False
+    if not _isuid(value["uid"]):
+        return False
+    if "rpcport" in value and not (isinstance(value["rpcport"], int)
+            and 0 <= value["rpcport"] < 65536):
+        return False
+    if "succ" in value:
+        return isinstance(value["succ"], dict) and _isnode(value["succ"])
+    return True
+
+
+def _isref(value):
+    if not 3 <= len(value) <= 4:
+        return False
+    uid, ip = value[:2]
+    if not _isuid(uid):
+        return False
+    if not isinstance(ip, str):
+        return False
+    for port in value[2:]:
+        if not isinstance(port, int) or isinstance(port, bool) or not 0 <= port < 65536:
+            return False
+    return True
+
+
+def _packip(ip):
+    """
+    Return the 4 bytes of the ipv4 address `ip`, None if it isn't one
+    or if it wouldn't decode to the same str, as the shorthand 127.1
+    """
+    try:
+        packedip = socket.inet_pton(socket.AF_INET, ip)
+    except (OSError, ValueError):
+        return None
+    if socket.inet_ntop(socket.AF_INET, packedip) != ip:
+        return None
+    return packedip
+
+
+def _packaddress(tag, flags, uid, ip, port, rpcport, out):
+    packedip = _packip(ip)
+    if packedip is not None:
+        flags |= _NODE_IPV4
+    if rpcport is not None:
+        flags |= _NODE_RPCPORT
+    uid = bytes.fromhex(uid)
+    if len(uid) != _UIDLEN:
+        flags |= _NODE_UIDLEN
+    out.append(tag)
+    out.append(_u8.pack(flags))
+    if flags & _NODE_UIDLEN:
+        out.append(_u8.pack(len(uid)))
+    out.append(uid)
+    if packedip is not None:
+        out.append(packedip)
+    else:
+        _encodestr(ip, out)
+    out.append(_u16.pack(port))
+    if rpcport is not None:
+        out.append(_u16.pack(rpcport))
+
+
+def _encodenode(value, out):
+    flags = _NODE_SUCC if "succ" in value else 0
+    _packaddress(NODE, flags, value["uid"], value["ip"], value["port"],
+            value.get("rpcport"), out)
+    if flags & _NODE_SUCC:
+        _encodenode(value["succ"], out)
+
+
+def _encoderef(value, out):
+    _packaddress(NODEREF, 0, value[0], value[1], value[2],
+            value[3] if len(value) > 3 else None, out)
+
+
+def _encodestr(value, out):
+    data = value.encode("utf-8")
+    out.append(_u32.pack(len(data)))
+    out.append(data)
+
+
+def _encode(value, out):
+    if value is None:
+        out.append(NONE)
+    elif value is True:
+        out.append(TRUE)
+    elif value is False:
+        out.append(FALSE)
+    elif isinstance(value, int):
+        if -(1 << 63) <= value < (1 << 63):
+            out.append(INT)
+            out.append(_i64.pack(value))
+        else:
+            data = value.to_bytes((value.bit_length() + 8) // 8, "big", signed=True)
+            out.append(BIGINT)
+            out.append(_u16.pack(len(data)))
+            out.append(data)
+    elif isinstance(value, float):
+        out.append(FLOAT)
+        out.append(_f64.pack(value))
+    elif isinstance(value, str):
+        out.append(STR)
+        _encodestr(value, out)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(BYTES)
+        out.append(_u32.pack(len(value)))
+        out.append(bytes(value))
+    elif isinstance(value, Key):
+        out.append(KEY)
+        out.append(_u8.pack(value.idlength // 8))
+        out.append(bytes.fromhex(value.value))
+    elif isinstance(value, (list, tuple)):
+        if _isref(value):
+            _encoderef(value, out)
+            return
+        out.append(LIST)
+        out.append(_u32.pack(len(value)))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        if _isnode(value):
+            _encodenode(value, out)
+            return
+        out.append(DICT)
+        out.append(_u32.pack(len(value)))
+        for k, v in value.items():
+            if not isinstance(k, str):
+                raise TypeError("dict keys must be str")
+            _encodestr(k, out)
+            _encode(v, out)
+    elif hasattr(value, "__dict__"):
+        # same behaviour as xmlrpc.client which marshals instances as struct
+        _encode(vars(value), out)
+    else:
+        raise TypeError("cannot encode {}".format(type(value)))
+
+
+def encode(value):
+    """
+    Return `value` encoded as bytes
+    """
+    out = []
+    _encode(value, out)
+    return b"".join(out)
+
+
+class _Reader(object):
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def take(self, n):
+        end = self.pos + n
+        if end > len(self.data):
+            raise WireError("truncated data")
+        res = self.data[self.pos:end]
+        self.pos = end
+        return res
+
+    def unpack(self, st):
+        return st.unpack(self.take(st.size))[0]
+
+    def str(self):
+        return str(self.take(self.unpack(_u32)), "utf-8")
+
+    def address(self):
+        """
+        Return flags, uid, ip, port and rpcport (None if absent)
+        of a packed node
+        """
+        flags = self.unpack(_u8)
+        uid = self.take(self.unpack(_u8) if flags & _NODE_UIDLEN else _UIDLEN).hex()
+        if flags & _NODE_IPV4:
+            ip = socket.inet_ntoa(self.take(4))
+        else:
+            ip = self.str()
+        port = self.unpack(_u16)
+        rpcport = None
+        if flags & _NODE_RPCPORT:
+            rpcport = self.unpack(_u16)
+        return flags, uid, ip, port, rpcport
+
+    def ref(self):
+        flags, uid, ip, port, rpcport = self.address()
+        if rpcport is None:
+            return [uid, ip, port]
+        return [uid, ip, port, rpcport]
+
+    def node(self):
+        flags, uid, ip, port, rpcport = self.address()
+        res = {"ip": ip, "port": port, "uid": uid}
+        if rpcport is not None:
+            res["rpcport"] = rpcport
+        if flags & _NODE_SUCC:
+            if bytes(self.take(1)) != NODE:
+                raise WireError("succ of a node must be a node")
+            res["succ"] = self.node()
+        return res
+
+    def value(self):
+        tag = bytes(self.take(1))
+        if tag == NONE:
+            return None
+        elif tag == TRUE:
+            return True
+        elif tag == FALSE:
+            return False
+        elif tag == INT:
+            return self.unpack(_i64)
+        elif tag == BIGINT:
+            return int.from_bytes(self.take(self.unpack(_u16)), "big", signed=True)
+        elif tag == FLOAT:
+            return self.unpack(_f64)
+        elif tag == STR:
+            return self.str()
+        elif tag == BYTES:
+            return bytes(self.take(self.unpack(_u32)))
+        elif tag == KEY:
+            try:
+                return Key(self.take(self.unpack(_u8)).hex())
+            except ValueError as e:
+                raise WireError(str(e))
+        elif tag == LIST:
+            return [self.value() for i in range(self.unpack(_u32))]
+        elif tag == DICT:
+            res = {}
+            for i in range(self.unpack(_u32)):
+                k = self.str()
+                res[k] = self.value()
+            return res
+        elif tag == NODE:
+            return self.node()
+        elif tag == NODEREF:
+            return self.ref()
+        raise WireError("unknown tag {!r}".format(tag))
+
+
+def decode(data):
+    """
+    Return the value encoded in `data`
+    Raise WireError if data is malformed
+    """
+    reader = _Reader(data)
+    res = reader.value()
+    if reader.pos != len(reader.data):
+        raise WireError("trailing data")
+    return res
+
+
+def _recvexactly(sock, n):
+    chunks = []
+    while n:
+        chunk = sock.recv(n)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def sendframe(sock, payload):
+    sock.sendall(_u32.pack(len(payload)) + payload)
+
+
+def recvframe(sock):
+    """
+    Return the payload of the next frame read on `sock`
+    None if the connection has been closed before a new frame
+    Raise WireError if the frame is larger than MAXFRAME
+    """
+    header = _recvexactly(sock, _u32.size)
+    if header is None:
+        return None
+    length = _u32.unpack(header)[0]
+    if length > MAXFRAME:
+        raise WireError("frame of {} bytes, larger than {}".format(length, MAXFRAME))
+    payload = _recvexactly(sock, length)
+    if payload is None:
+        raise WireError("connection closed in the middle of a frame")
+    return payload